@@ -0,0 +1,71 @@
+"""
+Explain every known query shape against the configured MongoDB.
+
+Prints the winning plan (stages and index) of each shape the API and ingest
+issue, flags collection scans, and lists redundant and unused indexes (see
+``src/db/index_audit.py``).  The same report is served by ``GET /api/metrics``
+when the API runs its startup audit.
+
+Usage
+─────
+    python -m scripts.audit_queries
+    python -m scripts.audit_queries --json
+    python -m scripts.audit_queries --strict    # exit 1 on COLLSCAN / redundant index
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from src.db.index_audit import audit_queries
+from src.db.models import db, close_db
+
+
+def print_report(report: dict) -> None:
+    print(f"{'shape':<24} {'collection':<18} {'plan':<40} index")
+    for q in report["queries"]:
+        mark = "⚠" if q["flagged"] else "✓"
+        plan = " → ".join(q["stages"])
+        print(f"{mark} {q['name']:<22} {q['collection']:<18} {plan:<40} {', '.join(q['indexes']) or '-'}")
+
+    print()
+    for r in report["redundant_indexes"]:
+        print(f"⚠ {r['collection']}.{r['index']} is redundant — its key is a prefix of {r['covered_by']}")
+    for u in report["unused_indexes"]:
+        print(f"· {u['collection']}.{u['index']} is not used by any known query shape")
+    if not report["redundant_indexes"] and not any(q["flagged"] for q in report["queries"]):
+        print("✓ No collection scans or redundant indexes")
+
+
+async def run(as_json: bool) -> dict:
+    try:
+        report = await audit_queries(db)
+    finally:
+        await close_db()
+    if as_json:
+        print(json.dumps(report, indent=2, default=str))
+    else:
+        print_report(report)
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="MongoDB query-plan audit")
+    parser.add_argument("--json", action="store_true", help="Print the raw report as JSON")
+    parser.add_argument("--strict", action="store_true", help="Exit 1 if anything is flagged")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args.json))
+    if args.strict and (report["redundant_indexes"] or any(q["flagged"] for q in report["queries"])):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
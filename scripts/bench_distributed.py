@@ -0,0 +1,67 @@
+"""
+Scaling benchmark for data-parallel TCN training.
+
+Runs ``scripts.train.train_distributed`` on 1, 2, 4 and 8 local gloo
+processes (each with an equal share of the cores) and reports the mean
+epoch time, speed-up and parallel efficiency.  Nothing is checkpointed.
+
+Usage
+─────
+    python -m scripts.bench_distributed --csv data/mumbai_traffic.csv
+    python -m scripts.bench_distributed --csv data/mumbai_traffic.csv --procs 1 2 4 --epochs 3
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import tempfile
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from src.config import BATCH_SIZE
+from scripts.train import ThroughputOptions, launch_local, load_features
+
+
+def main():
+    parser = argparse.ArgumentParser(description="DDP scaling benchmark")
+    parser.add_argument("--csv", required=True, help="Path to traffic CSV")
+    parser.add_argument("--procs", nargs="+", type=int, default=[1, 2, 4, 8])
+    parser.add_argument("--epochs", type=int, default=2, help="Epochs per run (first is warm-up)")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    args = parser.parse_args()
+
+    # Populate the feature cache once so no run pays for preprocessing
+    load_features(args.csv)
+
+    rows = []
+    for nproc in args.procs:
+        print(f"\n── {nproc} process(es) ──")
+        with tempfile.TemporaryDirectory() as tmp:
+            result_path = Path(tmp) / "epochs.json"
+            launch_local(
+                nproc,
+                result_path=str(result_path),
+                csv_path=args.csv,
+                epochs=args.epochs,
+                batch_size=args.batch_size,
+                opts=ThroughputOptions(),
+                save=False,
+            )
+            epoch_times = json.loads(result_path.read_text())
+        # Skip the warm-up epoch when there is more than one
+        timed = epoch_times[1:] or epoch_times
+        rows.append((nproc, sum(timed) / len(timed)))
+
+    base = rows[0][1]
+    print(f"\n{'procs':>6}  {'epoch (s)':>10}  {'speed-up':>9}  {'efficiency':>10}")
+    for nproc, secs in rows:
+        speedup = base / secs
+        print(f"{nproc:>6}  {secs:>10.2f}  {speedup:>8.2f}x  {speedup / (nproc / rows[0][0]):>9.0%}")
+
+
+if __name__ == "__main__":
+    main()
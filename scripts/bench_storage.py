@@ -0,0 +1,145 @@
+"""
+Latency benchmark for the storage backends.
+
+Loads a CSV into a throw-away SQLite file (and into MongoDB when
+``MONGODB_URL`` is reachable; the Mongo run reads whatever is already
+ingested there) and times the queries the API serves most often:
+
+    history_block   24 readings before T for one road (the forecast path)
+    time_range      earliest / latest / count for one road
+    search          newest 100 readings of one road with congestion >= 0.5
+    list_segments   every segment's metadata
+
+and prints p50 / p95 latency in milliseconds per backend.
+
+Usage
+─────
+    python -m scripts.bench_storage --csv data/small_test.csv
+    python -m scripts.bench_storage --csv data/mumbai_traffic.csv --repeat 500 --skip-mongo
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from src.config import INPUT_WINDOW
+from src.db.sqlite_store import SQLiteStore
+from src.db.storage import TrafficStore
+from scripts.ingest_data import SEGMENT_FIELDS
+
+
+def load_csv(csv_path: str) -> pd.DataFrame:
+    df = pd.read_csv(csv_path, parse_dates=["timestamp"])
+    if df["timestamp"].dt.tz is not None:
+        df["timestamp"] = df["timestamp"].dt.tz_convert("UTC").dt.tz_localize(None)
+    return df
+
+
+def sample_probes(df: pd.DataFrame, n: int, seed: int = 0):
+    """(road_id, end_timestamp) pairs with at least INPUT_WINDOW readings before them."""
+    rng = random.Random(seed)
+    by_road = {r: g["timestamp"].sort_values().tolist() for r, g in df.groupby("road_id")}
+    roads = [r for r, ts in by_road.items() if len(ts) > INPUT_WINDOW]
+    probes = []
+    for _ in range(n):
+        road = rng.choice(roads)
+        ts = by_road[road]
+        probes.append((road, ts[rng.randrange(INPUT_WINDOW, len(ts))].to_pydatetime()))
+    return probes
+
+
+async def time_queries(store: TrafficStore, probes) -> dict[str, np.ndarray]:
+    timings: dict[str, list[float]] = {"history_block": [], "time_range": [], "search": [], "list_segments": []}
+
+    async def timed(name, coro):
+        t0 = time.perf_counter()
+        await coro
+        timings[name].append((time.perf_counter() - t0) * 1000)
+
+    for road_id, end_ts in probes:
+        await timed("history_block", store.fetch_history_block(road_id, end_ts, INPUT_WINDOW))
+        await timed("time_range", store.time_range(road_id))
+        await timed("search", store.search(road_id=road_id, min_congestion=0.5, limit=100))
+        await timed("list_segments", store.list_segments())
+    return {k: np.asarray(v) for k, v in timings.items()}
+
+
+async def load_sqlite(store: SQLiteStore, df: pd.DataFrame) -> None:
+    t0 = time.perf_counter()
+    await store.insert_readings(df.to_dict(orient="records"))
+    seg_df = df.groupby("road_id")[SEGMENT_FIELDS].first().reset_index()
+    await store.upsert_segments(seg_df.to_dict(orient="records"))
+    print(f"✓ Loaded {len(df)} readings into SQLite in {time.perf_counter() - t0:.2f}s")
+
+
+async def mongo_reachable(timeout_ms: int = 2000) -> bool:
+    from motor.motor_asyncio import AsyncIOMotorClient
+    from src.config import MONGODB_URL
+
+    client = AsyncIOMotorClient(MONGODB_URL, serverSelectionTimeoutMS=timeout_ms)
+    try:
+        await client.admin.command("ping")
+        return True
+    except Exception:
+        return False
+    finally:
+        client.close()
+
+
+async def run(csv_path: str, repeat: int, skip_mongo: bool) -> None:
+    df = load_csv(csv_path)
+    probes = sample_probes(df, repeat)
+    results = {}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = SQLiteStore(Path(tmp) / "bench.db")
+        await store.init()
+        try:
+            await load_sqlite(store, df)
+            results["sqlite"] = await time_queries(store, probes)
+        finally:
+            await store.close()
+
+    if skip_mongo:
+        pass
+    elif await mongo_reachable():
+        from src.db.mongo_store import MongoStore
+
+        store = MongoStore()
+        await store.init()
+        try:
+            results["mongo"] = await time_queries(store, probes)
+        finally:
+            await store.close()
+    else:
+        print("MongoDB not reachable — skipping the mongo backend.")
+
+    print(f"\n{'backend':>8}  {'query':>14}  {'p50 (ms)':>9}  {'p95 (ms)':>9}")
+    for backend, timings in results.items():
+        for name, ms in timings.items():
+            print(f"{backend:>8}  {name:>14}  {np.percentile(ms, 50):>9.3f}  {np.percentile(ms, 95):>9.3f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Storage backend latency benchmark")
+    parser.add_argument("--csv", required=True, help="Path to traffic CSV")
+    parser.add_argument("--repeat", type=int, default=200, help="Probes per query")
+    parser.add_argument("--skip-mongo", action="store_true", help="Only benchmark SQLite")
+    args = parser.parse_args()
+    asyncio.run(run(args.csv, args.repeat, args.skip_mongo))
+
+
+if __name__ == "__main__":
+    main()
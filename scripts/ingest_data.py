@@ -4,34 +4,84 @@ Ingest a CSV dataset into the MongoDB Atlas database.
 This script:
 1. Reads the raw CSV file.
 2. Parses timestamps (timezone-aware → naive UTC for DB storage).
-3. Inserts all rows into ``traffic_readings`` collection.
+3. Upserts all rows into ``traffic_readings`` collection — or, with
+   ``--layout bucket``, upserts one document per road per day into
+   ``traffic_buckets`` (see ``src/db/buckets.py``).
 4. Extracts **unique road segments** and populates ``road_segments``
    collection (the collection that feeds the MERN frontend dropdown).
 
+``--stream`` swaps steps 1–4 for a constant-memory pipeline: the CSV is read
+in chunks with explicit dtypes, each chunk is turned into documents in a
+worker thread, and several unordered bulk upserts on the unique
+(road_id, timestamp) index are kept in flight at once.  A checkpoint file
+records the rows already written, so an interrupted run resumes where it
+stopped and re-running a finished file is a no-op.
+
+``--backend sqlite`` writes readings and segments into the embedded SQLite
+file at ``SQLITE_PATH`` instead (see ``src/db/sqlite_store.py``).
+
+Every Mongo path also folds the new readings into ``segment_stats`` (earliest,
+latest, count per road); ``--rebuild-stats`` recomputes it from scratch.
+
 Usage
 ─────
     python -m scripts.ingest_data --csv data/mumbai_traffic.csv
+    python -m scripts.ingest_data --csv data/mumbai_traffic.csv --layout bucket
+    python -m scripts.ingest_data --csv data/mumbai_traffic.csv --stream --in-flight 8
+    python -m scripts.ingest_data --rebuild-stats
+    python -m scripts.ingest_data --csv data/mumbai_traffic.csv --backend sqlite
 """
 
 from __future__ import annotations
 
 import argparse
 import asyncio
+import hashlib
+import json
+import os
 import sys
+import time
+from collections import Counter
 from pathlib import Path
 
 import pandas as pd
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ReplaceOne
 
 # Ensure project root is on sys.path
 ROOT = Path(__file__).resolve().parent.parent
 sys.path.insert(0, str(ROOT))
 
-from src.config import MONGODB_URL, DATABASE_NAME
-from src.db.models import traffic_readings, road_segments
+from src.config import (
+    MONGODB_URL,
+    DATABASE_NAME,
+    STORAGE_LAYOUT,
+    STORAGE_BACKEND,
+    INGEST_CHUNK_ROWS,
+    INGEST_BATCH_SIZE,
+    INGEST_IN_FLIGHT,
+    INGEST_CHECKPOINT_DIR,
+)
+from src.db.buckets import build_bucket_docs, bucket_write_ops, merge_bucket_docs
+from src.db.models import (
+    traffic_readings,
+    traffic_buckets,
+    road_segments,
+    segment_stats,
+    traffic_rollups,
+    init_db,
+)
+from src.db.geo import with_location
+from src.db.segment_stats import rebuild_segment_stats, stats_update_ops
+from src.db.sqlite_store import SQLiteStore
 
 
-async def ingest(csv_path: str, batch_size: int = 500) -> None:
+async def ingest(
+    csv_path: str,
+    batch_size: int = 500,
+    layout: str = STORAGE_LAYOUT,
+    backend: str = STORAGE_BACKEND,
+) -> None:
     """Load CSV → MongoDB (traffic_readings + road_segments collections)."""
 
     print(f"Reading {csv_path} …")
@@ -41,14 +91,44 @@ async def ingest(csv_path: str, batch_size: int = 500) -> None:
     if df["timestamp"].dt.tz is not None:
         df["timestamp"] = df["timestamp"].dt.tz_convert("UTC").dt.tz_localize(None)
 
+    if backend == "sqlite":
+        await ingest_sqlite(df, batch_size)
+        return
+
     # Connect to MongoDB
     client = AsyncIOMotorClient(MONGODB_URL)
     db = client[DATABASE_NAME]
 
     try:
         # ── 1. Insert traffic readings in batches ──────────────────────────────
-        print(f"Inserting {len(df)} traffic readings …")
-        records = df.to_dict(orient="records")
+        if layout == "bucket":
+            # One document per road per day; upserts on (r, d) merged with
+            # the stored bucket so a re-run or a later CSV for the same day
+            # neither duplicates nor drops readings
+            docs = build_bucket_docs(df)
+            print(f"Upserting {len(df)} traffic readings as {len(docs)} day buckets …")
+            new_counts: Counter = Counter()
+            for start in range(0, len(docs), batch_size):
+                batch = docs[start : start + batch_size]
+                stored = await traffic_buckets.find(
+                    {"r": {"$in": list({d["r"] for d in batch})},
+                     "d": {"$in": list({d["d"] for d in batch})}},
+                    {"_id": 0},
+                ).to_list(length=None)
+                merged = merge_bucket_docs(stored, batch)
+                # The stats count only grows by what is actually new
+                old_n = {(s["r"], s["d"]): s["n"] for s in stored}
+                for d in merged:
+                    new_counts[d["r"]] += d["n"] - old_n.get((d["r"], d["d"]), 0)
+                ops = bucket_write_ops(merged)
+                if ops:
+                    await traffic_buckets.bulk_write(ops, ordered=False)
+                print(f"  ✓ {min(start + batch_size, len(docs))}/{len(docs)} buckets")
+            records = []
+        else:
+            print(f"Upserting {len(df)} traffic readings …")
+            new_counts = Counter()
+            records = df.to_dict(orient="records")
         for start in range(0, len(records), batch_size):
             batch = records[start : start + batch_size]
             # Convert records to MongoDB format (remove None values)
@@ -59,9 +139,16 @@ async def ingest(csv_path: str, batch_size: int = 500) -> None:
                 mongo_batch.append(doc)
 
             if mongo_batch:
-                await traffic_readings.insert_many(mongo_batch)
+                # Upserts on the unique (road_id, timestamp): re-runs and
+                # overlapping CSVs don't fail, and only readings actually
+                # inserted grow the segment's count
+                result = await traffic_readings.bulk_write(upsert_ops(mongo_batch), ordered=False)
+                new_counts.update(mongo_batch[i]["road_id"] for i in result.upserted_ids)
             print(f"  ✓ {min(start + batch_size, len(records))}/{len(records)}")
 
+        # Fold the new readings into the per-segment stats (earliest / latest / count)
+        await segment_stats.bulk_write(stats_update_ops(df, new_counts), ordered=False)
+
         # ── 2. Extract unique segments for the dropdown ────────────────────────
         print("Extracting unique road segments …")
         seg_df = (
@@ -90,8 +177,8 @@ async def ingest(csv_path: str, batch_size: int = 500) -> None:
                 "lon": row["lon"],
                 "road_class": row["road_class"],
             }
-            # Filter out None values
-            doc = {k: v for k, v in doc.items() if v is not None}
+            # Filter out None values; add the GeoJSON point for map queries
+            doc = with_location({k: v for k, v in doc.items() if v is not None})
             segment_docs.append(doc)
 
         if segment_docs:
@@ -104,21 +191,298 @@ async def ingest(csv_path: str, batch_size: int = 500) -> None:
         client.close()
 
 
+async def ingest_sqlite(df: pd.DataFrame, batch_size: int) -> None:
+    """Load readings + segments into the embedded SQLite store."""
+    store = SQLiteStore()
+    await store.init()
+    try:
+        print(f"Writing {len(df)} traffic readings to {store.path} …")
+        records = df.to_dict(orient="records")
+        for start in range(0, len(records), batch_size):
+            await store.insert_readings(records[start : start + batch_size])
+            print(f"  ✓ {min(start + batch_size, len(records))}/{len(records)}")
+
+        seg_df = df.groupby("road_id")[SEGMENT_FIELDS].first().reset_index()
+        n = await store.upsert_segments(seg_df.to_dict(orient="records"))
+        print(f"✓ Wrote {n} unique segments to road_segments.")
+        print("Done.")
+    finally:
+        await store.close()
+
+
+# ──────────────────────── Streaming ingest ───────────────────────────────
+
+CSV_DTYPES = {
+    "road_id": "str",
+    "road_name": "str",
+    "segment_name": "str",
+    "lat": "float64",
+    "lon": "float64",
+    "road_class": "str",
+    "hour": "int64",
+    "day_of_week": "int64",
+    "is_weekend": "int64",
+    "month": "int64",
+    "hourly_speed_kph": "float64",
+    "avg_speed_kph": "float64",
+    "travel_time_s": "float64",
+    "free_flow_speed_kph": "float64",
+    "free_flow_travel_time_s": "float64",
+    "delay_ratio": "float64",
+    "congestion_level": "float64",
+    "congestion_band": "str",
+    "accident_hotspot_score": "float64",
+    "recent_incident_count": "int64",
+    "enforcement_violation_pattern": "float64",
+    "long_term_risk_prior": "float64",
+}
+
+SEGMENT_FIELDS = ["road_name", "segment_name", "lat", "lon", "road_class"]
+
+
+class IngestCheckpoint:
+    """
+    Rows of one CSV already written to MongoDB.
+
+    Keyed on the file's path, size and mtime, so editing the CSV starts a
+    fresh ingest.  Writes go to a temp file and are renamed into place.
+    """
+
+    def __init__(self, csv_path: str, root: Path = INGEST_CHECKPOINT_DIR):
+        stat = os.stat(csv_path)
+        ident = f"{Path(csv_path).resolve()}|{stat.st_size}|{stat.st_mtime_ns}"
+        self.path = Path(root) / f"{hashlib.sha256(ident.encode()).hexdigest()[:24]}.json"
+        self.csv_path = str(csv_path)
+
+    def load(self) -> int:
+        try:
+            return int(json.loads(self.path.read_text())["rows_done"])
+        except (OSError, ValueError, KeyError):
+            return 0
+
+    def save(self, rows_done: int) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(".tmp")
+        tmp.write_text(json.dumps({"csv": self.csv_path, "rows_done": rows_done}))
+        os.replace(tmp, self.path)
+
+    def clear(self) -> None:
+        self.path.unlink(missing_ok=True)
+
+
+def chunk_to_docs(chunk: pd.DataFrame) -> list[dict]:
+    """CSV chunk → traffic_readings documents (runs in a worker thread)."""
+    ts = pd.to_datetime(chunk["timestamp"])
+    if ts.dt.tz is not None:
+        ts = ts.dt.tz_convert("UTC").dt.tz_localize(None)
+    chunk = chunk.assign(timestamp=ts)
+    return [
+        {k: v for k, v in r.items() if v is not None}
+        for r in chunk.to_dict(orient="records")
+    ]
+
+
+def upsert_ops(docs: list[dict]) -> list[ReplaceOne]:
+    """Replace-or-insert on (road_id, timestamp) — re-runs never duplicate."""
+    return [
+        ReplaceOne({"road_id": d["road_id"], "timestamp": d["timestamp"]}, d, upsert=True)
+        for d in docs
+    ]
+
+
+async def ingest_stream(
+    csv_path: str,
+    chunk_rows: int = INGEST_CHUNK_ROWS,
+    batch_size: int = INGEST_BATCH_SIZE,
+    in_flight: int = INGEST_IN_FLIGHT,
+    restart: bool = False,
+) -> None:
+    """Chunked, concurrent, resumable CSV → ``traffic_readings`` ingest."""
+    await init_db()   # ensures the unique road_time_idx the upserts rely on
+
+    checkpoint = IngestCheckpoint(csv_path)
+    if restart:
+        checkpoint.clear()
+    skip = checkpoint.load()
+    if skip:
+        print(f"Resuming {csv_path} after {skip:,} rows (checkpoint {checkpoint.path.name})")
+    else:
+        print(f"Streaming {csv_path} in chunks of {chunk_rows:,} rows …")
+
+    reader = pd.read_csv(
+        csv_path,
+        dtype=CSV_DTYPES,
+        chunksize=chunk_rows,
+        skiprows=range(1, skip + 1) if skip else None,
+    )
+
+    slots = asyncio.Semaphore(max(1, in_flight))
+    pending: set[asyncio.Task] = set()
+    # Chunks finish out of order; the checkpoint only advances over the
+    # contiguous prefix of completed chunks.
+    chunk_ends: list[int] = []
+    remaining: dict[int, int] = {}
+    committed = skip
+    seen_roads: set[str] = set()
+    written, t0 = 0, time.perf_counter()
+
+    errors: list[BaseException] = []
+
+    async def write(chunk_no: int, docs: list[dict]) -> None:
+        nonlocal committed, written
+        try:
+            result = await traffic_readings.bulk_write(upsert_ops(docs), ordered=False)
+            # Only upserts that inserted a reading grow the segment's count
+            rows = pd.DataFrame({
+                "road_id": [d["road_id"] for d in docs],
+                "timestamp": [d["timestamp"] for d in docs],
+            })
+            new_counts = Counter(rows["road_id"].iloc[list(result.upserted_ids)])
+            await segment_stats.bulk_write(stats_update_ops(rows, new_counts), ordered=False)
+        except Exception as exc:
+            errors.append(exc)
+            return
+        finally:
+            slots.release()
+        written += len(docs)
+        remaining[chunk_no] -= 1
+        advanced = False
+        while remaining and remaining[min(remaining)] == 0:
+            n = min(remaining)
+            committed = chunk_ends[n]
+            del remaining[n]
+            advanced = True
+        if advanced:
+            checkpoint.save(committed)
+
+    start_row = skip
+    chunk_no = 0
+    while True:
+        chunk = await asyncio.to_thread(next, reader, None)
+        if chunk is None:
+            break
+        docs = await asyncio.to_thread(chunk_to_docs, chunk)
+        start_row += len(chunk)
+
+        new_roads = chunk.drop_duplicates("road_id")
+        new_roads = new_roads[~new_roads["road_id"].isin(seen_roads)]
+        if len(new_roads):
+            seen_roads.update(new_roads["road_id"])
+            await road_segments.bulk_write([
+                ReplaceOne(
+                    {"road_id": row["road_id"]},
+                    with_location({"road_id": row["road_id"], **{f: row[f] for f in SEGMENT_FIELDS if pd.notna(row[f])}}),
+                    upsert=True,
+                )
+                for row in new_roads.to_dict(orient="records")
+            ], ordered=False)
+
+        batches = [docs[i : i + batch_size] for i in range(0, len(docs), batch_size)]
+        chunk_ends.append(start_row)
+        remaining[chunk_no] = len(batches)
+        for batch in batches:
+            await slots.acquire()
+            if errors:
+                slots.release()
+                break
+            task = asyncio.create_task(write(chunk_no, batch))
+            pending.add(task)
+            task.add_done_callback(pending.discard)
+        chunk_no += 1
+        if errors:
+            break
+
+        elapsed = time.perf_counter() - t0
+        print(f"  ✓ {start_row:,} rows read · {written:,} written · {written / max(elapsed, 1e-9):,.0f} rows/s")
+
+    if pending:
+        await asyncio.gather(*pending)
+    if errors:
+        raise RuntimeError(
+            f"Ingest stopped after a failed bulk write; {committed:,} rows are "
+            f"checkpointed and a re-run resumes from there."
+        ) from errors[0]
+
+    elapsed = time.perf_counter() - t0
+    checkpoint.clear()
+    print(
+        f"✓ Upserted {written:,} readings in {elapsed:.1f}s "
+        f"({written / max(elapsed, 1e-9):,.0f} rows/s); {len(seen_roads)} segments touched."
+    )
+
+
 def main():
     parser = argparse.ArgumentParser(description="Ingest traffic CSV into DB")
     parser.add_argument(
         "--csv",
-        required=True,
         help="Path to the raw traffic CSV file",
     )
     parser.add_argument(
         "--batch-size",
         type=int,
-        default=500,
-        help="Number of rows per DB insert batch",
+        default=None,
+        help=f"Number of rows (or day buckets) per DB write batch "
+             f"(default: 500, or {INGEST_BATCH_SIZE} with --stream)",
+    )
+    parser.add_argument(
+        "--layout",
+        choices=["document", "bucket"],
+        default=STORAGE_LAYOUT,
+        help="Storage layout: one document per reading, or per road per day",
+    )
+    parser.add_argument(
+        "--backend",
+        choices=["mongo", "sqlite"],
+        default=STORAGE_BACKEND,
+        help="Target store: MongoDB, or the embedded SQLite file (SQLITE_PATH)",
+    )
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="Chunked, concurrent, resumable upsert ingest (document layout)",
+    )
+    parser.add_argument(
+        "--chunk-rows",
+        type=int,
+        default=INGEST_CHUNK_ROWS,
+        help="CSV rows parsed per chunk (--stream)",
+    )
+    parser.add_argument(
+        "--in-flight",
+        type=int,
+        default=INGEST_IN_FLIGHT,
+        help="Concurrent unordered bulk writes (--stream)",
+    )
+    parser.add_argument(
+        "--restart",
+        action="store_true",
+        help="Ignore any checkpoint and ingest the file from the start (--stream)",
+    )
+    parser.add_argument(
+        "--rebuild-stats",
+        action="store_true",
+        help="Recompute segment_stats from the stored readings and exit",
     )
     args = parser.parse_args()
-    asyncio.run(ingest(args.csv, args.batch_size))
+
+    if args.backend == "sqlite" and (args.stream or args.rebuild_stats or args.layout == "bucket"):
+        parser.error("--stream, --rebuild-stats and --layout bucket are MongoDB-only")
+
+    if args.rebuild_stats:
+        readings = traffic_buckets if args.layout == "bucket" else traffic_readings
+        n = asyncio.run(rebuild_segment_stats(segment_stats, readings, args.layout == "bucket", traffic_rollups))
+        print(f"✓ Rebuilt segment_stats for {n} segments.")
+        return
+    if not args.csv:
+        parser.error("--csv is required")
+
+    if args.stream:
+        if args.layout == "bucket":
+            parser.error("--stream writes the document layout; use the default ingest for --layout bucket")
+        batch_size = args.batch_size or INGEST_BATCH_SIZE
+        asyncio.run(ingest_stream(args.csv, args.chunk_rows, batch_size, args.in_flight, args.restart))
+    else:
+        asyncio.run(ingest(args.csv, args.batch_size or 500, args.layout, args.backend))
 
 
 if __name__ == "__main__":
@@ -0,0 +1,79 @@
+"""
+Roll old traffic readings up into daily and weekly summaries.
+
+Readings older than ``ROLLUP_DAILY_AFTER_DAYS`` are folded into one
+``traffic_rollups`` document per road per UTC day and removed from
+``traffic_readings`` (or moved to ``traffic_readings_archive`` with
+``--mode archive``); daily rollups older than ``ROLLUP_WEEKLY_AFTER_DAYS``
+are merged into weekly ones (see ``src/db/rollups.py``).  Safe to re-run,
+e.g. nightly from cron.  Document layout only — buckets are already one
+document per road per day.
+
+Usage
+─────
+    python -m scripts.rollup
+    python -m scripts.rollup --mode archive
+    python -m scripts.rollup --tier weekly --as-of 2025-01-01
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from src.config import ROLLUP_DAILY_AFTER_DAYS, ROLLUP_MODE, ROLLUP_WEEKLY_AFTER_DAYS, STORAGE_LAYOUT
+from src.db.models import close_db, init_db, traffic_readings, traffic_readings_archive, traffic_rollups
+from src.db.rollups import rollup_daily, rollup_weekly
+
+
+async def run(as_of: datetime, mode: str, tier: str) -> None:
+    await init_db()
+    try:
+        today = datetime(as_of.year, as_of.month, as_of.day)
+        road_ids = sorted(await traffic_readings.distinct("road_id"))
+        if tier in ("daily", "all"):
+            cutoff = today - timedelta(days=ROLLUP_DAILY_AFTER_DAYS)
+            archive = traffic_readings_archive if mode == "archive" else None
+            rows = docs = 0
+            for road_id in road_ids:
+                n, d = await rollup_daily(traffic_readings, traffic_rollups, road_id, cutoff, archive)
+                rows, docs = rows + n, docs + d
+            verb = "archived" if archive is not None else "deleted"
+            print(f"✓ Daily: {rows} readings before {cutoff:%Y-%m-%d} → {docs} rollups ({verb})")
+
+        if tier in ("weekly", "all"):
+            cutoff = today - timedelta(days=ROLLUP_WEEKLY_AFTER_DAYS)
+            cutoff -= timedelta(days=cutoff.weekday())   # whole weeks only
+            road_ids = sorted(set(road_ids) | set(await traffic_rollups.distinct("road_id", {"tier": "daily"})))
+            dailies = weeks = 0
+            for road_id in road_ids:
+                n, w = await rollup_weekly(traffic_rollups, road_id, cutoff)
+                dailies, weeks = dailies + n, weeks + w
+            print(f"✓ Weekly: {dailies} daily rollups before {cutoff:%Y-%m-%d} → {weeks} weekly rollups")
+    finally:
+        await close_db()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Downsample old traffic readings into rollups")
+    parser.add_argument("--as-of", type=datetime.fromisoformat, default=datetime.utcnow(),
+                        help="Reference date for the age cutoffs (default: now, UTC)")
+    parser.add_argument("--mode", choices=["delete", "archive"], default=ROLLUP_MODE,
+                        help="What happens to rolled-up raw readings (default: ROLLUP_MODE)")
+    parser.add_argument("--tier", choices=["daily", "weekly", "all"], default="all")
+    args = parser.parse_args()
+
+    if STORAGE_LAYOUT == "bucket":
+        print("⚠ STORAGE_LAYOUT=bucket: readings are already bucketed per day, nothing to roll up")
+        return
+    asyncio.run(run(args.as_of, args.mode, args.tier))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,317 @@
+"""
+Parallel hyper-parameter sweep for the TCN.
+
+Pipeline
+────────
+1. Prepare the windowed dataset **once** (through the feature cache) and
+   write X / Y as ``.npy`` files that every trial memory-maps.
+2. Expand the search grid over TCN_CHANNELS, TCN_KERNEL_SIZE,
+   DILATION_FACTORS, LEARNING_RATE and BATCH_SIZE.
+3. Run trials N at a time in separate processes, each pinned to its own
+   slice of cores, using **successive halving**: every rung trains the
+   surviving trials to ``min_epochs · etaᵏ`` epochs (resuming from their
+   checkpoint) and keeps the best ``1 / eta`` by validation loss.
+4. Collect validation loss, training time and single-sample inference
+   latency per config into ``runs/<timestamp>/results.csv``.
+
+Usage
+─────
+    python -m scripts.sweep --csv data/mumbai_traffic.csv --parallel 4
+    python -m scripts.sweep --csv data/mumbai_traffic.csv \
+        --channels 32,32,32,32 64,64,64,64 --kernel-sizes 2 3 \
+        --lrs 1e-3 5e-4 --batch-sizes 64 128 --min-epochs 3 --max-epochs 27
+"""
+
+from __future__ import annotations
+
+import argparse
+import itertools
+import json
+import math
+import multiprocessing as mp
+import os
+import shutil
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import torch
+import torch.nn as nn
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from src.config import (
+    BATCH_SIZE,
+    CACHE_DIR,
+    DILATION_FACTORS,
+    FORECAST_HORIZON,
+    INPUT_WINDOW,
+    LEARNING_RATE,
+    NUM_FEATURES,
+    PREP_WORKERS,
+    TCN_CHANNELS,
+    TCN_DROPOUT,
+    TCN_KERNEL_SIZE,
+    TRAIN_SPLIT,
+)
+from src.data.feature_cache import feature_cache_key
+from src.data.preprocessor import create_segment_windows
+from src.models.tcn import TemporalConvNet
+from scripts.train import (
+    ThroughputOptions,
+    evaluate,
+    load_features,
+    make_loaders,
+    train_one_epoch,
+)
+
+SWEEP_DIR = CACHE_DIR / "sweeps"
+
+
+# ─────────────────────── Shared dataset ────────────────────────────────────
+
+def prepare_shared_dataset(csv_path: str, prep_workers: int = PREP_WORKERS) -> Path:
+    """
+    Window the dataset once and store X / Y as ``.npy`` for the trials to
+    memory-map.  Re-used across sweeps of the same CSV + feature config.
+
+    The files are written to a temporary sibling directory and renamed
+    into place, so a killed run never leaves a truncated dataset behind.
+    """
+    key = feature_cache_key(csv_path)
+    data_dir = SWEEP_DIR / key
+    if (data_dir / "Y.npy").exists():
+        print(f"  Reusing windowed dataset: {data_dir}")
+        return data_dir
+
+    features = load_features(csv_path)
+    X, Y = create_segment_windows(features.scaled, features.offsets, prep_workers)
+    SWEEP_DIR.mkdir(parents=True, exist_ok=True)
+    tmp = Path(tempfile.mkdtemp(prefix=f".{key}-", dir=SWEEP_DIR))
+    try:
+        np.save(tmp / "X.npy", X)
+        np.save(tmp / "Y.npy", Y)
+        if data_dir.exists():
+            shutil.rmtree(data_dir)
+        os.replace(tmp, data_dir)
+    finally:
+        if tmp.exists():
+            shutil.rmtree(tmp, ignore_errors=True)
+    print(f"  Windowed dataset written to {data_dir}  X={X.shape}")
+    return data_dir
+
+
+# ─────────────────────── Search space ──────────────────────────────────────
+
+def _int_list(text: str) -> list[int]:
+    return [int(v) for v in text.split(",")]
+
+
+def build_grid(
+    channels: list[list[int]],
+    kernel_sizes: list[int],
+    dilations: list[list[int]],
+    lrs: list[float],
+    batch_sizes: list[int],
+) -> list[dict]:
+    grid = []
+    for ch, k, dil, lr, bs in itertools.product(channels, kernel_sizes, dilations, lrs, batch_sizes):
+        if len(ch) != len(dil):
+            continue  # TemporalConvNet needs one channel size per dilation
+        grid.append({
+            "trial": len(grid),
+            "channels": ch,
+            "kernel_size": k,
+            "dilations": dil,
+            "lr": lr,
+            "batch_size": bs,
+        })
+    return grid
+
+
+# ─────────────────────── Trial worker ──────────────────────────────────────
+
+def _pin_worker(slots: "mp.Queue") -> None:
+    """Pool initializer: claim a disjoint set of cores for this process."""
+    cores = slots.get()
+    if hasattr(os, "sched_setaffinity"):
+        try:
+            os.sched_setaffinity(0, cores)
+        except OSError:
+            pass
+    torch.set_num_threads(len(cores))
+    torch.set_num_interop_threads(1)
+
+
+def _inference_latency_ms(model: nn.Module, runs: int = 50) -> float:
+    """Median latency of a single (1, F, 24) forward pass."""
+    model.eval()
+    x = torch.randn(1, NUM_FEATURES, INPUT_WINDOW)
+    timings = []
+    with torch.inference_mode():
+        for _ in range(5):
+            model(x)
+        for _ in range(runs):
+            t0 = time.perf_counter()
+            model(x)
+            timings.append(time.perf_counter() - t0)
+    return float(np.median(timings) * 1000)
+
+
+def run_trial(spec: dict, data_dir: str, run_dir: str, target_epochs: int) -> dict:
+    """
+    Train *spec* up to *target_epochs* total epochs, resuming from the
+    trial's checkpoint in *run_dir* if an earlier rung already trained it.
+    """
+    torch.manual_seed(spec["trial"])
+    # Copy-on-write mappings: every trial shares the page cache and nothing
+    # is copied unless written (torch needs a writable array).
+    X = np.load(Path(data_dir) / "X.npy", mmap_mode="c")
+    Y = np.load(Path(data_dir) / "Y.npy", mmap_mode="c")
+    split = int(len(X) * TRAIN_SPLIT)
+    train_loader, val_loader = make_loaders(
+        X[:split], Y[:split], X[split:], Y[split:],
+        spec["batch_size"], ThroughputOptions(val_batch_size=1024),
+    )
+
+    model = TemporalConvNet(
+        num_features=NUM_FEATURES,
+        num_channels=spec["channels"],
+        kernel_size=spec["kernel_size"],
+        dilations=spec["dilations"],
+        dropout=TCN_DROPOUT,
+        forecast_horizon=FORECAST_HORIZON,
+    )
+    optimiser = torch.optim.Adam(model.parameters(), lr=spec["lr"])
+    criterion = nn.MSELoss()
+    device = torch.device("cpu")
+
+    ckpt_path = Path(run_dir) / f"trial_{spec['trial']}.pt"
+    done_epochs, train_secs = 0, 0.0
+    if ckpt_path.exists():
+        ckpt = torch.load(ckpt_path, map_location="cpu")
+        model.load_state_dict(ckpt["model"])
+        optimiser.load_state_dict(ckpt["optimiser"])
+        done_epochs, train_secs = ckpt["epochs"], ckpt["train_secs"]
+
+    for _ in range(done_epochs, target_epochs):
+        _, _, secs = train_one_epoch(model, train_loader, criterion, optimiser, device)
+        train_secs += secs
+    val_loss, _, _ = evaluate(model, val_loader, criterion, device)
+
+    ckpt_path.parent.mkdir(parents=True, exist_ok=True)
+    torch.save(
+        {"model": model.state_dict(), "optimiser": optimiser.state_dict(),
+         "epochs": target_epochs, "train_secs": train_secs},
+        ckpt_path,
+    )
+
+    return {
+        **spec,
+        "epochs": target_epochs,
+        "val_loss": val_loss,
+        "train_secs": round(train_secs, 2),
+        "latency_ms": round(_inference_latency_ms(model), 3),
+    }
+
+
+# ─────────────────────── Successive halving ────────────────────────────────
+
+def successive_halving(
+    grid: list[dict],
+    data_dir: Path,
+    run_dir: Path,
+    parallel: int,
+    min_epochs: int,
+    max_epochs: int,
+    eta: int = 3,
+) -> pd.DataFrame:
+    """
+    Run the grid with successive halving and return one row per trial
+    (its last completed rung).
+    """
+    if hasattr(os, "sched_getaffinity"):
+        cores = sorted(os.sched_getaffinity(0))
+    else:
+        cores = list(range(os.cpu_count() or 1))
+    parallel = max(1, min(parallel, len(cores), len(grid)))
+    per_worker = len(cores) // parallel
+
+    ctx = mp.get_context()
+    slots = ctx.Queue()
+    for w in range(parallel):
+        slots.put(set(cores[w * per_worker : (w + 1) * per_worker]))
+
+    results: dict[int, dict] = {}
+    survivors = list(grid)
+    rung_epochs = min_epochs
+    rung = 0
+    with ProcessPoolExecutor(max_workers=parallel, mp_context=ctx,
+                             initializer=_pin_worker, initargs=(slots,)) as pool:
+        while survivors:
+            print(f"Rung {rung}: {len(survivors)} trial(s) → {rung_epochs} epochs")
+            futures = [pool.submit(run_trial, spec, str(data_dir), str(run_dir), rung_epochs) for spec in survivors]
+            rung_results = [f.result() for f in futures]
+            for r in rung_results:
+                results[r["trial"]] = {**r, "rung": rung}
+                print(
+                    f"  trial {r['trial']:>3}  val_loss={r['val_loss']:.6f}  "
+                    f"train={r['train_secs']:.1f}s  latency={r['latency_ms']:.2f}ms"
+                )
+
+            if rung_epochs >= max_epochs or len(survivors) == 1:
+                break
+            keep = max(1, math.floor(len(survivors) / eta))
+            best = sorted(rung_results, key=lambda r: r["val_loss"])[:keep]
+            survivors = [spec for spec in grid if spec["trial"] in {r["trial"] for r in best}]
+            rung_epochs = min(rung_epochs * eta, max_epochs)
+            rung += 1
+
+    table = pd.DataFrame(results.values())
+    return table.sort_values(["rung", "val_loss"], ascending=[False, True]).reset_index(drop=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Parallel TCN hyper-parameter sweep")
+    parser.add_argument("--csv", required=True, help="Path to traffic CSV")
+    parser.add_argument("--channels", nargs="+", type=_int_list,
+                        default=[TCN_CHANNELS], help="Channel lists, e.g. 64,64,64,64")
+    parser.add_argument("--kernel-sizes", nargs="+", type=int, default=[TCN_KERNEL_SIZE])
+    parser.add_argument("--dilations", nargs="+", type=_int_list,
+                        default=[DILATION_FACTORS], help="Dilation lists, e.g. 1,2,4,8")
+    parser.add_argument("--lrs", nargs="+", type=float, default=[LEARNING_RATE])
+    parser.add_argument("--batch-sizes", nargs="+", type=int, default=[BATCH_SIZE])
+    parser.add_argument("--parallel", type=int, default=2, help="Concurrent trial processes")
+    parser.add_argument("--min-epochs", type=int, default=3, help="Epochs in the first rung")
+    parser.add_argument("--max-epochs", type=int, default=27, help="Epoch budget of the last rung")
+    parser.add_argument("--eta", type=int, default=3, help="Keep 1/eta trials per rung")
+    parser.add_argument("--prep-workers", type=int, default=PREP_WORKERS)
+    args = parser.parse_args()
+
+    grid = build_grid(args.channels, args.kernel_sizes, args.dilations, args.lrs, args.batch_sizes)
+    if not grid:
+        parser.error("search grid is empty (channel and dilation lists must have equal length)")
+    print(f"Sweeping {len(grid)} configuration(s) with {args.parallel} parallel trial(s)")
+
+    data_dir = prepare_shared_dataset(args.csv, args.prep_workers)
+    run_dir = data_dir / "runs" / time.strftime("%Y%m%d-%H%M%S")
+    table = successive_halving(
+        grid, data_dir, run_dir, args.parallel, args.min_epochs, args.max_epochs, args.eta
+    )
+
+    out_path = run_dir / "results.csv"
+    run_dir.mkdir(parents=True, exist_ok=True)
+    table.assign(channels=table["channels"].map(json.dumps),
+                 dilations=table["dilations"].map(json.dumps)).to_csv(out_path, index=False)
+    print()
+    print(table.to_string(index=False))
+    print(f"\n✓ Results written to: {out_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -4,27 +4,51 @@ Train the TCN model on the ingested traffic dataset.
 Pipeline
 ────────
 1. Load CSV → add cyclic features → scale → create sliding windows per segment.
+   The scaled feature matrix is cached under ``cache/features/`` keyed by
+   the CSV hash + feature config, so re-runs skip straight to windowing.
 2. Split into train / val.
 3. Train the TemporalConvNet for N epochs (MSE loss, Adam optimiser).
-4. Save model weights + scaler to ``models/``.
+4. Save model weights + scaler to ``models/`` and record the training
+   cutoff in ``models/train_meta.json``.
+
+``--incremental`` instead warm-starts from the saved weights and scaler and
+fine-tunes for a few epochs on windows newer than the recorded cutoff, plus
+a replay sample of older windows.
 
 Usage
 ─────
     python -m scripts.train --csv data/mumbai_traffic.csv
     python -m scripts.train --csv data/mumbai_traffic.csv --epochs 120 --lr 5e-4
+    python -m scripts.train --csv data/mumbai_traffic.csv --no-cache
+    python -m scripts.train --mongo
+    python -m scripts.train --csv data/mumbai_traffic.csv --throughput
+    python -m scripts.train --csv data/mumbai_traffic.csv --bf16 --threads 8 --loader-workers 2
+    python -m scripts.train --csv data/mumbai_traffic.csv --incremental
+    python -m scripts.train --csv data/mumbai_traffic.csv --distributed --nproc 4
+    torchrun --nnodes 2 --nproc-per-node 8 --rdzv-endpoint host0:29500 \
+        -m scripts.train --csv data/mumbai_traffic.csv --distributed
 """
 
 from __future__ import annotations
 
 import argparse
+import asyncio
+import contextlib
+import json
+import os
 import sys
+import time
+from dataclasses import dataclass
 from pathlib import Path
 
 import numpy as np
 import pandas as pd
 import torch
 import torch.nn as nn
-from torch.utils.data import DataLoader, TensorDataset
+import torch.distributed as dist
+import torch.multiprocessing as torch_mp
+from torch.nn.parallel import DistributedDataParallel
+from torch.utils.data import DataLoader, DistributedSampler, TensorDataset
 
 ROOT = Path(__file__).resolve().parent.parent
 sys.path.insert(0, str(ROOT))
@@ -34,20 +58,247 @@ from src.config import (
     LEARNING_RATE,
     EPOCHS,
     TRAIN_SPLIT,
+    PREP_WORKERS,
     MODEL_PATH,
     SCALER_PATH,
     MODEL_DIR,
+    TRAIN_META_PATH,
+    FINETUNE_EPOCHS,
+    FINETUNE_LR,
+    REPLAY_RATIO,
+    INPUT_WINDOW,
+    FORECAST_HORIZON,
+    TARGET_IDX,
+)
+from src.data.feature_cache import FeatureCache, feature_cache_key
+from src.data.preprocessor import (
+    FeatureSet,
+    TrafficScaler,
+    build_feature_matrix,
+    create_segment_windows,
+    segment_window_starts,
+    windows_at,
 )
-from src.data.preprocessor import prepare_training_data
 from src.models.tcn import build_tcn_from_config
 
 
-def train(
-    csv_path: str,
-    epochs: int = EPOCHS,
-    lr: float = LEARNING_RATE,
-    batch_size: int = BATCH_SIZE,
-) -> None:
+def load_features(csv_path: str | None, use_cache: bool = True) -> FeatureSet:
+    """
+    Return the scaled feature matrix for *csv_path*, from the feature cache
+    when possible.  A hit skips CSV parsing and scaler fitting entirely.
+
+    With ``csv_path=None`` the features are streamed from the
+    ``traffic_readings`` collection instead (never cached: the collection
+    changes between runs).
+    """
+    if csv_path is None:
+        from src.data.mongo_source import stream_training_features
+        from src.db.models import traffic_readings
+
+        print("  Streaming readings from MongoDB …")
+        return asyncio.run(stream_training_features(traffic_readings))
+
+    if not use_cache:
+        df = pd.read_csv(csv_path, parse_dates=["timestamp"])
+        return build_feature_matrix(df)
+
+    cache = FeatureCache()
+    key = feature_cache_key(csv_path)
+    features = cache.load(key)
+    if features is not None:
+        print(f"  Feature cache hit: {cache.path_for(key)}")
+        return features
+
+    print(f"  Feature cache miss ({key}) — preprocessing CSV …")
+    df = pd.read_csv(csv_path, parse_dates=["timestamp"])
+    features = build_feature_matrix(df)
+    cache.store(key, features, csv_path)
+    return features
+
+
+@dataclass
+class ThroughputOptions:
+    """
+    CPU throughput knobs for :func:`train`.  The defaults reproduce the
+    plain fp32 / eager / single-process behaviour.
+    """
+    bf16: bool = False                 # bf16 autocast on CPU (if supported)
+    compile: bool = False              # torch.compile the model
+    threads: int = 0                   # intra-op threads (0 = torch default)
+    interop_threads: int = 0           # inter-op threads (0 = torch default)
+    loader_workers: int = 0            # DataLoader worker processes
+    val_batch_size: int = 0            # validation batch (0 = training batch)
+
+    @classmethod
+    def preset(cls) -> "ThroughputOptions":
+        """Sensible settings for a dedicated multi-core CPU box."""
+        cores = os.cpu_count() or 1
+        return cls(
+            bf16=cpu_supports_bf16(),
+            compile=True,
+            threads=cores,
+            interop_threads=1,
+            loader_workers=min(2, cores - 1),
+            val_batch_size=1024,
+        )
+
+
+def cpu_supports_bf16() -> bool:
+    """True when the CPU has native bf16 support (AVX512-BF16 or AMX)."""
+    checks = ("_is_avx512_bf16_supported", "_is_amx_tile_supported")
+    return any(getattr(torch.cpu, name, lambda: False)() for name in checks)
+
+
+def configure_threads(opts: ThroughputOptions) -> None:
+    """Apply thread settings — must run before any parallel torch work."""
+    if opts.threads > 0:
+        torch.set_num_threads(opts.threads)
+    if opts.interop_threads > 0:
+        try:
+            torch.set_num_interop_threads(opts.interop_threads)
+        except RuntimeError:
+            # Can only be set once per process, before inter-op work starts
+            print("  Note: inter-op threads already initialised; keeping current value")
+
+
+def make_loaders(
+    X_train: np.ndarray,
+    Y_train: np.ndarray,
+    X_val: np.ndarray,
+    Y_val: np.ndarray,
+    batch_size: int,
+    opts: ThroughputOptions,
+    distributed: bool = False,
+) -> tuple[DataLoader, DataLoader]:
+    """
+    Build train / validation loaders.  With *distributed*, each rank gets
+    a ``DistributedSampler`` shard of both sets (call
+    ``train_loader.sampler.set_epoch`` every epoch to reshuffle).
+    """
+    train_ds = TensorDataset(
+        torch.from_numpy(X_train).float(),
+        torch.from_numpy(Y_train).float(),
+    )
+    val_ds = TensorDataset(
+        torch.from_numpy(X_val).float(),
+        torch.from_numpy(Y_val).float(),
+    )
+    workers = max(0, opts.loader_workers)
+    loader_kwargs = {"num_workers": workers, "persistent_workers": workers > 0}
+    train_sampler = val_sampler = None
+    if distributed:
+        train_sampler = DistributedSampler(train_ds, shuffle=True, seed=0)
+        val_sampler = DistributedSampler(val_ds, shuffle=False)
+
+    train_loader = DataLoader(
+        train_ds,
+        batch_size=batch_size,
+        shuffle=train_sampler is None,
+        sampler=train_sampler,
+        **loader_kwargs,
+    )
+    val_loader = DataLoader(
+        val_ds,
+        batch_size=opts.val_batch_size or batch_size,
+        sampler=val_sampler,
+        **loader_kwargs,
+    )
+    return train_loader, val_loader
+
+
+def _autocast(device: torch.device, enabled: bool):
+    if enabled and device.type == "cpu":
+        return torch.autocast("cpu", dtype=torch.bfloat16)
+    return contextlib.nullcontext()
+
+
+def train_one_epoch(
+    model: nn.Module,
+    loader: DataLoader,
+    criterion: nn.Module,
+    optimiser: torch.optim.Optimizer,
+    device: torch.device,
+    accumulation_steps: int = 1,
+    bf16: bool = False,
+) -> tuple[float, int, float]:
+    """One pass over *loader*.  Returns (mean loss, samples, seconds)."""
+    model.train()
+    train_losses = []
+    samples = 0
+    t0 = time.perf_counter()
+    optimiser.zero_grad()
+
+    for i, (xb, yb) in enumerate(loader):
+        xb, yb = xb.to(device), yb.to(device)
+        with _autocast(device, bf16):
+            pred = model(xb)
+        loss = criterion(pred.float(), yb) / accumulation_steps
+        loss.backward()
+
+        # Accumulate gradients
+        if (i + 1) % accumulation_steps == 0:
+            optimiser.step()
+            optimiser.zero_grad()
+
+        train_losses.append(loss.item() * accumulation_steps)
+        samples += len(xb)
+
+    return float(np.mean(train_losses)), samples, time.perf_counter() - t0
+
+
+def evaluate(
+    model: nn.Module,
+    loader: DataLoader,
+    criterion: nn.Module,
+    device: torch.device,
+    bf16: bool = False,
+) -> tuple[float, int, float]:
+    """Validation pass.  Returns (sample-weighted loss, samples, seconds)."""
+    model.eval()
+    total, samples = 0.0, 0
+    t0 = time.perf_counter()
+    with torch.inference_mode(), _autocast(device, bf16):
+        for xb, yb in loader:
+            xb, yb = xb.to(device), yb.to(device)
+            pred = model(xb)
+            total += criterion(pred.float(), yb).item() * len(xb)
+            samples += len(xb)
+    return total / max(samples, 1), samples, time.perf_counter() - t0
+
+
+def maybe_compile(model: nn.Module, enabled: bool, sample: torch.Tensor) -> nn.Module:
+    """
+    ``torch.compile`` *model*, falling back to eager if unavailable.
+
+    Compilation is lazy, so one warm-up forward on *sample* (a batch of
+    inputs) runs inside the fallback to surface toolchain errors here.
+    """
+    if not enabled:
+        return model
+    try:
+        compiled = torch.compile(model)
+        was_training = model.training
+        model.eval()
+        try:
+            with torch.no_grad():
+                compiled(sample)
+        finally:
+            model.train(was_training)
+        return compiled
+    except Exception as exc:  # missing compiler toolchain, unsupported platform …
+        print(f"  Note: torch.compile unavailable ({exc}); running eager")
+        return model
+
+
+def sample_batch(loader: DataLoader, device: torch.device, n: int = 2) -> torch.Tensor:
+    """The first *n* inputs of *loader*'s dataset, for compile warm-up."""
+    return loader.dataset[:n][0].to(device)
+
+
+def setup_device(opts: ThroughputOptions) -> tuple[torch.device, bool]:
+    """Apply thread settings, report the device and resolve bf16 autocast."""
+    configure_threads(opts)
+
     device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
     print(f"Device: {device}")
     if torch.cuda.is_available():
@@ -56,10 +307,98 @@ def train(
     else:
         print("Note: GPU not available, using CPU")
 
+    bf16 = opts.bf16 and device.type == "cpu"
+    if bf16 and not cpu_supports_bf16():
+        print("  Note: CPU lacks native bf16; autocast will run but may be slower")
+    print(
+        f"Threads: intra={torch.get_num_threads()} inter={torch.get_num_interop_threads()}  "
+        f"bf16={bf16}  compile={opts.compile}  loader_workers={opts.loader_workers}"
+    )
+    return device, bf16
+
+
+def fit(
+    base_model: nn.Module,
+    train_loader: DataLoader,
+    val_loader: DataLoader,
+    epochs: int,
+    lr: float,
+    device: torch.device,
+    opts: ThroughputOptions,
+    bf16: bool = False,
+    accumulation_steps: int = 1,
+    best_val_loss: float = float("inf"),
+) -> tuple[float, float]:
+    """
+    Adam + ReduceLROnPlateau training loop.  Saves *base_model* to
+    ``MODEL_PATH`` whenever validation loss beats *best_val_loss*.
+
+    Returns (best validation loss, seconds spent in training phases).
+    """
+    model = maybe_compile(base_model, opts.compile, sample_batch(train_loader, device))
+    criterion = nn.MSELoss()
+    optimiser = torch.optim.Adam(base_model.parameters(), lr=lr)
+    scheduler = torch.optim.lr_scheduler.ReduceLROnPlateau(
+        optimiser, mode="min", factor=0.5, patience=5
+    )
+    train_secs = 0.0
+
+    for epoch in range(1, epochs + 1):
+        t_loss, t_samples, t_secs = train_one_epoch(
+            model, train_loader, criterion, optimiser, device, accumulation_steps, bf16
+        )
+        v_loss, v_samples, v_secs = evaluate(model, val_loader, criterion, device, bf16)
+        scheduler.step(v_loss)
+        train_secs += t_secs
+
+        print(
+            f"  Epoch {epoch:>3}/{epochs}  "
+            f"train_loss={t_loss:.6f}  val_loss={v_loss:.6f}  "
+            f"train {t_secs:.1f}s ({t_samples / t_secs:,.0f} samples/s)  "
+            f"val {v_secs:.1f}s ({v_samples / max(v_secs, 1e-9):,.0f} samples/s)"
+        )
+
+        if v_loss < best_val_loss:
+            best_val_loss = v_loss
+            MODEL_DIR.mkdir(parents=True, exist_ok=True)
+            torch.save(base_model.state_dict(), MODEL_PATH)
+
+    return best_val_loss, train_secs
+
+
+# ─────────────────────── Training metadata ─────────────────────────────────
+
+def read_train_meta() -> dict | None:
+    try:
+        return json.loads(TRAIN_META_PATH.read_text())
+    except (OSError, ValueError):
+        return None
+
+
+def write_train_meta(meta: dict) -> None:
+    TRAIN_META_PATH.parent.mkdir(parents=True, exist_ok=True)
+    TRAIN_META_PATH.write_text(json.dumps(meta, indent=2))
+
+
+# ─────────────────────── Full training ─────────────────────────────────────
+
+def train(
+    csv_path: str | None,
+    epochs: int = EPOCHS,
+    lr: float = LEARNING_RATE,
+    batch_size: int = BATCH_SIZE,
+    use_cache: bool = True,
+    prep_workers: int = PREP_WORKERS,
+    opts: ThroughputOptions | None = None,
+) -> None:
+    opts = opts or ThroughputOptions()
+    device, bf16 = setup_device(opts)
+
     # ── 1. Prepare data ───────────────────────────────────────────────────
     print("Preparing training data …")
-    df = pd.read_csv(csv_path, parse_dates=["timestamp"])
-    X, Y, scaler = prepare_training_data(df)
+    features = load_features(csv_path, use_cache)
+    features.scaler.save()
+    X, Y = create_segment_windows(features.scaled, features.offsets, prep_workers)
     print(f"  X shape: {X.shape}   Y shape: {Y.shape}")
 
     # ── 2. Train / Val split ──────────────────────────────────────────────
@@ -68,107 +407,392 @@ def train(
     X_train, Y_train = X[:split], Y[:split]
     X_val, Y_val = X[split:], Y[split:]
 
-    train_ds = TensorDataset(
-        torch.from_numpy(X_train).float(),
-        torch.from_numpy(Y_train).float(),
-    )
-    val_ds = TensorDataset(
-        torch.from_numpy(X_val).float(),
-        torch.from_numpy(Y_val).float(),
-    )
-
     # Use smaller batch size for memory efficiency
     effective_batch_size = 256  # Gradient accumulation
-    train_loader = DataLoader(train_ds, batch_size=batch_size, shuffle=True)
-    val_loader = DataLoader(val_ds, batch_size=batch_size)
+    train_loader, val_loader = make_loaders(X_train, Y_train, X_val, Y_val, batch_size, opts)
 
     print(f"Training samples: {len(X_train):,}")
     print(f"Validation samples: {len(X_val):,}")
     print(f"Batch size: {batch_size}, Effective batch: {effective_batch_size}")
 
-    # ── 3. Model, loss, optimiser ─────────────────────────────────────────
-    model = build_tcn_from_config().to(device)
-    criterion = nn.MSELoss()
-    optimiser = torch.optim.Adam(model.parameters(), lr=lr)
-    scheduler = torch.optim.lr_scheduler.ReduceLROnPlateau(
-        optimiser, mode="min", factor=0.5, patience=5
+    # ── 3. Model + training loop ──────────────────────────────────────────
+    accumulation_steps = max(1, effective_batch_size // batch_size)
+    print(f"Gradient accumulation steps: {accumulation_steps}")
+
+    base_model = build_tcn_from_config().to(device)
+    best_val_loss, train_secs = fit(
+        base_model, train_loader, val_loader, epochs, lr, device, opts, bf16, accumulation_steps
     )
 
-    best_val_loss = float("inf")
+    write_train_meta({
+        "mode": "full",
+        "cutoff": str(features.timestamps.max()),
+        "source": str(csv_path or "mongo:traffic_readings"),
+        "train_windows": len(X_train),
+        "epochs": epochs,
+        "train_secs": round(train_secs, 2),
+        "secs_per_window_epoch": train_secs / max(len(X_train) * epochs, 1),
+    })
 
-    # ── 4. Training loop ──────────────────────────────────────────────────
-    accumulation_steps = effective_batch_size // batch_size
-    print(f"Gradient accumulation steps: {accumulation_steps}")
+    print(f"\n✓ Best val loss: {best_val_loss:.6f}")
+    print(f"✓ Model saved to: {MODEL_PATH}")
+    print(f"✓ Scaler saved to: {SCALER_PATH}")
 
-    for epoch in range(1, epochs + 1):
-        model.train()
-        train_losses = []
-        optimiser.zero_grad()
-        
-        for i, (xb, yb) in enumerate(train_loader):
-            xb, yb = xb.to(device), yb.to(device)
-            pred = model(xb)
-            loss = criterion(pred, yb) / accumulation_steps
-            loss.backward()
-            
-            # Accumulate gradients
-            if (i + 1) % accumulation_steps == 0:
-                optimiser.step()
-                optimiser.zero_grad()
-                
-            train_losses.append(loss.item() * accumulation_steps)
-
-        # Validation
-        model.eval()
-        val_losses = []
-        with torch.no_grad():
-            for xb, yb in val_loader:
-                xb, yb = xb.to(device), yb.to(device)
-                pred = model(xb)
-                val_losses.append(criterion(pred, yb).item())
-
-        t_loss = np.mean(train_losses)
-        v_loss = np.mean(val_losses)
-        scheduler.step(v_loss)
 
-        if epoch % 5 == 0 or epoch == 1:
+# ─────────────────────── Incremental (warm-start) training ────────────────
+
+def train_incremental(
+    csv_path: str,
+    epochs: int = FINETUNE_EPOCHS,
+    lr: float = FINETUNE_LR,
+    batch_size: int = BATCH_SIZE,
+    replay_ratio: float = REPLAY_RATIO,
+    use_cache: bool = True,
+    opts: ThroughputOptions | None = None,
+) -> None:
+    """
+    Fine-tune the deployed model on readings newer than the last training
+    cutoff, plus a replay sample of older windows to limit forgetting.
+
+    The deployed scaler is kept (not re-fitted) so the model's input units
+    don't shift under it.
+    """
+    meta = read_train_meta()
+    if meta is None or not MODEL_PATH.exists() or not SCALER_PATH.exists():
+        raise SystemExit(
+            f"Incremental mode needs {MODEL_PATH.name}, {SCALER_PATH.name} and "
+            f"{TRAIN_META_PATH.name} from a previous run — train in full first."
+        )
+    cutoff = np.datetime64(meta["cutoff"])
+    t_start = time.perf_counter()
+
+    opts = opts or ThroughputOptions()
+    device, bf16 = setup_device(opts)
+
+    # ── 1. Select windows ─────────────────────────────────────────────────
+    print(f"Selecting windows newer than cutoff {cutoff} …")
+    features = load_features(csv_path, use_cache)
+    starts = segment_window_starts(features.offsets)
+    # A window is new if any of its target hours is past the cutoff
+    last_rows = starts + INPUT_WINDOW + FORECAST_HORIZON - 1
+    is_new = features.timestamps[last_rows] > cutoff
+    new_starts, old_starts = starts[is_new], starts[~is_new]
+    if len(new_starts) == 0:
+        print("✓ No readings newer than the cutoff — nothing to do.")
+        return
+
+    rng = np.random.default_rng(0)
+    new_starts = rng.permutation(new_starts)
+    n_val = max(1, int(len(new_starts) * (1 - TRAIN_SPLIT)))
+    n_replay = min(len(old_starts), int(round(replay_ratio * len(new_starts))))
+    replay_starts = rng.choice(old_starts, n_replay, replace=False)
+    train_starts = np.concatenate([new_starts[n_val:], replay_starts])
+    val_starts = new_starts[:n_val]   # validate on unseen, new data only
+
+    X_train, Y_train = _windows_in_scaler(features, train_starts)
+    X_val, Y_val = _windows_in_scaler(features, val_starts)
+    print(
+        f"  New windows: {len(new_starts):,}   replay: {n_replay:,}   "
+        f"(full dataset: {len(starts):,})"
+    )
+
+    # ── 2. Warm-start and fine-tune ───────────────────────────────────────
+    train_loader, val_loader = make_loaders(X_train, Y_train, X_val, Y_val, batch_size, opts)
+    base_model = build_tcn_from_config().to(device)
+    base_model.load_state_dict(torch.load(MODEL_PATH, map_location=device))
+
+    baseline_loss, _, _ = evaluate(base_model, val_loader, nn.MSELoss(), device, bf16)
+    print(f"  Deployed model val_loss on new data: {baseline_loss:.6f}")
+    best_val_loss, train_secs = fit(
+        base_model, train_loader, val_loader, epochs, lr, device, opts, bf16,
+        best_val_loss=baseline_loss,
+    )
+    elapsed = time.perf_counter() - t_start
+
+    # ── 3. Report savings ─────────────────────────────────────────────────
+    full_windows = int(len(starts) * TRAIN_SPLIT)
+    rate = meta.get("secs_per_window_epoch") or train_secs / max(len(X_train) * epochs, 1)
+    full_estimate = rate * full_windows * EPOCHS
+    used = len(X_train) + len(X_val)
+    print(f"\n✓ Best val loss on new data: {best_val_loss:.6f} (was {baseline_loss:.6f})")
+    print(
+        f"✓ Data: {used:,} of {len(starts):,} windows "
+        f"({100 * (1 - used / max(len(starts), 1)):.1f}% less than a full retrain)"
+    )
+    print(
+        f"✓ Time: {elapsed:.1f}s vs ~{full_estimate:.1f}s estimated for a full "
+        f"{EPOCHS}-epoch retrain ({max(full_estimate - elapsed, 0):.1f}s saved)"
+    )
+    saved = best_val_loss < baseline_loss
+    if saved:
+        print(f"✓ Model saved to: {MODEL_PATH}")
+    else:
+        # Keep the cutoff so the next run still sees these readings
+        print("✓ Fine-tuning did not beat the deployed model — weights and cutoff left unchanged")
+
+    write_train_meta({
+        **meta,
+        "mode": "incremental",
+        "cutoff": str(features.timestamps.max()) if saved else meta["cutoff"],
+        "source": str(csv_path),
+        "incremental_windows": used,
+        "incremental_secs": round(elapsed, 2),
+    })
+
+
+def _windows_in_scaler(features: FeatureSet, starts: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Gather windows from the cached matrix and re-express them in the units
+    of the deployed scaler (the cache is scaled with a scaler fitted on
+    the current CSV, which may differ).
+    """
+    deployed = TrafficScaler.load(SCALER_PATH)
+    fresh = features.scaler
+    deployed_range = deployed.max_vals - deployed.min_vals
+    a = ((fresh.max_vals - fresh.min_vals) / deployed_range).astype(np.float32)
+    b = ((fresh.min_vals - deployed.min_vals) / deployed_range).astype(np.float32)
+
+    X, Y = windows_at(features.scaled, starts)
+    X = X * a[np.newaxis, :, np.newaxis] + b[np.newaxis, :, np.newaxis]
+    Y = Y * a[TARGET_IDX] + b[TARGET_IDX]
+    return X.astype(np.float32), Y.astype(np.float32)
+
+
+# ─────────────────────── Distributed data-parallel (gloo) ─────────────────
+
+def train_distributed(
+    csv_path: str,
+    epochs: int = EPOCHS,
+    lr: float = LEARNING_RATE,
+    batch_size: int = BATCH_SIZE,
+    use_cache: bool = True,
+    prep_workers: int = PREP_WORKERS,
+    opts: ThroughputOptions | None = None,
+    save: bool = True,
+) -> list[float]:
+    """
+    One rank of a CPU data-parallel run (``torch.distributed`` / gloo).
+
+    Rendezvous uses the standard env:// variables (RANK, WORLD_SIZE,
+    MASTER_ADDR, MASTER_PORT), so this runs unchanged under ``torchrun``
+    on one host or across hosts, or via :func:`launch_local`.  Each rank
+    trains on a ``DistributedSampler`` shard with gradients all-reduced by
+    DDP; only rank 0 writes checkpoints.  The per-rank batch is
+    *batch_size* (global batch = batch_size × world size) and no gradient
+    accumulation is used.
+
+    Returns the wall time of each epoch (train + validation).
+    """
+    dist.init_process_group("gloo")
+    rank, world_size = dist.get_rank(), dist.get_world_size()
+    try:
+        opts = opts or ThroughputOptions()
+        if opts.threads <= 0:
+            # Split the host's cores between the ranks sharing it
+            local_world = int(os.environ.get("LOCAL_WORLD_SIZE", world_size))
+            opts.threads = max(1, (os.cpu_count() or 1) // local_world)
+        configure_threads(opts)
+        device = torch.device("cpu")
+        bf16 = opts.bf16
+
+        # Rank 0 fills the feature cache; the others then read it
+        if rank == 0:
+            features = load_features(csv_path, use_cache)
+            if save:
+                features.scaler.save()
+        dist.barrier()
+        if rank != 0:
+            features = load_features(csv_path, use_cache)
+
+        X, Y = create_segment_windows(features.scaled, features.offsets, prep_workers if rank == 0 else 0)
+        split = int(len(X) * TRAIN_SPLIT)
+        train_loader, val_loader = make_loaders(
+            X[:split], Y[:split], X[split:], Y[split:], batch_size, opts, distributed=True
+        )
+        if rank == 0:
             print(
-                f"  Epoch {epoch:>3}/{epochs}  "
-                f"train_loss={t_loss:.6f}  val_loss={v_loss:.6f}"
+                f"World size {world_size} (gloo)  threads/rank={torch.get_num_threads()}  "
+                f"samples/rank≈{len(train_loader.sampler):,}"
             )
 
-        if v_loss < best_val_loss:
-            best_val_loss = v_loss
-            MODEL_DIR.mkdir(parents=True, exist_ok=True)
-            torch.save(model.state_dict(), MODEL_PATH)
+        torch.manual_seed(0)  # identical initial weights on every rank
+        base_model = build_tcn_from_config().to(device)
+        model = maybe_compile(
+            DistributedDataParallel(base_model), opts.compile, sample_batch(train_loader, device)
+        )
+        criterion = nn.MSELoss()
+        optimiser = torch.optim.Adam(base_model.parameters(), lr=lr)
+        scheduler = torch.optim.lr_scheduler.ReduceLROnPlateau(
+            optimiser, mode="min", factor=0.5, patience=5
+        )
 
-    print(f"\n✓ Best val loss: {best_val_loss:.6f}")
-    print(f"✓ Model saved to: {MODEL_PATH}")
-    print(f"✓ Scaler saved to: {SCALER_PATH}")
+        best_val_loss = float("inf")
+        epoch_times = []
+        for epoch in range(1, epochs + 1):
+            t0 = time.perf_counter()
+            train_loader.sampler.set_epoch(epoch)
+            t_loss, t_samples, t_secs = train_one_epoch(
+                model, train_loader, criterion, optimiser, device, 1, bf16
+            )
+            v_loss, v_samples, v_secs = evaluate(model, val_loader, criterion, device, bf16)
 
+            # Global, sample-weighted metrics across ranks
+            stats = torch.tensor([t_loss * t_samples, t_samples, v_loss * v_samples, v_samples],
+                                 dtype=torch.float64)
+            dist.all_reduce(stats)
+            t_loss, v_loss = (stats[0] / stats[1]).item(), (stats[2] / stats[3]).item()
+            scheduler.step(v_loss)
+            epoch_times.append(time.perf_counter() - t0)
 
-def main():
-    parser = argparse.ArgumentParser(description="Train TCN congestion model")
-    parser.add_argument("--csv", required=True, help="Path to traffic CSV")
-    parser.add_argument("--epochs", type=int, default=EPOCHS)
-    parser.add_argument("--lr", type=float, default=LEARNING_RATE)
-    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
-    args = parser.parse_args()
-    train(args.csv, args.epochs, args.lr, args.batch_size)
+            if rank == 0:
+                print(
+                    f"  Epoch {epoch:>3}/{epochs}  "
+                    f"train_loss={t_loss:.6f}  val_loss={v_loss:.6f}  "
+                    f"train {t_secs:.1f}s ({stats[1].item() / t_secs:,.0f} samples/s global)  "
+                    f"val {v_secs:.1f}s  epoch {epoch_times[-1]:.1f}s"
+                )
+                if save and v_loss < best_val_loss:
+                    best_val_loss = v_loss
+                    MODEL_DIR.mkdir(parents=True, exist_ok=True)
+                    torch.save(base_model.state_dict(), MODEL_PATH)
 
+        if rank == 0 and save:
+            print(f"\n✓ Best val loss: {best_val_loss:.6f}")
+            print(f"✓ Model saved to: {MODEL_PATH}")
+        return epoch_times
+    finally:
+        dist.destroy_process_group()
+
+
+def _spawn_entry(local_rank: int, nproc: int, port: int, kwargs: dict, result_path: str | None) -> None:
+    os.environ.update({
+        "RANK": str(local_rank),
+        "LOCAL_RANK": str(local_rank),
+        "WORLD_SIZE": str(nproc),
+        "LOCAL_WORLD_SIZE": str(nproc),
+        "MASTER_ADDR": "127.0.0.1",
+        "MASTER_PORT": str(port),
+    })
+    epoch_times = train_distributed(**kwargs)
+    if local_rank == 0 and result_path:
+        Path(result_path).write_text(json.dumps(epoch_times))
 
-if __name__ == "__main__":
-    main()
+
+def launch_local(nproc: int, result_path: str | None = None, **kwargs) -> None:
+    """Run :func:`train_distributed` on *nproc* processes of this host."""
+    import socket
+
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    torch_mp.spawn(_spawn_entry, args=(nproc, port, kwargs, result_path), nprocs=nproc, join=True)
 
 
 def main():
     parser = argparse.ArgumentParser(description="Train TCN congestion model")
-    parser.add_argument("--csv", required=True, help="Path to traffic CSV")
-    parser.add_argument("--epochs", type=int, default=EPOCHS)
-    parser.add_argument("--lr", type=float, default=LEARNING_RATE)
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--csv", help="Path to traffic CSV")
+    source.add_argument(
+        "--mongo",
+        action="store_true",
+        help="Stream readings from the traffic_readings collection instead of a CSV",
+    )
+    parser.add_argument("--epochs", type=int, help=f"Default {EPOCHS} (incremental: {FINETUNE_EPOCHS})")
+    parser.add_argument("--lr", type=float, help=f"Default {LEARNING_RATE} (incremental: {FINETUNE_LR})")
     parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Ignore the feature cache and re-run preprocessing",
+    )
+    parser.add_argument(
+        "--prep-workers",
+        type=int,
+        default=PREP_WORKERS,
+        help="Processes for sliding-window generation (0 = serial)",
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Warm-start from the saved model and fine-tune on readings newer "
+        "than the last training cutoff plus a replay sample",
+    )
+    parser.add_argument(
+        "--replay-ratio",
+        type=float,
+        default=REPLAY_RATIO,
+        help="Incremental mode: old windows replayed per new window",
+    )
+    parser.add_argument(
+        "--distributed",
+        action="store_true",
+        help="Data-parallel training with torch.distributed (gloo); use under "
+        "torchrun, or with --nproc to spawn processes locally",
+    )
+    parser.add_argument("--nproc", type=int, default=0, help="Local processes for --distributed")
+    perf = parser.add_argument_group("CPU throughput")
+    perf.add_argument(
+        "--throughput",
+        action="store_true",
+        help="Enable the CPU throughput preset (bf16 if supported, compile, "
+        "all cores, loader workers, large validation batches)",
+    )
+    perf.add_argument("--bf16", action="store_true", help="bf16 autocast on CPU")
+    perf.add_argument("--compile", action="store_true", help="torch.compile the model")
+    perf.add_argument("--threads", type=int, help="Intra-op threads")
+    perf.add_argument("--interop-threads", type=int, help="Inter-op threads")
+    perf.add_argument("--loader-workers", type=int, help="DataLoader worker processes")
+    perf.add_argument("--val-batch-size", type=int, help="Validation batch size")
     args = parser.parse_args()
-    train(args.csv, args.epochs, args.lr, args.batch_size)
+
+    opts = ThroughputOptions.preset() if args.throughput else ThroughputOptions()
+    opts.bf16 = opts.bf16 or args.bf16
+    opts.compile = opts.compile or args.compile
+    for field in ("threads", "interop_threads", "loader_workers", "val_batch_size"):
+        value = getattr(args, field)
+        if value is not None:
+            setattr(opts, field, value)
+
+    if args.mongo and (args.incremental or args.distributed):
+        parser.error("--mongo currently supports full single-process training only")
+
+    if args.distributed:
+        kwargs = dict(
+            csv_path=args.csv,
+            epochs=args.epochs or EPOCHS,
+            lr=args.lr or LEARNING_RATE,
+            batch_size=args.batch_size,
+            use_cache=not args.no_cache,
+            prep_workers=args.prep_workers,
+            opts=opts,
+        )
+        if args.nproc > 0:
+            launch_local(args.nproc, **kwargs)
+        else:
+            train_distributed(**kwargs)   # rendezvous from torchrun's env vars
+        return
+
+    if args.incremental:
+        train_incremental(
+            args.csv,
+            args.epochs or FINETUNE_EPOCHS,
+            args.lr or FINETUNE_LR,
+            args.batch_size,
+            replay_ratio=args.replay_ratio,
+            use_cache=not args.no_cache,
+            opts=opts,
+        )
+        return
+
+    train(
+        args.csv,
+        args.epochs or EPOCHS,
+        args.lr or LEARNING_RATE,
+        args.batch_size,
+        use_cache=not args.no_cache,
+        prep_workers=args.prep_workers,
+        opts=opts,
+    )
 
 
 if __name__ == "__main__":
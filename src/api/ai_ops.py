@@ -4,16 +4,12 @@ AI Operations endpoints: proxy Groq mitigation suggestions for critical road seg
 
 from __future__ import annotations
 
-import os
 from typing import Any, Dict, List
 
-import httpx
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel, Field
 
-GROQ_BASE_URL = "https://api.groq.com/openai/v1"
-GROQ_MODEL = os.getenv("GROQ_MODEL", "llama-3.1-8b-instant")
-GROQ_API_KEY = os.getenv("GROQ_API_KEY")
+from src.api.llm_client import llm_client
 
 ai_router = APIRouter(prefix="/api", tags=["ai-ops"])
 
@@ -34,9 +30,6 @@ class MitigationResponse(BaseModel):
 
 
 async def _call_groq(critical_segments: List[CriticalSegment]) -> Dict[str, Any]:
-    if not GROQ_API_KEY:
-        raise HTTPException(status_code=500, detail="GROQ_API_KEY is not configured")
-
     # Build prompt
     lines = [
         "You are a Mumbai Traffic Control Expert. Given these congested roads, "
@@ -49,31 +42,11 @@ async def _call_groq(critical_segments: List[CriticalSegment]) -> Dict[str, Any]
         lines.append(f"- {seg.road_name}: {seg.congestion_pct:.1f}% congestion{speed_part}")
     user_prompt = "\n".join(lines)
 
-    payload = {
-        "model": GROQ_MODEL,
-        "messages": [
-            {"role": "system", "content": "You are a Mumbai Traffic Control Expert."},
-            {"role": "user", "content": user_prompt},
-        ],
-        "temperature": 0.4,
-        "max_tokens": 220,
-    }
-
-    headers = {
-        "Authorization": f"Bearer {GROQ_API_KEY}",
-        "Content-Type": "application/json",
-    }
-
-    async with httpx.AsyncClient(base_url=GROQ_BASE_URL, timeout=15) as client:
-        resp = await client.post("/chat/completions", json=payload, headers=headers)
-        if resp.status_code >= 400:
-            raise HTTPException(status_code=resp.status_code, detail=f"Groq API error: {resp.text}")
-        data = resp.json()
-
-    # Extract message content
-    content = data.get("choices", [{}])[0].get("message", {}).get("content", "")
-    if not content:
-        raise HTTPException(status_code=502, detail="Empty response from Groq")
+    messages = [
+        {"role": "system", "content": "You are a Mumbai Traffic Control Expert."},
+        {"role": "user", "content": user_prompt},
+    ]
+    content = await llm_client.chat(messages, temperature=0.4, max_tokens=220, caller="mitigation")
     return {"content": content}
 
 
@@ -3,18 +3,12 @@ Stateless chat endpoint for Traffic Command AI.
 """
 from __future__ import annotations
 
-import os
 from typing import Any, List
 
-import httpx
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter
 from pydantic import BaseModel, Field
 
-GROQ_BASE_URL = "https://api.groq.com/openai/v1"
-GROQ_MODEL = os.getenv("GROQ_MODEL", "llama-3.1-8b-instant")
-GROQ_API_KEY = os.getenv("GROQ_API_KEY")
-
-auth_headers = {"Authorization": f"Bearer {GROQ_API_KEY}", "Content-Type": "application/json"}
+from src.api.llm_client import llm_client
 
 chat_router = APIRouter(prefix="/api", tags=["chat"])
 
@@ -53,26 +47,7 @@ def _build_messages(req: ChatRequest) -> List[dict]:
 
 
 async def _call_groq(messages: List[dict]) -> str:
-    if not GROQ_API_KEY:
-        raise HTTPException(status_code=500, detail="GROQ_API_KEY is not configured")
-
-    payload = {
-        "model": GROQ_MODEL,
-        "messages": messages,
-        "temperature": 0.4,
-        "max_tokens": 320,
-    }
-
-    async with httpx.AsyncClient(base_url=GROQ_BASE_URL, timeout=15) as client:
-        resp = await client.post("/chat/completions", json=payload, headers=auth_headers)
-        if resp.status_code >= 400:
-            raise HTTPException(status_code=resp.status_code, detail=f"Groq API error: {resp.text}")
-        data = resp.json()
-
-    content = data.get("choices", [{}])[0].get("message", {}).get("content")
-    if not content:
-        raise HTTPException(status_code=502, detail="Empty response from Groq")
-    return content
+    return await llm_client.chat(messages, temperature=0.4, max_tokens=320, caller="chat")
 
 
 @chat_router.post("/chat/message", response_model=ChatResponse)
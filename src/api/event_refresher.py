@@ -0,0 +1,172 @@
+"""
+Background refresh of events for every road segment.
+
+Even with the tile cache, the first request for an area waits on the
+external event APIs.  :class:`EventRefresher` runs in the API lifespan
+instead:
+
+* it reads segment coordinates from ``road_segments`` (through the
+  configured ``TrafficStore``) and groups them by geohash tile;
+* every ``EVENT_REFRESH_INTERVAL_S`` seconds (± ``EVENT_REFRESH_JITTER``,
+  so replicas don't hit the upstream APIs in lockstep) it refetches the
+  events of every tile, at most ``EVENT_FETCH_CONCURRENCY`` at a time;
+* each completed round is published as an immutable :class:`EventSnapshot`
+  — a versioned events-by-tile map swapped in one assignment, so readers
+  never see a half-refreshed round — together with the segments × hours
+  :class:`~src.data.event_impact.EventImpactMatrix` of its events, covering
+  ``EVENT_IMPACT_HISTORY_H`` hours back to ``EVENT_IMPACT_HORIZON_H`` ahead.
+
+The request path reads :attr:`EventRefresher.impact` /
+:meth:`EventRefresher.events_near` only, which never call out: a tile
+missing from the snapshot (a segment added since the last round) simply
+has no events until the next one.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import random
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from src.config import (
+    EVENT_FETCH_CONCURRENCY,
+    EVENT_IMPACT_HISTORY_H,
+    EVENT_IMPACT_HORIZON_H,
+    EVENT_REFRESH_INTERVAL_S,
+    EVENT_REFRESH_JITTER,
+    EVENT_REFRESH_RADIUS_KM,
+)
+from src.api.events import TrafficEvent, TrafficEventManager, event_manager, tile_half_diagonal_km, within_radius
+from src.data.event_impact import EventImpactMatrix, compute_event_impact
+from src.db.geo import geohash, geohash_cell
+from src.db.storage import TrafficStore
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class EventSnapshot:
+    """One published refresh round: the events of every segment tile."""
+
+    version: int
+    refreshed_at: Optional[datetime]
+    by_tile: Dict[str, List[TrafficEvent]] = field(default_factory=dict)
+    impact: Optional[EventImpactMatrix] = None
+
+
+def segment_tiles(segments: List[Dict[str, Any]], precision: int) -> Dict[str, List[str]]:
+    """road_ids of the segments with coordinates, grouped by geohash tile."""
+    tiles: Dict[str, List[str]] = {}
+    for seg in segments:
+        if seg.get("lat") is None or seg.get("lon") is None:
+            continue
+        tiles.setdefault(geohash(seg["lat"], seg["lon"], precision), []).append(seg["road_id"])
+    return tiles
+
+
+class EventRefresher:
+    """Keeps an in-memory events-by-tile map of all segments up to date."""
+
+    def __init__(
+        self,
+        manager: TrafficEventManager = event_manager,
+        radius_km: float = EVENT_REFRESH_RADIUS_KM,
+        interval_s: float = EVENT_REFRESH_INTERVAL_S,
+        jitter: float = EVENT_REFRESH_JITTER,
+        concurrency: int = EVENT_FETCH_CONCURRENCY,
+    ):
+        self.manager = manager
+        self.radius_km = radius_km
+        self.interval_s = interval_s
+        self.jitter = jitter
+        self.concurrency = max(1, concurrency)
+        self.snapshot = EventSnapshot(0, None)
+        self.failures = 0
+        self.last_duration_s: Optional[float] = None
+
+    async def _refresh_tile(self, tile: str, semaphore: asyncio.Semaphore) -> Optional[List[TrafficEvent]]:
+        lat, lon, _, _ = geohash_cell(tile)
+        async with semaphore:
+            try:
+                # From the tile centre, wide enough for every segment in it
+                return await self.manager.get_events_near_location(
+                    lat, lon, self.radius_km + tile_half_diagonal_km(tile), refresh=True
+                )
+            except Exception as exc:
+                self.failures += 1
+                logger.warning("Event refresh failed for tile %s: %s", tile, exc)
+                return None
+
+    async def refresh(self, store: TrafficStore) -> EventSnapshot:
+        """Refetch every segment tile and publish a new snapshot."""
+        started = time.perf_counter()
+        segments = [
+            s for s in await store.list_segments() if s.get("lat") is not None and s.get("lon") is not None
+        ]
+        tiles = sorted(segment_tiles(segments, self.manager.precision))
+        semaphore = asyncio.Semaphore(self.concurrency)
+        results = await asyncio.gather(*(self._refresh_tile(t, semaphore) for t in tiles))
+
+        previous = self.snapshot.by_tile
+        by_tile = {
+            # A failed tile keeps its last known events
+            tile: events if events is not None else previous.get(tile, [])
+            for tile, events in zip(tiles, results)
+        }
+        now = datetime.utcnow()
+        unique = {e.event_id: e for events in by_tile.values() for e in events}
+        impact = compute_event_impact(
+            [s["road_id"] for s in segments],
+            [s["lat"] for s in segments],
+            [s["lon"] for s in segments],
+            list(unique.values()),
+            now - timedelta(hours=EVENT_IMPACT_HISTORY_H),
+            now + timedelta(hours=EVENT_IMPACT_HORIZON_H),
+        )
+        self.snapshot = EventSnapshot(self.snapshot.version + 1, now, by_tile, impact)
+        self.last_duration_s = time.perf_counter() - started
+        logger.info(
+            "Event snapshot v%d: %d tiles, %d events in %.1fs",
+            self.snapshot.version, len(by_tile), sum(map(len, by_tile.values())), self.last_duration_s,
+        )
+        return self.snapshot
+
+    async def run(self, store: TrafficStore) -> None:
+        """Background task: refresh now, then every jittered interval."""
+        while True:
+            try:
+                await self.refresh(store)
+            except Exception as exc:
+                self.failures += 1
+                logger.warning("Event refresh round failed: %s", exc)
+            await asyncio.sleep(self.interval_s * random.uniform(1 - self.jitter, 1 + self.jitter))
+
+    @property
+    def impact(self) -> Optional[EventImpactMatrix]:
+        """Event features of every segment and hour in the current snapshot."""
+        return self.snapshot.impact
+
+    def events_near(self, latitude: float, longitude: float,
+                    radius_km: Optional[float] = None) -> List[TrafficEvent]:
+        """Events within *radius_km* of a point, from the current snapshot only."""
+        events = self.snapshot.by_tile.get(geohash(latitude, longitude, self.manager.precision), [])
+        return within_radius(events, latitude, longitude, radius_km or self.radius_km)
+
+    def stats(self) -> Dict[str, Any]:
+        snap = self.snapshot
+        return {
+            "version": snap.version,
+            "refreshed_at": snap.refreshed_at.isoformat(timespec="seconds") if snap.refreshed_at else None,
+            "tiles": len(snap.by_tile),
+            "events": sum(map(len, snap.by_tile.values())),
+            "impact_shape": list(snap.impact.values.shape) if snap.impact is not None else None,
+            "last_duration_s": round(self.last_duration_s, 3) if self.last_duration_s is not None else None,
+            "failures": self.failures,
+        }
+
+
+event_refresher = EventRefresher()
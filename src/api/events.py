@@ -10,6 +10,12 @@ that can impact traffic patterns. Examples include:
 - Business districts activity
 
 The data is processed and incorporated into the traffic forecasting model.
+
+Each client owns one long-lived ``aiohttp.ClientSession`` over a pooled
+``TCPConnector`` (connection limits, keep-alive, DNS cache), opened once by
+the API lifespan via ``event_manager.open()`` and closed on shutdown, so
+lookups reuse warm TCP / TLS connections instead of paying setup per call.
+Scripts use ``async with event_manager:`` for the same effect.
 """
 
 from __future__ import annotations
@@ -17,12 +23,36 @@ from __future__ import annotations
 import asyncio
 import aiohttp
 import json
+import os
+import time
 from datetime import datetime, timedelta
+from pathlib import Path
 from typing import List, Dict, Optional, Any
+from collections import OrderedDict
 from dataclasses import dataclass
 import logging
 
-from src.config import API_KEYS
+from src.config import (
+    API_KEYS,
+    EVENT_CACHE_DIR,
+    EVENT_CACHE_TTL_S,
+    EVENT_GEOHASH_PRECISION,
+    EVENT_RADIUS_BUCKETS_KM,
+    EVENT_TILE_CACHE_SIZE,
+    EVENT_TILE_STALE_S,
+    EVENT_TILE_TTL_S,
+    GOOGLE_PAGE_TOKEN_DELAY_S,
+    GOOGLE_PLACES_CONCURRENCY,
+    GOOGLE_PLACES_MAX_PAGES,
+    EVENT_HTTP_CONNECT_TIMEOUT_S,
+    EVENT_HTTP_DNS_TTL_S,
+    EVENT_HTTP_KEEPALIVE_S,
+    EVENT_HTTP_LIMIT,
+    EVENT_HTTP_LIMIT_PER_HOST,
+    EVENT_HTTP_TIMEOUT_S,
+)
+
+from src.db.geo import geohash, geohash_cell, haversine_km
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
@@ -59,6 +89,195 @@ class TrafficEvent:
             "source": self.source,
         }
 
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "TrafficEvent":
+        data = dict(data)
+        data["start_time"] = datetime.fromisoformat(data["start_time"])
+        if data.get("end_time"):
+            data["end_time"] = datetime.fromisoformat(data["end_time"])
+        return cls(**data)
+
+
+class EventFetchError(Exception):
+    """
+    An upstream event lookup failed.  *events* holds whatever the other
+    sources did return, usable for the request but not worth caching.
+    """
+
+    def __init__(self, message: str, events: Optional[List[TrafficEvent]] = None):
+        super().__init__(message)
+        self.events = events or []
+
+
+def location_tile(latitude: float, longitude: float) -> tuple[float, float]:
+    """Snap a coordinate to its ~1 km tile (lat/lon rounded to 2 dp)."""
+    return round(latitude, 2), round(longitude, 2)
+
+
+class EventDiskCache:
+    """
+    On-disk TTL cache of event lookups, one small JSON file per key.
+
+    Used by dataset preparation only (the API serves events from the
+    refresher snapshot and :class:`EventTileCache`), so repeated training
+    runs don't re-query the external APIs.
+    """
+
+    def __init__(self, root: Path | str = EVENT_CACHE_DIR, ttl_s: int = EVENT_CACHE_TTL_S):
+        self.root = Path(root)
+        self.ttl_s = ttl_s
+
+    def _path(self, key: str) -> Path:
+        return self.root / f"{key}.json"
+
+    def get(self, key: str) -> Optional[List[TrafficEvent]]:
+        """Return cached events for *key*, or None if missing / expired."""
+        try:
+            raw = json.loads(self._path(key).read_text())
+            if time.time() - raw["fetched_at"] > self.ttl_s:
+                return None
+            return [TrafficEvent.from_dict(e) for e in raw["events"]]
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+
+    def put(self, key: str, events: List[TrafficEvent]) -> None:
+        self.root.mkdir(parents=True, exist_ok=True)
+        path = self._path(key)
+        tmp = path.with_suffix(f".{os.getpid()}.tmp")
+        tmp.write_text(json.dumps({
+            "fetched_at": time.time(),
+            "events": [e.to_dict() for e in events],
+        }))
+        os.replace(tmp, path)
+
+
+def request_timeout() -> aiohttp.ClientTimeout:
+    return aiohttp.ClientTimeout(total=EVENT_HTTP_TIMEOUT_S, sock_connect=EVENT_HTTP_CONNECT_TIMEOUT_S)
+
+
+TileKey = tuple[str, int, int]   # (geohash, radius bucket km, hours ahead)
+
+
+def tile_half_diagonal_km(tile: str) -> float:
+    """Furthest distance of any point of a geohash tile from its centre."""
+    lat, lon, height, width = geohash_cell(tile)
+    return haversine_km(lat, lon, lat + height / 2, lon + width / 2)
+
+
+def within_radius(events: List[TrafficEvent], latitude: float, longitude: float,
+                  radius_km: float) -> List[TrafficEvent]:
+    """*events* within *radius_km* of a point (events without coordinates are kept)."""
+    return [
+        e for e in events
+        if not (e.latitude or e.longitude)
+        or haversine_km(latitude, longitude, e.latitude, e.longitude) <= radius_km
+    ]
+
+
+def radius_bucket(radius_km: float) -> int:
+    """Smallest configured radius bucket covering *radius_km*."""
+    for bucket in EVENT_RADIUS_BUCKETS_KM:
+        if bucket >= radius_km:
+            return bucket
+    return int(-(-radius_km // 1))
+
+
+class EventTileCache:
+    """
+    In-process TTL cache of upstream event lookups keyed by
+    (geohash tile, radius bucket, hours ahead).
+
+    An entry younger than *ttl_s* is served as is; one younger than
+    ``ttl_s + stale_s`` is served stale while a background fetch revalidates
+    it.  Concurrent misses (and revalidations) of one key share a single
+    in-flight fetch.  A failed fetch is never cached: the previous entry,
+    however old, is kept and served in its place.  At most *max_entries*
+    tiles are kept, least recently used evicted first.
+    """
+
+    def __init__(self, ttl_s: float = EVENT_TILE_TTL_S, stale_s: float = EVENT_TILE_STALE_S,
+                 max_entries: int = EVENT_TILE_CACHE_SIZE):
+        self.ttl_s = ttl_s
+        self.stale_s = stale_s
+        self.max_entries = max_entries
+        self._entries: OrderedDict[TileKey, tuple[float, List[TrafficEvent]]] = OrderedDict()
+        self._inflight: Dict[TileKey, asyncio.Task] = {}
+        self.counts = {
+            "hits": 0, "stale_hits": 0, "misses": 0, "refreshes": 0,
+            "coalesced": 0, "upstream_calls": 0, "errors": 0,
+        }
+
+    def _fetch(self, key: TileKey, fetch) -> asyncio.Task:
+        """The in-flight fetch of *key*, started if there is none."""
+        task = self._inflight.get(key)
+        if task is not None:
+            self.counts["coalesced"] += 1
+            return task
+
+        async def run() -> List[TrafficEvent]:
+            self.counts["upstream_calls"] += 1
+            try:
+                events = await fetch()
+            except Exception:
+                # Leaves any previous entry untouched
+                self.counts["errors"] += 1
+                raise
+            finally:
+                self._inflight.pop(key, None)
+            self._entries[key] = (time.monotonic(), events)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            return events
+
+        task = self._inflight[key] = asyncio.ensure_future(run())
+        return task
+
+    async def get(self, key: TileKey, fetch, refresh: bool = False) -> List[TrafficEvent]:
+        """
+        Cached events of *key*; ``await fetch()`` loads them on a miss, or
+        always with *refresh* (joining a fetch already in flight).
+        """
+        if refresh:
+            self.counts["refreshes"] += 1
+            return await asyncio.shield(self._fetch(key, fetch))
+        entry = self._entries.get(key)
+        if entry is not None:
+            age = time.monotonic() - entry[0]
+            if age < self.ttl_s:
+                self.counts["hits"] += 1
+                self._entries.move_to_end(key)
+                return entry[1]
+            if age < self.ttl_s + self.stale_s:
+                self.counts["stale_hits"] += 1
+                task = self._fetch(key, fetch)
+                # A failed revalidation keeps serving the stale entry
+                task.add_done_callback(lambda t: t.cancelled() or t.exception())
+                return entry[1]
+        self.counts["misses"] += 1
+        try:
+            return await asyncio.shield(self._fetch(key, fetch))
+        except Exception:
+            if entry is None:
+                raise
+            # Past its stale window, but better than nothing during an outage
+            self.counts["stale_hits"] += 1
+            return entry[1]
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.counts["hits"] + self.counts["stale_hits"] + self.counts["misses"]
+        served = self.counts["hits"] + self.counts["stale_hits"]
+        return {
+            **self.counts,
+            "entries": len(self._entries),
+            "inflight": len(self._inflight),
+            "hit_rate": round(served / lookups, 4) if lookups else None,
+            "precision": EVENT_GEOHASH_PRECISION,
+        }
+
+    def clear(self) -> None:
+        self._entries.clear()
+
 
 class EventAPIClient:
     """Base class for event API clients."""
@@ -68,29 +287,46 @@ class EventAPIClient:
         self.base_url = base_url
         self.session: Optional[aiohttp.ClientSession] = None
 
+    async def open(self) -> None:
+        """Create the pooled session (no-op if already open)."""
+        if self.session is not None and not self.session.closed:
+            return
+        connector = aiohttp.TCPConnector(
+            limit=EVENT_HTTP_LIMIT,
+            limit_per_host=EVENT_HTTP_LIMIT_PER_HOST,
+            keepalive_timeout=EVENT_HTTP_KEEPALIVE_S,
+            ttl_dns_cache=EVENT_HTTP_DNS_TTL_S,
+        )
+        self.session = aiohttp.ClientSession(connector=connector, timeout=request_timeout())
+
+    async def close(self) -> None:
+        """Close the session and its pooled connections."""
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+
     async def __aenter__(self):
-        self.session = aiohttp.ClientSession()
+        await self.open()
         return self
 
     async def __aexit__(self, exc_type, exc_val, exc_tb):
-        if self.session:
-            await self.session.close()
+        await self.close()
 
     async def _make_request(self, endpoint: str, params: Dict[str, Any]) -> Dict[str, Any]:
         """Make HTTP request to API."""
         if not self.session:
-            raise RuntimeError("Client not initialized. Use 'async with' context manager.")
+            raise RuntimeError("Client not initialized. Call open() or use 'async with'.")
 
         url = f"{self.base_url}/{endpoint}"
         params = {k: v for k, v in params.items() if v is not None}
 
         try:
-            async with self.session.get(url, params=params) as response:
+            async with self.session.get(url, params=params, timeout=request_timeout()) as response:
                 response.raise_for_status()
                 return await response.json()
-        except aiohttp.ClientError as e:
-            logger.error(f"API request failed: {e}")
-            return {}
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            logger.error(f"API request failed: {e!r}")
+            raise EventFetchError(f"{endpoint}: {e!r}") from e
 
 
 class EventbriteClient(EventAPIClient):
@@ -161,28 +397,43 @@ class EventbriteClient(EventAPIClient):
 class GoogleMapsClient(EventAPIClient):
     """Client for Google Maps Places API (events and points of interest)."""
 
-    def __init__(self, api_key: str):
+    # Search for event venues, stadiums, concert halls, etc. — in priority
+    # order: a place found under several types keeps the first one.
+    EVENT_TYPES = [
+        "stadium", "concert_hall", "event_venue", "amusement_park",
+        "tourist_attraction", "shopping_mall", "airport"
+    ]
+
+    def __init__(self, api_key: str, concurrency: int = GOOGLE_PLACES_CONCURRENCY,
+                 max_pages: int = GOOGLE_PLACES_MAX_PAGES):
         super().__init__(api_key, "https://maps.googleapis.com/maps/api")
+        # Caps in-flight Places requests across every lookup of this client
+        self.semaphore = asyncio.Semaphore(max(1, concurrency))
+        self.max_pages = max_pages
 
     async def get_events_and_attractions(self, latitude: float, longitude: float,
                                        radius: int = 5000) -> List[TrafficEvent]:
         """Fetch events and attractions that could impact traffic."""
-        # Search for event venues, stadiums, concert halls, etc.
-        event_types = [
-            "stadium", "concert_hall", "event_venue", "amusement_park",
-            "tourist_attraction", "shopping_mall", "airport"
-        ]
-
-        all_events = []
-        for place_type in event_types:
-            events = await self._search_places(latitude, longitude, radius, place_type)
-            all_events.extend(events)
-
-        return all_events
+        # One page chain per type, all types concurrently (≈ one round-trip
+        # per page instead of one per type)
+        results = await asyncio.gather(*(
+            self._search_places(latitude, longitude, radius, place_type)
+            for place_type in self.EVENT_TYPES
+        ), return_exceptions=True)
+
+        unique: Dict[str, TrafficEvent] = {}
+        failed = [r for r in results if isinstance(r, BaseException)]
+        for events in results:
+            if not isinstance(events, BaseException):
+                for event in events:
+                    unique.setdefault(event.event_id, event)
+        if failed:
+            raise EventFetchError(f"{len(failed)} place type(s) failed: {failed[0]}", list(unique.values()))
+        return list(unique.values())
 
     async def _search_places(self, latitude: float, longitude: float, radius: int,
                            place_type: str) -> List[TrafficEvent]:
-        """Search for places of a specific type."""
+        """Search for places of a specific type, following next_page_token."""
         params = {
             "key": self.api_key,
             "location": f"{latitude},{longitude}",
@@ -190,10 +441,19 @@ class GoogleMapsClient(EventAPIClient):
             "type": place_type,
         }
 
-        data = await self._make_request("place/nearbysearch/json", params)
-        events = []
+        places = []
+        for _ in range(self.max_pages):
+            data = await self._places_page(params)
+            places.extend(data.get("results", []))
+            token = data.get("next_page_token")
+            if not token:
+                break
+            # A token only becomes valid a moment after it is issued
+            await asyncio.sleep(GOOGLE_PAGE_TOKEN_DELAY_S)
+            params = {"key": self.api_key, "pagetoken": token}
 
-        for place in data.get("results", []):
+        events = []
+        for place in places:
             try:
                 event = TrafficEvent(
                     event_id=f"google_{place['place_id']}",
@@ -215,6 +475,16 @@ class GoogleMapsClient(EventAPIClient):
 
         return events
 
+    async def _places_page(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        """One Nearby Search page; retries once if a page token isn't valid yet."""
+        for attempt in range(2):
+            async with self.semaphore:
+                data = await self._make_request("place/nearbysearch/json", params)
+            if "pagetoken" not in params or data.get("status") != "INVALID_REQUEST" or attempt:
+                return data
+            await asyncio.sleep(GOOGLE_PAGE_TOKEN_DELAY_S)
+        return data
+
     def _classify_place_type(self, place_type: str) -> str:
         """Classify place type for traffic impact."""
         type_mapping = {
@@ -232,8 +502,13 @@ class GoogleMapsClient(EventAPIClient):
 class TrafficEventManager:
     """Manages multiple event API clients and aggregates event data."""
 
-    def __init__(self):
+    def __init__(self, disk_cache: Optional[EventDiskCache] = None,
+                 tile_cache: Optional[EventTileCache] = None,
+                 precision: int = EVENT_GEOHASH_PRECISION):
         self.clients = []
+        self.disk_cache = disk_cache or EventDiskCache()
+        self.tile_cache = tile_cache or EventTileCache()
+        self.precision = precision
         self._setup_clients()
 
     def _setup_clients(self):
@@ -248,12 +523,34 @@ class TrafficEventManager:
         if google_key:
             self.clients.append(GoogleMapsClient(google_key))
 
+    async def open(self) -> None:
+        """Open every client's pooled session (API startup)."""
+        for client in self.clients:
+            await client.open()
+
+    async def close(self) -> None:
+        """Close every client's session (API shutdown)."""
+        await asyncio.gather(*(client.close() for client in self.clients))
+
+    async def __aenter__(self):
+        await self.open()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+
     async def get_events_near_location(self, latitude: float, longitude: float,
                                      radius_km: int = 10,
-                                     hours_ahead: int = 24) -> List[TrafficEvent]:
+                                     hours_ahead: int = 24,
+                                     refresh: bool = False) -> List[TrafficEvent]:
         """
         Get all events near a location that could impact traffic.
 
+        Lookups are shared per geohash tile: the upstream APIs are queried
+        once from the tile centre with the radius rounded up to a bucket
+        wide enough for any point in the tile, cached in :class:`EventTileCache`,
+        and trimmed to *radius_km* around the requested point.
+
         Parameters
         ----------
         latitude, longitude : float
@@ -262,16 +559,38 @@ class TrafficEventManager:
             Search radius in kilometers
         hours_ahead : int
             How many hours ahead to look for events
+        refresh : bool
+            Bypass the cache and refetch (the background refresher)
 
         Returns
         -------
         List[TrafficEvent]
             All relevant events found
         """
+        tile = geohash(latitude, longitude, self.precision)
+        center_lat, center_lon, _, _ = geohash_cell(tile)
+        # Any point of the tile is at most half its diagonal from the centre
+        fetch_radius = radius_bucket(radius_km + tile_half_diagonal_km(tile))
+
+        events = await self.tile_cache.get(
+            (tile, fetch_radius, hours_ahead),
+            lambda: self._fetch_upstream(center_lat, center_lon, fetch_radius, hours_ahead),
+            refresh=refresh,
+        )
+        return within_radius(events, latitude, longitude, radius_km)
+
+    async def _fetch_upstream(self, latitude: float, longitude: float,
+                              radius_km: int, hours_ahead: int) -> List[TrafficEvent]:
+        """
+        Query every client concurrently and merge the results; raises
+        :class:`EventFetchError` (carrying the partial results) if any
+        client failed, so the lookup is not cached as "no events".
+        """
         start_time = datetime.now()
         end_time = start_time + timedelta(hours=hours_ahead)
 
         all_events = []
+        failures = []
 
         async def fetch_from_client(client):
             try:
@@ -283,7 +602,8 @@ class TrafficEventManager:
                     return []
             except Exception as e:
                 logger.error(f"Failed to fetch from {client.__class__.__name__}: {e}")
-                return []
+                failures.append(f"{client.__class__.__name__}: {e}")
+                return e.events if isinstance(e, EventFetchError) else []
 
         # Fetch from all clients concurrently
         tasks = [fetch_from_client(client) for client in self.clients]
@@ -294,8 +614,30 @@ class TrafficEventManager:
                 all_events.extend(result)
 
         # Remove duplicates based on event_id
-        unique_events = {event.event_id: event for event in all_events}
-        return list(unique_events.values())
+        unique_events = list({event.event_id: event for event in all_events}.values())
+        if failures:
+            raise EventFetchError("; ".join(failures), unique_events)
+        return unique_events
+
+    async def get_events_for_tile(self, latitude: float, longitude: float,
+                                  radius_km: int = 15) -> List[TrafficEvent]:
+        """
+        Like :meth:`get_events_near_location`, but snapped to the ~1 km
+        location tile and served from the on-disk cache while fresh.
+        """
+        lat, lon = location_tile(latitude, longitude)
+        key = f"{lat:.2f}_{lon:.2f}_r{radius_km}"
+
+        events = self.disk_cache.get(key)
+        if events is None:
+            try:
+                events = await self.get_events_near_location(lat, lon, radius_km)
+            except EventFetchError as exc:
+                # Use what did arrive, but don't cache an outage for the TTL
+                logger.warning(f"Partial event lookup for tile {key}, not cached: {exc}")
+                return within_radius(exc.events, lat, lon, radius_km)
+            self.disk_cache.put(key, events)
+        return events
 
     async def get_events_impacting_road(self, road_latitude: float, road_longitude: float,
                                       road_name: str, radius_km: int = 5) -> List[TrafficEvent]:
@@ -316,7 +658,12 @@ class TrafficEventManager:
         List[TrafficEvent]
             Events likely to impact this road
         """
-        events = await self.get_events_near_location(road_latitude, road_longitude, radius_km)
+        try:
+            events = await self.get_events_near_location(road_latitude, road_longitude, radius_km)
+        except EventFetchError as exc:
+            # Whatever the providers that did answer returned
+            logger.warning(f"Partial event lookup near {road_name}: {exc}")
+            events = within_radius(exc.events, road_latitude, road_longitude, radius_km)
 
         # Filter and prioritize events based on type and proximity
         high_impact_types = {"concert", "sports", "event", "festival"}
@@ -379,7 +726,12 @@ async def get_traffic_events(latitude: float, longitude: float, radius_km: int =
 
     Returns events in JSON-serializable format.
     """
-    events = await event_manager.get_events_near_location(latitude, longitude, radius_km)
+    try:
+        events = await event_manager.get_events_near_location(latitude, longitude, radius_km)
+    except EventFetchError as exc:
+        # Whatever the providers that did answer returned
+        logger.warning(f"Partial event lookup at ({latitude:.2f}, {longitude:.2f}): {exc}")
+        events = within_radius(exc.events, latitude, longitude, radius_km)
     return [event.to_dict() for event in events]
 
 
@@ -391,7 +743,8 @@ async def main():
 
     print("🔍 Searching for traffic-impacting events in Mumbai...")
 
-    events = await get_traffic_events(latitude, longitude, radius_km=20)
+    async with event_manager:
+        events = await get_traffic_events(latitude, longitude, radius_km=20)
 
     print(f"📅 Found {len(events)} events:")
 
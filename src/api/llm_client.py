@@ -0,0 +1,160 @@
+"""
+Shared Groq chat-completions client for the AI ops and chat endpoints.
+
+Both routers used to open a fresh ``httpx.AsyncClient`` per request,
+paying DNS, TCP and TLS setup on every call.  :data:`llm_client` holds one
+long-lived client instead, opened by the API lifespan and closed on
+shutdown:
+
+* HTTP/2 (``LLM_HTTP2``) when the ``h2`` package is installed, otherwise
+  HTTP/1.1 keep-alive — concurrent completions then share warm
+  connections either way;
+* connection limits and timeouts from ``LLM_HTTP_*`` in ``src/config.py``;
+* the latency of every call is recorded per caller and served by
+  ``GET /api/metrics`` under ``"llm"``.
+
+Without the lifespan (tests, scripts) the client opens itself on first use.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import time
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional
+
+import httpx
+import numpy as np
+from fastapi import HTTPException
+
+from src.config import (
+    GROQ_BASE_URL,
+    GROQ_MODEL,
+    LLM_HTTP2,
+    LLM_HTTP_CONNECT_TIMEOUT_S,
+    LLM_HTTP_KEEPALIVE_S,
+    LLM_HTTP_MAX_CONNECTIONS,
+    LLM_HTTP_MAX_KEEPALIVE,
+    LLM_HTTP_TIMEOUT_S,
+    QUERY_SAMPLE_SIZE,
+)
+
+logger = logging.getLogger(__name__)
+
+
+def http2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+class LLMClient:
+    """One pooled ``httpx.AsyncClient`` for Groq ``/chat/completions``."""
+
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        base_url: str = GROQ_BASE_URL,
+        model: str = GROQ_MODEL,
+        http2: bool = LLM_HTTP2,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+        sample_size: int = QUERY_SAMPLE_SIZE,
+    ):
+        self.api_key = api_key if api_key is not None else os.getenv("GROQ_API_KEY")
+        self.base_url = base_url
+        self.model = model
+        self.http2 = http2
+        self.transport = transport
+        self.sample_size = sample_size
+        self.client: Optional[httpx.AsyncClient] = None
+        self._samples: Dict[str, Deque[float]] = {}
+        self._stats: Dict[str, Dict[str, float]] = {}
+
+    async def open(self) -> None:
+        """Create the pooled client (no-op if already open)."""
+        if self.client is not None and not self.client.is_closed:
+            return
+        http2 = self.http2 and http2_available()
+        if self.http2 and not http2:
+            logger.warning("h2 is not installed; Groq calls use HTTP/1.1 keep-alive")
+        self.client = httpx.AsyncClient(
+            base_url=self.base_url,
+            http2=http2,
+            limits=httpx.Limits(
+                max_connections=LLM_HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=LLM_HTTP_MAX_KEEPALIVE,
+                keepalive_expiry=LLM_HTTP_KEEPALIVE_S,
+            ),
+            timeout=httpx.Timeout(LLM_HTTP_TIMEOUT_S, connect=LLM_HTTP_CONNECT_TIMEOUT_S),
+            transport=self.transport,
+        )
+
+    async def close(self) -> None:
+        """Close the client and its pooled connections."""
+        if self.client is not None:
+            await self.client.aclose()
+            self.client = None
+
+    async def chat(self, messages: List[dict], temperature: float, max_tokens: int,
+                   caller: str = "chat") -> str:
+        """Content of one chat completion; errors surface as ``HTTPException``."""
+        if not self.api_key:
+            raise HTTPException(status_code=500, detail="GROQ_API_KEY is not configured")
+        await self.open()
+
+        payload = {
+            "model": self.model,
+            "messages": messages,
+            "temperature": temperature,
+            "max_tokens": max_tokens,
+        }
+        headers = {"Authorization": f"Bearer {self.api_key}"}
+
+        started = time.perf_counter()
+        failed = True
+        try:
+            resp = await self.client.post("/chat/completions", json=payload, headers=headers)
+            if resp.status_code >= 400:
+                raise HTTPException(status_code=resp.status_code, detail=f"Groq API error: {resp.text}")
+            data = resp.json()
+            failed = False
+        except httpx.TimeoutException:
+            raise HTTPException(status_code=504, detail="Groq API timed out")
+        except httpx.HTTPError as exc:
+            raise HTTPException(status_code=502, detail=f"Groq API unreachable: {exc}")
+        finally:
+            self._record(caller, (time.perf_counter() - started) * 1000, failed)
+
+        content = (data.get("choices") or [{}])[0].get("message", {}).get("content")
+        if not content:
+            raise HTTPException(status_code=502, detail="Empty response from Groq")
+        return content
+
+    def _record(self, caller: str, ms: float, failed: bool) -> None:
+        stats = self._stats.setdefault(caller, {"count": 0, "total_ms": 0.0, "max_ms": 0.0, "failed": 0})
+        stats["count"] += 1
+        stats["total_ms"] += ms
+        stats["max_ms"] = max(stats["max_ms"], ms)
+        stats["failed"] += failed
+        self._samples.setdefault(caller, deque(maxlen=self.sample_size)).append(ms)
+
+    def stats(self) -> Dict[str, Any]:
+        """Per-caller count / mean / p50 / p95 / max latency of Groq calls."""
+        calls = {}
+        for caller, stats in self._stats.items():
+            samples = np.fromiter(self._samples[caller], dtype=np.float64)
+            calls[caller] = {
+                "count": stats["count"],
+                "mean_ms": round(stats["total_ms"] / stats["count"], 3),
+                "p50_ms": round(float(np.percentile(samples, 50)), 3),
+                "p95_ms": round(float(np.percentile(samples, 95)), 3),
+                "max_ms": round(stats["max_ms"], 3),
+                "failed": stats["failed"],
+            }
+        return {"open": self.client is not None and not self.client.is_closed, "calls": calls}
+
+
+llm_client = LLMClient()
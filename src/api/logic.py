@@ -16,28 +16,52 @@ Pipeline
 5. **Format** — Return a JSON object with both the historical and forecast
    series, ready for a React chart component.
 
+All reads go through the configured ``TrafficStore`` — MongoDB or an
+embedded SQLite file (``STORAGE_BACKEND``, see ``src/db/storage.py``).
+Steps 1–2 use a columnar fast path (``fetch_history_block``): a projected
+query decoded straight into NumPy, no DataFrame — or, for recent T, the
+in-process hot-window cache with no query at all.  ``predict_fleet`` runs
+the same path for many segments and batches them into one forward pass.
+
 Prediction Region Search
 ────────────────────────
 Beyond point-queries the module also exposes ``search_predictions`` which
 lets a user search across **all forecasts stored in the predictions cache
-table** — filterable by road segment, time range, and congestion threshold.
+table** — filterable by road segment, time range, and congestion threshold,
+keyset-paginated, or streamed as NDJSON by ``stream_predictions``.
 This fulfils the "search the prediction region" requirement.
 """
 
 from __future__ import annotations
 
+import asyncio
+import base64
+import binascii
+import json
 import torch
 import numpy as np
 import pandas as pd
 from datetime import datetime, timedelta
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, AsyncIterator
 from motor.motor_asyncio import AsyncIOMotorDatabase
 
-from src.config import INPUT_WINDOW, FORECAST_HORIZON, FEATURE_COLS, TARGET_COL
-from src.data.preprocessor import TrafficScaler, prepare_inference_segment
+from src.config import (
+    INPUT_WINDOW,
+    FORECAST_HORIZON,
+    FEATURE_COLS,
+    NUM_FEATURES,
+    TARGET_COL,
+)
+from src.data.preprocessor import (
+    TrafficScaler,
+    prepare_inference_arrays,
+    prepare_inference_segment,
+)
 from src.models.tcn import TemporalConvNet
-from src.db.models import traffic_readings, road_segments, TrafficReading, RoadSegment
-from src.api.events import event_manager
+from src.db.hot_window import hot_windows
+from src.db.rollups import profile_rows
+from src.db.storage import HISTORY_META_FIELDS, HistoryBlock, SearchKey, get_store
+from src.api.event_refresher import event_refresher
 
 
 # ═══════════════════ Singleton model / scaler holders ══════════════════════
@@ -80,35 +104,36 @@ async def fetch_history_segment(
     Retrieve the *window* most recent documents for *road_id* whose timestamp
     is **strictly before** *end_timestamp*, ordered chronologically.
 
-    Uses the compound index (road_id, timestamp) for efficient retrieval.
+    Uses the compound index (road_id, timestamp) of the configured store
+    (see ``src/db/storage.py``) for efficient retrieval.
 
     Raises ValueError if fewer than *window* documents are available.
     """
-    # Find documents with road_id and timestamp < end_timestamp
-    cursor = traffic_readings.find(
-        {
-            "road_id": road_id,
-            "timestamp": {"$lt": end_timestamp}
-        }
-    ).sort("timestamp", -1).limit(window)
+    return await get_store().fetch_history(road_id, end_timestamp, window)
 
-    documents = await cursor.to_list(length=window)
 
-    if len(documents) < window:
-        raise ValueError(
-            f"Need {window} historical documents for {road_id} before "
-            f"{end_timestamp}, but only found {len(documents)}."
-        )
+# ═══════════════════ 1b. Columnar history fetch ════════════════════════════
+
+async def fetch_history_block(
+    road_id: str,
+    end_timestamp: datetime,
+    window: int = INPUT_WINDOW,
+) -> HistoryBlock:
+    """
+    Columnar equivalent of :func:`fetch_history_segment` for the serving hot
+    path: only the feature, time and metadata fields, decoded straight into
+    NumPy — no DataFrame.
 
-    # Convert to DataFrame, sorted ascending by time
-    records = []
-    for doc in reversed(documents):  # Reverse to get chronological order
-        # Remove MongoDB _id field and convert to flat dict
-        record = {k: v for k, v in doc.items() if k != "_id"}
-        records.append(record)
+    Served from the in-process hot-window cache when it holds the *window*
+    readings before *end_timestamp* (see ``src/db/hot_window.py``), from the
+    store otherwise.
 
-    df = pd.DataFrame(records)
-    return df
+    Raises ValueError if fewer than *window* documents are available.
+    """
+    block = hot_windows.window(road_id, end_timestamp, window)
+    if block is not None:
+        return block
+    return await get_store().fetch_history_block(road_id, end_timestamp, window)
 
 
 # ═══════════════════ 2. Predict segment ════════════════════════════════════
@@ -148,49 +173,59 @@ async def predict_segment(
     model = get_model()
     scaler = get_scaler()
 
-    # --- 1. Fetch 24 historical rows ---
-    history_df = await fetch_history_segment(db, road_id, start_timestamp)
-
-    # --- 2. Fetch events for this segment's location (if event features enabled) ---
-    from src.config import FEATURE_COLS
     if "event_impact_score" in FEATURE_COLS:
+        # --- 1. Fetch 24 historical rows ---
+        history_df = await fetch_history_segment(db, road_id, start_timestamp)
+
+        # --- 2. Fetch events for this segment's location ---
         # Get location from the first row (all rows should have same lat/lon)
         lat = history_df.iloc[0]["lat"]
         lon = history_df.iloc[0]["lon"]
-        
-        # Fetch events near this location (within 15km radius)
-        try:
-            events = await event_manager.get_events_near_location(lat, lon, radius_km=15)
-            print(f"📍 Found {len(events)} events near segment {road_id} at ({lat:.4f}, {lon:.4f})")
-        except Exception as e:
-            print(f"⚠️ Failed to fetch events for segment {road_id}: {e}")
-            events = []
-    else:
-        events = []
 
-    # --- 3. Scale and shape for TCN ---
-    x_tensor = torch.from_numpy(
-        prepare_inference_segment(history_df, scaler, events)
-    ).float()  # (1, F, 24)
+        # Event features gathered from the segments × hours matrix the
+        # background refresher rebuilds — no external call on this path
+        impact = event_refresher.impact
+        events = None if impact is not None else event_refresher.events_near(lat, lon, radius_km=15)
 
-    # --- 3. Inference ---
+        # --- 3. Scale and shape for TCN ---
+        x = prepare_inference_segment(history_df, scaler, events, impact)  # (1, F, 24)
+        timestamps = history_df["timestamp"].to_numpy(dtype="datetime64[ms]")
+        target = history_df[TARGET_COL].to_numpy(dtype=np.float64)
+        meta = {m: history_df.iloc[0].get(m, "") for m in HISTORY_META_FIELDS}
+    else:
+        # --- 1–3. Columnar fetch straight into (24, k) arrays → (1, F, 24) ---
+        block = await fetch_history_block(road_id, start_timestamp)
+        x = prepare_inference_arrays(block.raw, block.hour, block.day_of_week, scaler)
+        timestamps, target, meta = block.timestamps, block.target, block.meta
+
+    # --- 4. Inference ---
     with torch.no_grad():
-        y_scaled = model(x_tensor).numpy().flatten()  # (6,)
+        y_scaled = model(torch.from_numpy(x).float()).numpy().flatten()  # (6,)
+
+    return _forecast_response(road_id, start_timestamp, timestamps, target, meta, y_scaled, scaler)
 
-    # --- 4. Inverse-scale to real congestion % ---
+
+def _forecast_response(
+    road_id: str,
+    start_timestamp: datetime,
+    timestamps: np.ndarray,
+    target: np.ndarray,
+    meta: Dict[str, Any],
+    y_scaled: np.ndarray,
+    scaler: TrafficScaler,
+) -> dict:
+    """Inverse-scale one (6,) model output and build the response JSON."""
+    # --- 5. Inverse-scale to real congestion % ---
     y_real = scaler.inverse_transform_target(y_scaled)
 
     # Clamp to valid range
     y_real = np.clip(y_real, 0.0, 100.0)
 
-    # --- 5. Build response JSON ---
-    # History series (use raw congestion_level from the un-scaled DF)
+    # --- 6. Build response JSON ---
+    # History series (use raw congestion_level from the un-scaled history)
     history_series = [
-        {
-            "time": row["timestamp"].isoformat(),
-            "congestion": round(float(row[TARGET_COL]) * 100, 2),
-        }
-        for _, row in history_df.iterrows()
+        {"time": time, "congestion": round(float(value) * 100, 2)}
+        for time, value in zip(np.datetime_as_string(timestamps, unit="s").tolist(), target)
     ]
 
     # Forecast series — timestamps are 1-hour increments from start_timestamp
@@ -202,32 +237,142 @@ async def predict_segment(
         for i in range(FORECAST_HORIZON)
     ]
 
-    # Segment metadata
-    seg_name = history_df.iloc[0].get("segment_name", "")
-    road_name = history_df.iloc[0].get("road_name", "")
-
     return {
         "zone_id": road_id,
-        "segment_name": seg_name,
-        "road_name": road_name,
+        "segment_name": meta.get("segment_name") or "",
+        "road_name": meta.get("road_name") or "",
         "history": history_series,
         "forecast": forecast_series,
     }
 
 
+# ═══════════════════ 2b. Fleet forecast (batched) ═════════════════════════
+
+async def predict_fleet(
+    db: AsyncIOMotorDatabase,
+    road_ids: List[str],
+    start_timestamp: datetime,
+) -> dict:
+    """
+    Forecast many segments from the same *T* in one model call.
+
+    Histories are fetched concurrently through :func:`fetch_history_block`,
+    written into one preallocated (B, F, 24) buffer and run through the TCN
+    as a single batch.  Roads without enough history are reported in
+    ``missing`` instead of failing the whole request.
+    """
+    road_ids = list(dict.fromkeys(road_ids))
+
+    if "event_impact_score" in FEATURE_COLS:
+        # Event features need the per-segment DataFrame path
+        results = await asyncio.gather(
+            *(predict_segment(db, r, start_timestamp) for r in road_ids),
+            return_exceptions=True,
+        )
+        forecasts, missing = [], []
+        for road_id, result in zip(road_ids, results):
+            if isinstance(result, ValueError):
+                missing.append(road_id)
+            elif isinstance(result, BaseException):
+                raise result
+            else:
+                forecasts.append(result)
+        return {"forecasts": forecasts, "missing": missing}
+
+    model = get_model()
+    scaler = get_scaler()
+
+    fetched = await asyncio.gather(
+        *(fetch_history_block(r, start_timestamp) for r in road_ids),
+        return_exceptions=True,
+    )
+    blocks, missing = [], []
+    for road_id, result in zip(road_ids, fetched):
+        if isinstance(result, ValueError):
+            missing.append(road_id)
+        elif isinstance(result, BaseException):
+            raise result
+        else:
+            blocks.append(result)
+
+    if not blocks:
+        return {"forecasts": [], "missing": missing}
+
+    x = np.empty((len(blocks), NUM_FEATURES, INPUT_WINDOW), dtype=np.float32)
+    prepare_inference_arrays(
+        np.stack([b.raw for b in blocks]),
+        np.stack([b.hour for b in blocks]),
+        np.stack([b.day_of_week for b in blocks]),
+        scaler,
+        out=x,
+    )
+    with torch.no_grad():
+        y_scaled = model(torch.from_numpy(x)).numpy()  # (B, 6)
+
+    forecasts = [
+        _forecast_response(
+            b.road_id, start_timestamp, b.timestamps, b.target, b.meta, y_scaled[i], scaler
+        )
+        for i, b in enumerate(blocks)
+    ]
+    return {"forecasts": forecasts, "missing": missing}
+
+
 # ═══════════════════ 3. List available segments (dropdown) ═════════════════
 
 async def list_segments(db: AsyncIOMotorDatabase) -> list[dict]:
     """Return all unique road segments for the frontend dropdown."""
-    cursor = road_segments.find({}).sort("road_name", 1)
-    documents = await cursor.to_list(length=None)
+    return await get_store().list_segments()
+
+
+# ═══════════════════ 3b. Segments on the map (geospatial) ══════════════════
+
+async def segments_in_bbox(
+    min_lat: float,
+    min_lon: float,
+    max_lat: float,
+    max_lon: float,
+    with_congestion: bool = True,
+) -> list[dict]:
+    """Segments inside the map viewport (2dsphere ``$geoWithin`` on Mongo)."""
+    segments = await get_store().segments_in_bbox(min_lat, min_lon, max_lat, max_lon)
+    return await attach_latest_congestion(segments) if with_congestion else segments
+
+
+async def segments_near(
+    lat: float,
+    lon: float,
+    radius_km: float,
+    limit: int = 50,
+    with_congestion: bool = True,
+) -> list[dict]:
+    """Segments within *radius_km* of a point, nearest first."""
+    segments = await get_store().segments_near(lat, lon, radius_km, limit)
+    for seg in segments:
+        seg["distance_km"] = round(seg["distance_km"], 3)
+    return await attach_latest_congestion(segments) if with_congestion else segments
 
-    segments = []
-    for doc in documents:
-        # Remove MongoDB _id field and convert to dict
-        segment_data = {k: v for k, v in doc.items() if k != "_id"}
-        segments.append(segment_data)
 
+async def attach_latest_congestion(segments: list[dict]) -> list[dict]:
+    """
+    Add ``congestion_pct`` / ``congestion_time`` of each segment's newest
+    reading — from the hot-window cache, with one store query for the rest.
+    """
+    latest = {}
+    for seg in segments:
+        block = hot_windows.latest(seg["road_id"])
+        if block is not None:
+            latest[seg["road_id"]] = block
+    missing = [seg["road_id"] for seg in segments if seg["road_id"] not in latest]
+    if missing:
+        for block in await get_store().latest_blocks(1, road_ids=missing):
+            latest[block.road_id] = block
+
+    for seg in segments:
+        block = latest.get(seg["road_id"])
+        if block is not None and len(block.timestamps):
+            seg["congestion_pct"] = round(float(block.target[-1]) * 100, 2)
+            seg["congestion_time"] = np.datetime_as_string(block.timestamps[-1], unit="s")
     return segments
 
 
@@ -242,19 +387,9 @@ async def get_segment_time_range(
     plus the total number of readings — useful for the frontend to
     constrain the date-picker.
     """
-    pipeline = [
-        {"$match": {"road_id": road_id}},
-        {"$group": {
-            "_id": None,
-            "earliest": {"$min": "$timestamp"},
-            "latest": {"$max": "$timestamp"},
-            "count": {"$sum": 1}
-        }}
-    ]
-
-    result = await traffic_readings.aggregate(pipeline).to_list(length=1)
+    doc = await get_store().time_range(road_id)
 
-    if not result:
+    if doc is None:
         return {
             "road_id": road_id,
             "earliest": None,
@@ -262,17 +397,84 @@ async def get_segment_time_range(
             "total_readings": 0,
         }
 
-    doc = result[0]
+    return _time_range_out(doc)
+
+
+async def get_all_segment_time_ranges(db: AsyncIOMotorDatabase) -> list[dict]:
+    """Time range of every segment in one response."""
+    return [_time_range_out(doc) for doc in await get_store().all_time_ranges()]
+
+
+def _time_range_out(doc: dict) -> dict:
     return {
-        "road_id": road_id,
+        "road_id": doc["road_id"],
         "earliest": doc["earliest"].isoformat() if doc["earliest"] else None,
         "latest": doc["latest"].isoformat() if doc["latest"] else None,
         "total_readings": doc["count"],
     }
 
 
+# ═══════════════════ 4b. Hour-of-day congestion profile ═══════════════════
+
+async def get_segment_profile(
+    road_id: str,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+) -> dict:
+    """
+    Congestion by hour of day for *road_id* over [start, end): readings,
+    mean, min, max and p50 / p90 / p95 in %.  Old periods are answered from
+    their daily / weekly rollups, so long ranges stay cheap.
+    """
+    summary = await get_store().hourly_profile(road_id, start, end)
+    hours = []
+    for row in profile_rows(summary):
+        out = {"hour": row["hour"], "readings": row["n"]}
+        for name in ("mean", "min", "max", "p50", "p90", "p95"):
+            out[f"{name}_pct"] = None if row[name] is None else round(row[name] * 100, 2)
+        hours.append(out)
+    return {
+        "road_id": road_id,
+        "start": start,
+        "end": end,
+        "total_readings": int(summary["n"].sum()),
+        "hours": hours,
+    }
+
+
 # ═══════════════════ 5. Prediction Region Search ══════════════════════════
 
+def encode_search_cursor(timestamp: datetime, key: str) -> str:
+    """Opaque page token for the keyset position (timestamp, key)."""
+    raw = json.dumps({"t": timestamp.isoformat(), "k": key}).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_search_cursor(token: str) -> SearchKey:
+    """Inverse of :func:`encode_search_cursor`; ValueError on a bad token."""
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        data = json.loads(raw)
+        key = str(data["k"])
+        # The key reaches the store's query (an ObjectId on Mongo)
+        if not get_store().valid_search_key(key):
+            raise ValueError(key)
+        return datetime.fromisoformat(data["t"]), key
+    except (binascii.Error, ValueError, KeyError, TypeError) as exc:
+        raise ValueError(f"Invalid search cursor: {token!r}") from exc
+
+
+def _search_row(doc: dict) -> dict:
+    return {
+        "road_id": doc["road_id"],
+        "segment_name": doc["segment_name"],
+        "road_name": doc["road_name"],
+        "timestamp": doc["timestamp"].isoformat(),
+        "congestion_pct": round(float(doc["congestion_level"]) * 100, 2),
+        "congestion_band": doc["congestion_band"],
+    }
+
+
 async def search_predictions(
     db: AsyncIOMotorDatabase,
     road_id: Optional[str] = None,
@@ -281,7 +483,8 @@ async def search_predictions(
     min_congestion: Optional[float] = None,
     max_congestion: Optional[float] = None,
     limit: int = 100,
-) -> list[dict]:
+    cursor: Optional[str] = None,
+) -> dict:
     """
     Search stored traffic readings (the "prediction region") with flexible
     filters.  This powers a search bar / filter panel in the MERN frontend.
@@ -294,40 +497,48 @@ async def search_predictions(
     - min_congestion   — congestion_level >= value (0-1 scale in DB)
     - max_congestion   — congestion_level <= value
     - limit            — max rows returned (default 100)
+    - cursor           — ``next_cursor`` of the previous page
+
+    Pages are keyset-paginated on (timestamp, _id) descending: each page
+    resumes strictly after the last row of the previous one, so page N costs
+    the same index seek as page 1.
 
     Returns
     -------
-    list[dict] — each dict has road_id, segment_name, timestamp, congestion_%
+    dict — ``results`` (each with road_id, segment_name, timestamp,
+    congestion_%) and ``next_cursor`` (None on the last page)
     """
-    # Build MongoDB query filter
-    query_filter = {}
-
-    if road_id:
-        query_filter["road_id"] = road_id
-    if start_time:
-        query_filter["timestamp"] = query_filter.get("timestamp", {})
-        query_filter["timestamp"]["$gte"] = start_time
-    if end_time:
-        query_filter["timestamp"] = query_filter.get("timestamp", {})
-        query_filter["timestamp"]["$lt"] = end_time
-    if min_congestion is not None:
-        query_filter["congestion_level"] = query_filter.get("congestion_level", {})
-        query_filter["congestion_level"]["$gte"] = min_congestion
-    if max_congestion is not None:
-        query_filter["congestion_level"] = query_filter.get("congestion_level", {})
-        query_filter["congestion_level"]["$lte"] = max_congestion
-
-    cursor = traffic_readings.find(query_filter).sort("timestamp", -1).limit(limit)
-    documents = await cursor.to_list(length=limit)
-
-    return [
-        {
-            "road_id": doc["road_id"],
-            "segment_name": doc["segment_name"],
-            "road_name": doc["road_name"],
-            "timestamp": doc["timestamp"].isoformat(),
-            "congestion_pct": round(float(doc["congestion_level"]) * 100, 2),
-            "congestion_band": doc["congestion_band"],
-        }
-        for doc in documents
-    ]
+    after = decode_search_cursor(cursor) if cursor else None
+    # One extra row tells us whether another page exists
+    documents = await get_store().search(
+        road_id, start_time, end_time, min_congestion, max_congestion, limit + 1, after
+    )
+
+    next_cursor = None
+    if len(documents) > limit:
+        documents = documents[:limit]
+        last = documents[-1]
+        next_cursor = encode_search_cursor(last["timestamp"], last["key"])
+
+    return {"results": [_search_row(doc) for doc in documents], "next_cursor": next_cursor}
+
+
+async def stream_predictions(
+    road_id: Optional[str] = None,
+    start_time: Optional[datetime] = None,
+    end_time: Optional[datetime] = None,
+    min_congestion: Optional[float] = None,
+    max_congestion: Optional[float] = None,
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+) -> AsyncIterator[str]:
+    """
+    :func:`search_predictions` as NDJSON lines, read from the database cursor
+    batch by batch — nothing is buffered beyond one batch.  Without *limit*
+    every match is streamed.
+    """
+    after = decode_search_cursor(cursor) if cursor else None
+    async for doc in get_store().iter_search(
+        road_id, start_time, end_time, min_congestion, max_congestion, limit, after
+    ):
+        yield json.dumps(_search_row(doc)) + "\n"
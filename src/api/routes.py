@@ -4,21 +4,43 @@ FastAPI router — all REST endpoints for the MERN frontend.
 Endpoints
 ─────────
 GET  /api/segments              — dropdown list of unique road segments
+GET  /api/segments/bbox         — segments inside a map viewport (+ latest congestion)
+GET  /api/segments/near         — segments within N km of a point (+ latest congestion)
 GET  /api/segments/{id}/range   — earliest/latest timestamp for a segment
+GET  /api/segments/ranges       — earliest/latest timestamp for every segment
+GET  /api/segments/{id}/profile — congestion by hour of day (raw + rollups)
 POST /api/forecast              — segmented search + TCN inference
-POST /api/search                — search stored readings (prediction region)
+POST /api/forecast/fleet        — batched TCN inference for many segments
+POST /api/search                — search stored readings (keyset pages / NDJSON)
 GET  /api/health                — liveness probe
+GET  /api/metrics               — Mongo / Groq latency + plan audit + cache stats
 """
 
 from __future__ import annotations
 
-from fastapi import APIRouter, Depends, HTTPException
+from datetime import datetime
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
 from motor.motor_asyncio import AsyncIOMotorDatabase
 
+from src.db import index_audit
+from src.db.hot_window import hot_windows
 from src.db.models import get_db
+from src.db.query_metrics import command_latency
+from src.db.storage import get_store
 from src.api.schemas import (
     SegmentOut,
+    SegmentGeoOut,
     TimeRangeOut,
+    SegmentProfileOut,
+    ForecastRequest,
+    ForecastResponse,
+    FleetForecastRequest,
+    FleetForecastResponse,
+    PredictionSearchQuery,
+    PredictionSearchPage,
     CongestionClassifyRequest,
     CongestionClassifyResponse,
     DatathonForecastRequest,
@@ -26,10 +48,22 @@ from src.api.schemas import (
 )
 from src.api.logic import (
     list_segments,
+    segments_in_bbox,
+    segments_near,
     get_segment_time_range,
+    get_all_segment_time_ranges,
+    get_segment_profile,
+    predict_segment,
+    predict_fleet,
+    search_predictions,
+    stream_predictions,
+    decode_search_cursor,
 )
 from src.api.classifier import predict_congestion_band
 from src.api.datathon import predict_datathon
+from src.api.event_refresher import event_refresher
+from src.api.events import event_manager
+from src.api.llm_client import llm_client
 
 router = APIRouter(prefix="/api", tags=["traffic"])
 
@@ -41,6 +75,21 @@ async def health():
     return {"status": "ok"}
 
 
+# ──────────────────────── Metrics ──────────────────────────────────────────
+
+@router.get("/metrics")
+async def metrics():
+    """MongoDB latency per query shape, Groq call latency, the last query-plan audit and cache hit rates."""
+    return {
+        "mongo_commands": command_latency.snapshot(),
+        "index_audit": index_audit.last_audit,
+        "hot_window": hot_windows.stats(),
+        "event_tiles": event_manager.tile_cache.stats(),
+        "event_refresher": event_refresher.stats(),
+        "llm": llm_client.stats(),
+    }
+
+
 # ──────────────────────── Segments (dropdown) ──────────────────────────────
 
 @router.get("/segments", response_model=list[SegmentOut])
@@ -49,12 +98,127 @@ async def get_segments(db: AsyncIOMotorDatabase = Depends(get_db)):
     return await list_segments(db)
 
 
+@router.get("/segments/bbox", response_model=list[SegmentGeoOut])
+async def get_segments_in_bbox(
+    min_lat: float = Query(..., ge=-90, le=90),
+    min_lon: float = Query(..., ge=-180, le=180),
+    max_lat: float = Query(..., ge=-90, le=90),
+    max_lon: float = Query(..., ge=-180, le=180),
+    with_congestion: bool = True,
+):
+    """Segments inside the map viewport, optionally with their latest congestion."""
+    if min_lat >= max_lat or min_lon >= max_lon:
+        raise HTTPException(status_code=422, detail="Bounding box must have min < max on both axes")
+    return await segments_in_bbox(min_lat, min_lon, max_lat, max_lon, with_congestion)
+
+
+@router.get("/segments/near", response_model=list[SegmentGeoOut])
+async def get_segments_near(
+    lat: float = Query(..., ge=-90, le=90),
+    lon: float = Query(..., ge=-180, le=180),
+    radius_km: float = Query(2.0, gt=0, le=50),
+    limit: int = Query(50, ge=1, le=500),
+    with_congestion: bool = True,
+):
+    """Segments within *radius_km* of a point, nearest first."""
+    return await segments_near(lat, lon, radius_km, limit, with_congestion)
+
+
+@router.get("/segments/ranges", response_model=list[TimeRangeOut])
+async def get_ranges(db: AsyncIOMotorDatabase = Depends(get_db)):
+    """Return the available time range of every segment in one call."""
+    return await get_all_segment_time_ranges(db)
+
+
 @router.get("/segments/{road_id}/range", response_model=TimeRangeOut)
 async def get_range(road_id: str, db: AsyncIOMotorDatabase = Depends(get_db)):
     """Return the available time range for a specific segment."""
     return await get_segment_time_range(db, road_id)
 
 
+@router.get("/segments/{road_id}/profile", response_model=SegmentProfileOut)
+async def get_profile(road_id: str, start: Optional[datetime] = None, end: Optional[datetime] = None):
+    """Congestion by hour of day over [start, end), including rolled-up history."""
+    if start is not None and end is not None and start >= end:
+        raise HTTPException(status_code=422, detail="start must be before end")
+    return await get_segment_profile(road_id, start, end)
+
+
+# ──────────────────────── TCN forecast ────────────────────────────────────
+
+@router.post("/forecast", response_model=ForecastResponse)
+async def forecast(req: ForecastRequest, db: AsyncIOMotorDatabase = Depends(get_db)):
+    """Segmented search + TCN 6-hour forecast for one road segment."""
+    try:
+        return await predict_segment(db, req.road_id, req.timestamp)
+    except HTTPException:
+        raise
+    except ValueError as exc:
+        raise HTTPException(status_code=404, detail=str(exc))
+    except Exception as exc:
+        raise HTTPException(status_code=500, detail=f"Inference error: {exc}")
+
+
+@router.post("/forecast/fleet", response_model=FleetForecastResponse)
+async def forecast_fleet(req: FleetForecastRequest, db: AsyncIOMotorDatabase = Depends(get_db)):
+    """TCN forecasts for many segments from the same T in one batched call."""
+    try:
+        return await predict_fleet(db, req.road_ids, req.timestamp)
+    except HTTPException:
+        raise
+    except Exception as exc:
+        raise HTTPException(status_code=500, detail=f"Inference error: {exc}")
+
+
+# ──────────────────────── Prediction region search ─────────────────────────
+
+SEARCH_PAGE_MAX = 1000
+NDJSON = "application/x-ndjson"
+
+
+@router.post("/search", response_model=PredictionSearchPage)
+async def search(
+    req: PredictionSearchQuery,
+    request: Request,
+    db: AsyncIOMotorDatabase = Depends(get_db),
+):
+    """
+    Search stored readings, newest first.  Pages are keyset-paginated: pass
+    the returned ``next_cursor`` back as ``cursor``.  With
+    ``Accept: application/x-ndjson`` the matches are streamed one JSON
+    object per line instead (``limit: null`` streams all of them).
+    """
+    try:
+        get_store().check_search()
+    except ValueError as exc:
+        raise HTTPException(status_code=501, detail=str(exc))
+    try:
+        if req.cursor:
+            decode_search_cursor(req.cursor)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+
+    filters = dict(
+        road_id=req.road_id,
+        start_time=req.start_time,
+        end_time=req.end_time,
+        # The API speaks congestion %, the readings store 0-1
+        min_congestion=None if req.min_congestion is None else req.min_congestion / 100,
+        max_congestion=None if req.max_congestion is None else req.max_congestion / 100,
+        cursor=req.cursor,
+    )
+
+    if NDJSON in request.headers.get("accept", ""):
+        return StreamingResponse(stream_predictions(limit=req.limit, **filters), media_type=NDJSON)
+
+    if req.limit is None or req.limit > SEARCH_PAGE_MAX:
+        raise HTTPException(
+            status_code=422,
+            detail=f"limit must be between 1 and {SEARCH_PAGE_MAX} (stream with Accept: {NDJSON} for more)",
+        )
+    return await search_predictions(db, limit=req.limit, **filters)
+
+
 # ──────────────────────── Legacy classifier (band) ────────────────────────
 
 @router.post("/classify", response_model=CongestionClassifyResponse)
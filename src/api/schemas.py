@@ -21,6 +21,12 @@ class SegmentOut(BaseModel):
     road_class: Optional[str] = None
 
 
+class SegmentGeoOut(SegmentOut):
+    distance_km: Optional[float] = None
+    congestion_pct: Optional[float] = None
+    congestion_time: Optional[str] = None
+
+
 # ─────────────── Forecast request / response ───────────────────────────────
 
 class ForecastRequest(BaseModel):
@@ -52,6 +58,31 @@ class ForecastResponse(BaseModel):
     forecast: List[TimePoint]
 
 
+class FleetForecastRequest(BaseModel):
+    road_ids: List[str] = Field(
+        ..., min_length=1, max_length=500,
+        description="Road segment IDs to forecast in one batched model call",
+    )
+    timestamp: datetime = Field(
+        ..., description="The point-in-time T from which every forecast begins."
+    )
+
+    @field_validator('timestamp')
+    @classmethod
+    def timestamp_not_in_future(cls, v):
+        if v > datetime.now(v.tzinfo):
+            raise ValueError('Forecast timestamp cannot be in the future - we need historical data to make predictions')
+        return v
+
+
+class FleetForecastResponse(BaseModel):
+    forecasts: List[ForecastResponse]
+    missing: List[str] = Field(
+        default_factory=list,
+        description="Requested segments without 24 hours of history before T",
+    )
+
+
 # ─────────────── Time Range ────────────────────────────────────────────────
 
 class TimeRangeOut(BaseModel):
@@ -61,6 +92,25 @@ class TimeRangeOut(BaseModel):
     total_readings: int
 
 
+class HourProfileOut(BaseModel):
+    hour: int
+    readings: int
+    mean_pct: Optional[float] = None
+    min_pct: Optional[float] = None
+    max_pct: Optional[float] = None
+    p50_pct: Optional[float] = None
+    p90_pct: Optional[float] = None
+    p95_pct: Optional[float] = None
+
+
+class SegmentProfileOut(BaseModel):
+    road_id: str
+    start: Optional[datetime] = None
+    end: Optional[datetime] = None
+    total_readings: int
+    hours: List[HourProfileOut]
+
+
 # ─────────────── Prediction Search ─────────────────────────────────────────
 
 class PredictionSearchQuery(BaseModel):
@@ -73,7 +123,10 @@ class PredictionSearchQuery(BaseModel):
     max_congestion: Optional[float] = Field(
         None, ge=0, le=100, description="Max congestion % (0-100)"
     )
-    limit: int = Field(100, ge=1, le=1000)
+    limit: Optional[int] = Field(
+        100, ge=1, description="Rows per page (max 1000); null streams every match as NDJSON"
+    )
+    cursor: Optional[str] = Field(None, description="next_cursor of the previous page")
 
     @field_validator('max_congestion')
     @classmethod
@@ -101,6 +154,11 @@ class PredictionSearchResult(BaseModel):
     congestion_band: Optional[str] = None
 
 
+class PredictionSearchPage(BaseModel):
+    results: list[PredictionSearchResult]
+    next_cursor: Optional[str] = None
+
+
 # ─────────────── Classifier (congestion band) ─────────────────────────────
 
 class CongestionClassifyRequest(BaseModel):
@@ -0,0 +1,184 @@
+"""
+Precomputed event-impact features.
+
+The five event features (``EVENT_FEATURE_COLS``) of a reading depend only
+on its segment, its time and the known events.  Instead of walking every
+event for every row, :func:`compute_event_impact` builds a
+segments × hours × features matrix once per event set:
+
+1. **Spatial index** — events sorted by latitude; each segment takes the
+   slice within ±10 km of latitude (``searchsorted``) and keeps the pairs
+   whose haversine distance is ≤ 10 km.
+2. **Per pair** — impact (type × distance falloff × size), concert / sports /
+   high-impact flags (≤ 5 km) and a density count of 1.
+3. **Time** — each pair is active over a contiguous run of hour slots, so
+   its contribution is added at the first slot and subtracted after the
+   last; a cumulative sum along the hour axis yields every slot at once.
+
+Slots are evaluated at the start of each hour; :meth:`EventImpactMatrix.gather`
+maps a reading to its segment row and the slot of its hour.  The numbers
+match the original per-row rules (impact capped at 10, flags within 5 km,
+density within 10 km) at hourly resolution.
+
+Training (``add_event_features``) builds one matrix over the dataset's
+time range; the API builds one for all segments on every event refresh
+(``src/api/event_refresher.py``) and inference only gathers from it.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, List, Sequence
+
+import numpy as np
+import pandas as pd
+
+EVENT_FEATURE_COLS = [
+    "event_impact_score",
+    "concert_nearby",
+    "sports_nearby",
+    "event_density",
+    "high_impact_event",
+]
+
+EVENT_TYPE_IMPACT = {
+    "concert": 3.0,
+    "sports": 2.5,
+    "festival": 2.0,
+    "event": 1.5,
+    "entertainment": 1.2,
+    "shopping": 0.8,
+    "business": 0.6,
+    "tourism": 0.7,
+    "transport": 1.0,
+    "other": 0.5,
+}
+
+DENSITY_RADIUS_KM = 10.0
+NEARBY_RADIUS_KM = 5.0
+MAX_IMPACT = 10.0
+
+_EARTH_RADIUS_KM = 6371.0
+_KM_PER_DEG_LAT = np.pi * _EARTH_RADIUS_KM / 180
+_HOUR_MS = 3_600_000
+
+
+@dataclass
+class EventImpactMatrix:
+    """Event features of every (segment, hour slot)."""
+
+    road_ids: List[str]
+    start: np.datetime64          # first hour slot, datetime64[h]
+    values: np.ndarray            # (S, H, len(EVENT_FEATURE_COLS)) float32
+
+    def __post_init__(self):
+        self._index: Dict[str, int] = {r: i for i, r in enumerate(self.road_ids)}
+
+    @property
+    def hours(self) -> int:
+        return self.values.shape[1]
+
+    def gather(self, road_ids: Sequence[str], timestamps: np.ndarray) -> np.ndarray:
+        """(N, 5) features of readings; zeros outside the matrix."""
+        seg = np.array([self._index.get(r, -1) for r in road_ids], dtype=np.int64)
+        slot = (np.asarray(timestamps, dtype="datetime64[h]") - self.start).astype(np.int64)
+        ok = (seg >= 0) & (slot >= 0) & (slot < self.hours)
+        out = np.zeros((len(seg), len(EVENT_FEATURE_COLS)), dtype=np.float32)
+        out[ok] = self.values[seg[ok], slot[ok]]
+        return out
+
+
+def _naive_utc_ms(ts) -> float:
+    ts = pd.Timestamp(ts)
+    if ts.tzinfo is not None:
+        ts = ts.tz_convert("UTC").tz_localize(None)
+    return ts.value / 1_000_000
+
+
+def _haversine_km(lat1, lon1, lat2, lon2) -> np.ndarray:
+    p1, p2 = np.radians(lat1), np.radians(lat2)
+    dp, dl = p2 - p1, np.radians(np.asarray(lon2) - np.asarray(lon1))
+    a = np.sin(dp / 2) ** 2 + np.cos(p1) * np.cos(p2) * np.sin(dl / 2) ** 2
+    return 2 * _EARTH_RADIUS_KM * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
+
+
+def _pairs_within(seg_lat, seg_lon, ev_lat, ev_lon, radius_km: float):
+    """(segment idx, event idx, distance) of every pair within *radius_km*."""
+    order = np.argsort(ev_lat, kind="stable")
+    sorted_lat = ev_lat[order]
+    dlat = radius_km / _KM_PER_DEG_LAT
+    lo = np.searchsorted(sorted_lat, seg_lat - dlat, side="left")
+    hi = np.searchsorted(sorted_lat, seg_lat + dlat, side="right")
+    counts = hi - lo
+    seg = np.repeat(np.arange(len(seg_lat)), counts)
+    # Position inside each segment's latitude slice
+    within = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    ev = order[np.repeat(lo, counts) + within]
+    dist = _haversine_km(seg_lat[seg], seg_lon[seg], ev_lat[ev], ev_lon[ev])
+    keep = dist <= radius_km
+    return seg[keep], ev[keep], dist[keep]
+
+
+def compute_event_impact(
+    road_ids: Sequence[str],
+    lats: Sequence[float],
+    lons: Sequence[float],
+    events: Sequence,
+    start: datetime,
+    end: datetime,
+) -> EventImpactMatrix:
+    """Event features of *road_ids* for every hour slot from *start* to *end*."""
+    start_h = np.datetime64(pd.Timestamp(start).floor("h").to_datetime64(), "h")
+    end_h = np.datetime64(pd.Timestamp(end).floor("h").to_datetime64(), "h")
+    hours = max(int((end_h - start_h) / np.timedelta64(1, "h")) + 1, 0)
+    values = np.zeros((len(road_ids), hours, len(EVENT_FEATURE_COLS)), dtype=np.float32)
+    matrix = EventImpactMatrix(list(road_ids), start_h, values)
+    if not len(events) or not len(road_ids) or not hours:
+        return matrix
+
+    seg, ev, dist = _pairs_within(
+        np.asarray(lats, dtype=np.float64), np.asarray(lons, dtype=np.float64),
+        np.array([e.latitude for e in events], dtype=np.float64),
+        np.array([e.longitude for e in events], dtype=np.float64),
+        DENSITY_RADIUS_KM,
+    )
+    if not len(seg):
+        return matrix
+
+    # Active slots: start_time <= slot <= end_time (open-ended without end)
+    base_ms = start_h.astype("datetime64[ms]").astype(np.int64)
+    ev_start = np.array([_naive_utc_ms(e.start_time) for e in events])
+    ev_end = np.array([_naive_utc_ms(e.end_time) if e.end_time else np.inf for e in events])
+    first = np.maximum(np.ceil((ev_start[ev] - base_ms) / _HOUR_MS), 0)
+    last = np.minimum(np.floor((ev_end[ev] - base_ms) / _HOUR_MS), hours - 1)
+    active = first <= last
+    seg, ev, dist = seg[active], ev[active], dist[active]
+    first, last = first[active].astype(np.int64), last[active].astype(np.int64)
+
+    types = np.array([e.event_type for e in events], dtype=object)[ev]
+    type_impact = np.array([EVENT_TYPE_IMPACT.get(t, 0.5) for t in types])
+    size = np.array([
+        min(e.expected_attendance / 1000, 5.0) if e.expected_attendance
+        else min(e.venue_capacity / 1000, 5.0) if e.venue_capacity
+        else 1.0
+        for e in events
+    ])[ev]
+    near = dist <= NEARBY_RADIUS_KM
+    contrib = np.column_stack([
+        type_impact * np.maximum(0, 1 - dist / DENSITY_RADIUS_KM) * size,
+        near & (types == "concert"),
+        near & (types == "sports"),
+        np.ones(len(ev)),
+        near & np.isin(types, ["concert", "sports", "festival"]),
+    ]).astype(np.float64)
+
+    diff = np.zeros((len(road_ids), hours + 1, len(EVENT_FEATURE_COLS)))
+    np.add.at(diff, (seg, first), contrib)
+    np.add.at(diff, (seg, last + 1), -contrib)
+    acc = np.cumsum(diff[:, :hours], axis=1)
+
+    values[..., 0] = np.clip(acc[..., 0], 0, MAX_IMPACT)
+    values[..., 1:] = np.rint(acc[..., 1:])
+    values[..., [1, 2, 4]] = np.minimum(values[..., [1, 2, 4]], 1)
+    return matrix
@@ -0,0 +1,134 @@
+"""
+Content-addressed cache of engineered training features.
+
+Re-running ``scripts/train.py`` with new hyper-parameters should not
+re-parse the CSV, rebuild the cyclic features and re-fit the scaler.  This
+module persists the output of :func:`build_feature_matrix` under a key
+derived from everything that influences it:
+
+    sha256( source file bytes | FEATURE_COLS | INPUT_WINDOW | FORECAST_HORIZON )
+
+Layout (one directory per key)
+──────────────────────────────
+    cache/features/<key>/
+        scaled.npy      (N, F) float32 — sorted, scaled feature matrix
+        offsets.npy     (S + 1,) int64 — per-segment row boundaries
+        timestamps.npy  (N,) datetime64[ns] — row timestamps (naive UTC)
+        scaler.npz      min / max arrays of the fitted TrafficScaler
+        meta.json       key, segment ids, source path, shapes
+
+``.npy`` files are loaded with ``mmap_mode="r"`` so a hit costs almost no
+memory or I/O until the window generator actually touches the rows.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+
+from src.config import (
+    FEATURE_COLS,
+    INPUT_WINDOW,
+    FORECAST_HORIZON,
+    FEATURE_CACHE_DIR,
+)
+from src.data.preprocessor import FeatureSet, TrafficScaler
+
+# Bump when the on-disk layout or the feature pipeline changes in a way
+# that is not captured by the config values in the key.
+CACHE_VERSION = 2
+
+
+def file_digest(path: Path | str, chunk_size: int = 1 << 20) -> str:
+    """sha256 of a file's contents, streamed in 1 MiB chunks."""
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def feature_cache_key(source_path: Path | str) -> str:
+    """Derive the cache key for *source_path* under the current config."""
+    payload = json.dumps(
+        {
+            "version": CACHE_VERSION,
+            "source_sha256": file_digest(source_path),
+            "feature_cols": FEATURE_COLS,
+            "input_window": INPUT_WINDOW,
+            "forecast_horizon": FORECAST_HORIZON,
+        },
+        sort_keys=True,
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()[:32]
+
+
+class FeatureCache:
+    """Directory-per-key store for :class:`FeatureSet` objects."""
+
+    def __init__(self, root: Path | str = FEATURE_CACHE_DIR):
+        self.root = Path(root)
+
+    def path_for(self, key: str) -> Path:
+        return self.root / key
+
+    def load(self, key: str) -> FeatureSet | None:
+        """Return the cached feature set for *key*, or None on a miss."""
+        entry = self.path_for(key)
+        try:
+            meta = json.loads((entry / "meta.json").read_text())
+            if meta.get("key") != key:
+                return None
+            scaled = np.load(entry / "scaled.npy", mmap_mode="r")
+            offsets = np.load(entry / "offsets.npy")
+            timestamps = np.load(entry / "timestamps.npy", mmap_mode="r")
+            with np.load(entry / "scaler.npz") as raw:
+                scaler = TrafficScaler()
+                scaler.min_vals = raw["min"]
+                scaler.max_vals = raw["max"]
+                scaler._fitted = True
+        except (OSError, ValueError, KeyError):
+            return None
+
+        return FeatureSet(scaled, offsets, meta["segment_ids"], scaler, timestamps)
+
+    def store(self, key: str, features: FeatureSet, source_path: Path | str) -> Path:
+        """
+        Persist *features* under *key*.  Files are written to a temporary
+        sibling directory and renamed into place, so a crashed run never
+        leaves a half-written entry that a later run would treat as a hit.
+        """
+        self.root.mkdir(parents=True, exist_ok=True)
+        entry = self.path_for(key)
+        tmp = Path(tempfile.mkdtemp(prefix=f".{key}-", dir=self.root))
+        try:
+            np.save(tmp / "scaled.npy", np.ascontiguousarray(features.scaled, dtype=np.float32))
+            np.save(tmp / "offsets.npy", np.asarray(features.offsets, dtype=np.int64))
+            np.save(tmp / "timestamps.npy", np.asarray(features.timestamps, dtype="datetime64[ns]"))
+            np.savez(tmp / "scaler.npz", min=features.scaler.min_vals, max=features.scaler.max_vals)
+            meta = {
+                "key": key,
+                "source": str(source_path),
+                "created": datetime.now().isoformat(timespec="seconds"),
+                "feature_cols": FEATURE_COLS,
+                "input_window": INPUT_WINDOW,
+                "forecast_horizon": FORECAST_HORIZON,
+                "rows": int(features.scaled.shape[0]),
+                "segment_ids": list(features.segment_ids),
+            }
+            (tmp / "meta.json").write_text(json.dumps(meta, indent=2))
+
+            if entry.exists():
+                shutil.rmtree(entry)
+            os.replace(tmp, entry)
+        finally:
+            if tmp.exists():
+                shutil.rmtree(tmp, ignore_errors=True)
+        return entry
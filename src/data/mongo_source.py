@@ -0,0 +1,208 @@
+"""
+Stream training data straight from the ``traffic_readings`` collection.
+
+Exporting Mongo to CSV before every training run doubles the I/O.  This
+source reads each road with one index-ordered aggregation on
+(road_id, timestamp) and builds the same :class:`FeatureSet` that the CSV
+path produces, so windowing and training are unchanged.
+
+Per road
+────────
+1. ``$match`` road_id → ``$sort`` timestamp (served by ``road_time_idx``).
+2. ``$project`` every needed field into one array ``v`` of doubles (a
+   missing value becomes NaN) plus the timestamp ``t`` — every document
+   then has the same byte layout.
+3. Raw BSON batches (``aggregate_raw_batches``) are viewed as a 2-D
+   ``uint8`` array, one row per document, and ``t`` / ``v`` are sliced out
+   at their fixed offsets — no Python object per document or field.  A
+   batch that doesn't match the layout falls back to ``bson.decode_all``.
+
+Several roads are read concurrently over Motor, each turned into its
+feature block as it completes while the scaler's min / max are updated.
+Scaling and windowing need the min / max of every road, so they start once
+all roads have been read.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from typing import List, Optional, Tuple
+
+import bson
+import numpy as np
+from bson.codec_options import CodecOptions, DatetimeConversion
+from motor.motor_asyncio import AsyncIOMotorCollection
+
+from src.config import (
+    FEATURE_COLS,
+    NUM_FEATURES,
+    MONGO_STREAM_BATCH,
+    MONGO_STREAM_CONCURRENCY,
+)
+from src.data.preprocessor import (
+    FeatureSet,
+    RAW_FEATURE_COLS,
+    TrafficScaler,
+    prepare_inference_arrays,
+)
+
+# Order of values inside the projected ``v`` array
+STREAM_FIELDS = ["hour", "day_of_week", *RAW_FEATURE_COLS]
+
+_CODEC = CodecOptions(datetime_conversion=DatetimeConversion.DATETIME_MS)
+
+
+def road_pipeline(road_id: str) -> list:
+    """Aggregation that streams one road, chronologically, as (t, v) pairs."""
+    return [
+        {"$match": {"road_id": road_id}},
+        {"$sort": {"timestamp": 1}},
+        {"$project": {
+            "_id": 0,
+            "t": "$timestamp",
+            "v": [{"$ifNull": [{"$toDouble": f"${f}"}, float("nan")]} for f in STREAM_FIELDS],
+        }},
+    ]
+
+
+def _fixed_layout(n_values: int) -> Tuple[int, int, np.ndarray, np.ndarray]:
+    """
+    Byte layout of ``{t: <date>, v: [<double> × n_values]}``: (document
+    length, offset of t, offsets of the v values, offsets of every element
+    type byte).
+    """
+    pos = 4                                   # int32 document length
+    type_offsets = [pos]
+    t_offset = pos + 3                        # 0x09 "t\0"
+    pos += 3 + 8
+    type_offsets.append(pos)
+    pos += 3 + 4                              # 0x04 "v\0", int32 array length
+    v_offsets = []
+    for i in range(n_values):
+        type_offsets.append(pos)              # 0x01 "<i>\0"
+        pos += 1 + len(str(i)) + 1
+        v_offsets.append(pos)
+        pos += 8
+    pos += 2                                  # array and document terminators
+    return pos, t_offset, np.array(v_offsets), np.array(type_offsets)
+
+
+_DOC_LEN, _T_OFFSET, _V_OFFSETS, _TYPE_OFFSETS = _fixed_layout(len(STREAM_FIELDS))
+_TYPE_BYTES = np.array([0x09, 0x04] + [0x01] * len(STREAM_FIELDS), dtype=np.uint8)
+
+
+def decode_batch(raw: bytes) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Decode one raw BSON batch of ``{t, v}`` documents.
+
+    Returns (timestamps as int64 epoch-ms, values (n, len(STREAM_FIELDS))).
+    """
+    if len(raw) % _DOC_LEN == 0:
+        docs = np.frombuffer(raw, dtype=np.uint8).reshape(-1, _DOC_LEN)
+        lengths = np.ascontiguousarray(docs[:, :4]).view("<i4").ravel()
+        if (lengths == _DOC_LEN).all() and (docs[:, _TYPE_OFFSETS] == _TYPE_BYTES).all():
+            t = np.ascontiguousarray(docs[:, _T_OFFSET:_T_OFFSET + 8]).view("<i8").ravel()
+            v = np.ascontiguousarray(docs[:, _V_OFFSETS[:, None] + np.arange(8)]).view("<f8")
+            return t.astype(np.int64), v.reshape(len(docs), len(STREAM_FIELDS)).astype(np.float64)
+
+    # Anything else (a null timestamp, another server's encoding …)
+    docs = bson.decode_all(raw, _CODEC)
+    t = np.fromiter((int(d["t"]) for d in docs), dtype=np.int64, count=len(docs))
+    v = np.asarray([d["v"] for d in docs], dtype=np.float64).reshape(len(docs), len(STREAM_FIELDS))
+    return t, v
+
+
+async def stream_road(
+    collection: AsyncIOMotorCollection,
+    road_id: str,
+    batch_size: int = MONGO_STREAM_BATCH,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Read every reading of *road_id* → (epoch-ms timestamps, values)."""
+    cursor = collection.aggregate_raw_batches(
+        road_pipeline(road_id),
+        batchSize=batch_size,
+        hint="road_time_idx",
+    )
+    ts_parts, val_parts = [], []
+    async for raw in cursor:
+        t, v = decode_batch(raw)
+        ts_parts.append(t)
+        val_parts.append(v)
+    if not ts_parts:
+        return np.empty(0, np.int64), np.empty((0, len(STREAM_FIELDS)))
+    return np.concatenate(ts_parts), np.concatenate(val_parts)
+
+
+def _road_features(values: np.ndarray) -> np.ndarray:
+    """Un-scaled (n, F) feature block for one road, in FEATURE_COLS order."""
+    identity = TrafficScaler()
+    identity.min_vals = np.zeros(NUM_FEATURES, dtype=np.float32)
+    identity.max_vals = np.ones(NUM_FEATURES, dtype=np.float32)
+    identity._fitted = True
+
+    hour = values[:, 0].astype(np.int64)
+    dow = values[:, 1].astype(np.int64)
+    # Reuse the inference fast path (cyclic lookup tables) with an identity
+    # scaler; (1, F, n) → (n, F)
+    block = prepare_inference_arrays(values[:, 2:].astype(np.float32), hour, dow, identity)
+    return block[0].T
+
+
+async def stream_training_features(
+    collection: AsyncIOMotorCollection,
+    road_ids: Optional[List[str]] = None,
+    concurrency: int = MONGO_STREAM_CONCURRENCY,
+    batch_size: int = MONGO_STREAM_BATCH,
+) -> FeatureSet:
+    """
+    Build a :class:`FeatureSet` for *road_ids* (default: every road in the
+    collection), reading up to *concurrency* roads at once.
+    """
+    if "event_impact_score" in FEATURE_COLS:
+        raise ValueError(
+            "Event features are not stored in traffic_readings; train from CSV "
+            "when event features are enabled."
+        )
+    if road_ids is None:
+        road_ids = await collection.distinct("road_id")
+    road_ids = sorted(road_ids)   # same segment order as the CSV path
+
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+    blocks: dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+    running_min = np.full(NUM_FEATURES, np.inf, dtype=np.float32)
+    running_max = np.full(NUM_FEATURES, -np.inf, dtype=np.float32)
+
+    async def load(road_id: str) -> None:
+        nonlocal running_min, running_max
+        async with semaphore:
+            t, values = await stream_road(collection, road_id, batch_size)
+        if len(t) == 0:
+            return
+        feats = await asyncio.to_thread(_road_features, values)
+        running_min = np.minimum(running_min, feats.min(axis=0))
+        running_max = np.maximum(running_max, feats.max(axis=0))
+        blocks[road_id] = (t, feats)
+        print(f"  ✓ {road_id}: {len(t):,} readings")
+
+    await asyncio.gather(*(load(r) for r in road_ids))
+    if not blocks:
+        raise ValueError("No readings found in traffic_readings")
+
+    segment_ids = [r for r in road_ids if r in blocks]
+    lengths = [len(blocks[r][0]) for r in segment_ids]
+    offsets = np.concatenate([[0], np.cumsum(lengths)]).astype(np.int64)
+
+    scaled = np.empty((int(offsets[-1]), NUM_FEATURES), dtype=np.float32)
+    timestamps = np.empty(int(offsets[-1]), dtype="datetime64[ns]")
+    for road_id, start, end in zip(segment_ids, offsets[:-1], offsets[1:]):
+        t, feats = blocks.pop(road_id)
+        scaled[start:end] = feats
+        timestamps[start:end] = t.astype("datetime64[ms]")
+
+    scaler = TrafficScaler()
+    scaler.min_vals = running_min
+    scaler.max_vals = np.where(running_max == running_min, running_min + 1.0, running_max)
+    scaler._fitted = True
+    scaler.transform_inplace(scaled)
+
+    return FeatureSet(scaled, offsets, segment_ids, scaler, timestamps)
@@ -16,11 +16,14 @@ to disk via joblib).
 
 from __future__ import annotations
 
+import asyncio
+
 import numpy as np
 import pandas as pd
 import joblib
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Tuple, List, Dict, Any
+from typing import Tuple, List, Dict, Any, Optional
 from datetime import datetime, timedelta
 
 from src.config import (
@@ -29,9 +32,12 @@ from src.config import (
     TARGET_IDX,
     INPUT_WINDOW,
     FORECAST_HORIZON,
+    NUM_FEATURES,
     SCALER_PATH,
+    EVENT_FETCH_CONCURRENCY,
 )
-from src.api.events import TrafficEvent, event_manager
+from src.api.events import TrafficEvent, event_manager, location_tile
+from src.data.event_impact import EVENT_FEATURE_COLS, EventImpactMatrix, compute_event_impact
 
 
 # ─────────────────────── Feature Engineering ───────────────────────────────
@@ -52,7 +58,32 @@ def add_cyclic_features(df: pd.DataFrame) -> pd.DataFrame:
     return df
 
 
-def add_event_features(df: pd.DataFrame, events: List[TrafficEvent] = None) -> pd.DataFrame:
+# Cyclic encodings are pure functions of the integer hour / day-of-week, so
+# the array fast path reads them from these lookup tables instead of
+# calling sin/cos per row.  Values match ``add_cyclic_features`` exactly.
+CYCLIC_COLS = ("hour_sin", "hour_cos", "dow_sin", "dow_cos")
+RAW_FEATURE_COLS = [c for c in FEATURE_COLS if c not in CYCLIC_COLS]
+
+_HOURS = np.arange(24)
+_DAYS = np.arange(7)
+HOUR_TABLE = np.stack(
+    [np.sin(2 * np.pi * _HOURS / 24), np.cos(2 * np.pi * _HOURS / 24)], axis=1
+).astype(np.float32)                                   # (24, 2)
+DOW_TABLE = np.stack(
+    [np.sin(2 * np.pi * _DAYS / 7), np.cos(2 * np.pi * _DAYS / 7)], axis=1
+).astype(np.float32)                                   # (7, 2)
+
+_RAW_IDX = [FEATURE_COLS.index(c) for c in RAW_FEATURE_COLS]
+_HOUR_IDX = [FEATURE_COLS.index("hour_sin"), FEATURE_COLS.index("hour_cos")]
+_DOW_IDX = [FEATURE_COLS.index("dow_sin"), FEATURE_COLS.index("dow_cos")]
+
+
+def add_event_features(
+    df: pd.DataFrame,
+    events: List[TrafficEvent] = None,
+    impact: Optional[EventImpactMatrix] = None,
+    segment_col: str = "road_id",
+) -> pd.DataFrame:
     """
     Add event-based features that could impact traffic congestion.
 
@@ -63,12 +94,19 @@ def add_event_features(df: pd.DataFrame, events: List[TrafficEvent] = None) -> p
     - event_density: Number of events within 10km
     - high_impact_event: Binary flag for high-impact events (concerts, sports, festivals)
 
+    Values are gathered from a segments × hours :class:`EventImpactMatrix`
+    (see ``src/data/event_impact.py``) — *impact* if given, else one built
+    from *events* over the rows' segments and time range.
+
     Parameters
     ----------
     df : pd.DataFrame
-        Traffic data with latitude, longitude, timestamp columns
+        Traffic data with segment, latitude/longitude (or lat/lon) and
+        timestamp columns
     events : List[TrafficEvent], optional
-        Pre-fetched events. If None, will fetch events for each location.
+        Pre-fetched events.  Without events or *impact* the features are 0.
+    impact : EventImpactMatrix, optional
+        Precomputed matrix (the API's, rebuilt on every event refresh).
 
     Returns
     -------
@@ -76,120 +114,26 @@ def add_event_features(df: pd.DataFrame, events: List[TrafficEvent] = None) -> p
         DataFrame with additional event features
     """
     df = df.copy()
+    timestamps = pd.to_datetime(df["timestamp"]).to_numpy(dtype="datetime64[ns]")
+
+    if impact is None:
+        if events is None:
+            # In production, events should be pre-fetched and passed in
+            print("⚠️ No events provided - using placeholder event features")
+            events = []
+        lat_col, lon_col = ("latitude", "longitude") if "latitude" in df else ("lat", "lon")
+        coords = df.groupby(segment_col, sort=False)[[lat_col, lon_col]].first()
+        impact = compute_event_impact(
+            coords.index.tolist(), coords[lat_col].to_numpy(), coords[lon_col].to_numpy(),
+            events, timestamps.min(), timestamps.max(),
+        )
 
-    # Initialize event features
-    df["event_impact_score"] = 0.0
-    df["concert_nearby"] = 0
-    df["sports_nearby"] = 0
-    df["event_density"] = 0
-    df["high_impact_event"] = 0
-
-    if events is None:
-        # If no events provided, we'll add placeholder features
-        # In production, events should be pre-fetched and passed in
-        logger.warning("No events provided - using placeholder event features")
-        return df
-
-    # Process each row to calculate event impacts
-    for idx, row in df.iterrows():
-        lat, lon = row["latitude"], row["longitude"]
-        timestamp = row["timestamp"]
-
-        # Find events near this location and time
-        nearby_events = []
-        for event in events:
-            # Calculate distance
-            distance = _calculate_distance(lat, lon, event.latitude, event.longitude)
-
-            # Check if event is active at this time
-            if event.start_time <= timestamp:
-                if event.end_time is None or event.end_time >= timestamp:
-                    time_active = True
-                else:
-                    time_active = False
-            else:
-                time_active = False
-
-            if distance <= 10.0 and time_active:  # Within 10km and currently active
-                nearby_events.append((event, distance))
-
-        # Calculate features
-        impact_score = 0.0
-        concert_flag = 0
-        sports_flag = 0
-        density = len(nearby_events)
-        high_impact = 0
-
-        for event, distance in nearby_events:
-            # Impact decreases with distance
-            distance_factor = max(0, 1 - (distance / 10.0))  # 1 at 0km, 0 at 10km
-
-            # Event type impact
-            type_impact = _get_event_type_impact(event.event_type)
-
-            # Size/capacity impact
-            size_impact = 1.0
-            if event.expected_attendance:
-                size_impact = min(event.expected_attendance / 1000, 5.0)  # Cap at 5x for 5000+ attendees
-            elif event.venue_capacity:
-                size_impact = min(event.venue_capacity / 1000, 5.0)
-
-            event_impact = type_impact * distance_factor * size_impact
-            impact_score += event_impact
-
-            # Set flags
-            if event.event_type == "concert" and distance <= 5.0:
-                concert_flag = 1
-            if event.event_type == "sports" and distance <= 5.0:
-                sports_flag = 1
-            if event.event_type in ["concert", "sports", "festival"] and distance <= 5.0:
-                high_impact = 1
-
-        # Cap impact score
-        impact_score = min(impact_score, 10.0)
-
-        # Update dataframe
-        df.at[idx, "event_impact_score"] = impact_score
-        df.at[idx, "concert_nearby"] = concert_flag
-        df.at[idx, "sports_nearby"] = sports_flag
-        df.at[idx, "event_density"] = density
-        df.at[idx, "high_impact_event"] = high_impact
-
+    values = impact.gather(df[segment_col].tolist(), timestamps)
+    for i, col in enumerate(EVENT_FEATURE_COLS):
+        df[col] = values[:, i] if col == "event_impact_score" else values[:, i].astype(np.int64)
     return df
 
 
-def _calculate_distance(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
-    """Calculate distance between two points in km using Haversine formula."""
-    from math import radians, sin, cos, sqrt, atan2
-
-    R = 6371  # Earth's radius in km
-
-    dlat = radians(lat2 - lat1)
-    dlon = radians(lon2 - lon1)
-
-    a = sin(dlat/2) * sin(dlat/2) + cos(radians(lat1)) * cos(radians(lat2)) * sin(dlon/2) * sin(dlon/2)
-    c = 2 * atan2(sqrt(a), sqrt(1-a))
-
-    return R * c
-
-
-def _get_event_type_impact(event_type: str) -> float:
-    """Get impact multiplier for different event types."""
-    impact_map = {
-        "concert": 3.0,
-        "sports": 2.5,
-        "festival": 2.0,
-        "event": 1.5,
-        "entertainment": 1.2,
-        "shopping": 0.8,
-        "business": 0.6,
-        "tourism": 0.7,
-        "transport": 1.0,
-        "other": 0.5,
-    }
-    return impact_map.get(event_type, 0.5)
-
-
 # ─────────────────────── Scaler (Min-Max) ─────────────────────────────────
 
 class TrafficScaler:
@@ -230,6 +174,16 @@ class TrafficScaler:
     def fit_transform(self, data: np.ndarray) -> np.ndarray:
         return self.fit(data).transform(data)
 
+    def transform_inplace(self, data: np.ndarray) -> np.ndarray:
+        """
+        Scale *data* (..., F) to [0, 1] without allocating a new array.
+        *data* may be a non-contiguous view; returns the same object.
+        """
+        assert self._fitted, "Call .fit() first"
+        np.subtract(data, self.min_vals, out=data)
+        np.divide(data, self.max_vals - self.min_vals, out=data)
+        return data
+
     def inverse_transform_target(self, scaled: np.ndarray) -> np.ndarray:
         """
         Inverse-scale the **target column only** (congestion_level)
@@ -329,33 +283,49 @@ def create_sequences(
 
 # ────────────────── Full DataFrame → Training Arrays ──────────────────────
 
-def prepare_training_data(
+@dataclass
+class FeatureSet:
+    """
+    Sorted, scaled feature matrix for every segment in a dataset.
+
+    Rows of segment *i* live in ``scaled[offsets[i] : offsets[i + 1]]``,
+    in chronological order.  This is everything the window generator
+    needs, and exactly what the feature cache persists.
+    """
+    scaled: np.ndarray          # (N, F) float32
+    offsets: np.ndarray         # (S + 1,) int64 segment boundaries
+    segment_ids: List[str]      # (S,) segment ids, same order as offsets
+    scaler: TrafficScaler
+    timestamps: np.ndarray      # (N,) datetime64[ns], naive UTC
+
+
+def build_feature_matrix(
     df: pd.DataFrame,
     segment_col: str = "road_id",
-) -> Tuple[np.ndarray, np.ndarray, TrafficScaler]:
+) -> FeatureSet:
     """
-    End-to-end pipeline:
+    Feature-engineering half of the training pipeline:
     1. Add cyclic features.
-    2. **NEW**: Fetch and add event-based features.
+    2. Fetch and add event-based features (if enabled in FEATURE_COLS).
     3. Sort by segment + timestamp.
     4. Fit scaler on ALL data.
-    5. Build sliding-window pairs **per segment** (avoids cross-segment leakage).
 
-    Returns (X, Y, scaler).
+    Returns a :class:`FeatureSet`; turn it into (X, Y) pairs with
+    :func:`create_segment_windows`.
     """
     df = add_cyclic_features(df)
 
     # Fetch events for all locations in the dataset
     if "event_impact_score" in FEATURE_COLS:
         print("🔍 Fetching event data for traffic impact analysis...")
-        import asyncio
         try:
             events = asyncio.run(_fetch_events_for_dataset(df))
-            df = add_event_features(df, events)
+            # One segments × hours matrix for the dataset, gathered per row
+            df = add_event_features(df, events, segment_col=segment_col)
             print(f"📊 Added event features for {len(events)} events")
         except Exception as e:
             print(f"⚠️ Failed to fetch events: {e}. Using placeholder features.")
-            df = add_event_features(df, [])
+            df = add_event_features(df, [], segment_col=segment_col)
     else:
         print("ℹ️ Event features disabled (not in FEATURE_COLS)")
 
@@ -365,61 +335,210 @@ def prepare_training_data(
     # Extract feature matrix and fit scaler globally
     feature_matrix = df[FEATURE_COLS].values.astype(np.float32)
     scaler = TrafficScaler()
-    scaled = scaler.fit_transform(feature_matrix)
+    scaled = scaler.fit_transform(feature_matrix).astype(np.float32, copy=False)
 
-    # Build windows per segment to prevent cross-segment data leakage
-    all_X, all_Y = [], []
-    for _, grp in df.groupby(segment_col):
-        idx = grp.index.values
-        seg_data = scaled[idx]
-        if len(seg_data) < INPUT_WINDOW + FORECAST_HORIZON:
-            continue
-        x, y = create_sequences(seg_data)
-        all_X.append(x)
-        all_Y.append(y)
+    # Rows are sorted by segment, so each segment is one contiguous block
+    segments = df[segment_col].values
+    starts = np.flatnonzero(np.r_[True, segments[1:] != segments[:-1]])
+    offsets = np.append(starts, len(df)).astype(np.int64)
+    segment_ids = [str(s) for s in segments[starts]]
 
-    X = np.concatenate(all_X, axis=0)
-    Y = np.concatenate(all_Y, axis=0)
+    ts = pd.to_datetime(df["timestamp"])
+    if ts.dt.tz is not None:
+        ts = ts.dt.tz_convert("UTC").dt.tz_localize(None)
+    timestamps = ts.to_numpy(dtype="datetime64[ns]")
 
-    scaler.save()
-    return X, Y, scaler
+    return FeatureSet(scaled, offsets, segment_ids, scaler, timestamps)
 
 
-async def _fetch_events_for_dataset(df: pd.DataFrame) -> List[TrafficEvent]:
+def create_segment_windows(
+    scaled: np.ndarray,
+    offsets: np.ndarray,
+    workers: int = 0,
+) -> Tuple[np.ndarray, np.ndarray]:
     """
-    Fetch events for all unique locations in the dataset.
-    Uses caching to avoid duplicate API calls for similar locations.
+    Build sliding-window pairs **per segment** (avoids cross-segment
+    leakage).  Segments shorter than one full window are skipped.
+
+    The output is preallocated from the per-segment lengths and each
+    segment writes into its own slice, so there is no concatenate-and-copy
+    at the end.  With ``workers > 1`` the segments are partitioned across a
+    process pool that writes into a shared memory-mapped output; sample
+    order is fixed by *offsets*, so results are identical to the serial
+    path.
     """
-    # Get unique locations (rounded to ~1km precision to group nearby points)
-    unique_locations = df.drop_duplicates(subset=["latitude", "longitude"])
-    unique_locations = unique_locations.assign(
-        lat_rounded=unique_locations["latitude"].round(2),
-        lon_rounded=unique_locations["longitude"].round(2)
-    ).drop_duplicates(subset=["lat_rounded", "lon_rounded"])
-
-    all_events = []
-    location_cache = {}
-
-    for _, row in unique_locations.iterrows():
-        lat, lon = row["latitude"], row["longitude"]
-        cache_key = f"{lat:.2f}_{lon:.2f}"
-
-        if cache_key in location_cache:
-            events = location_cache[cache_key]
+    total_window = INPUT_WINDOW + FORECAST_HORIZON
+    lengths = np.diff(offsets)
+    counts = np.where(lengths >= total_window, lengths - total_window + 1, 0)
+    out_offsets = np.concatenate([[0], np.cumsum(counts)]).astype(np.int64)
+    num_samples = int(out_offsets[-1])
+    if num_samples == 0:
+        raise ValueError(f"No segment has at least {total_window} rows")
+
+    tasks = [
+        (int(offsets[i]), int(offsets[i + 1]), int(out_offsets[i]))
+        for i in np.flatnonzero(counts)
+    ]
+    F = scaled.shape[1]
+
+    if workers <= 1:
+        X = np.empty((num_samples, F, INPUT_WINDOW), dtype=np.float32)
+        Y = np.empty((num_samples, FORECAST_HORIZON), dtype=np.float32)
+        for seg_start, seg_end, out_start in tasks:
+            _fill_windows(scaled[seg_start:seg_end], X, Y, out_start)
+        return X, Y
+
+    return _create_segment_windows_parallel(scaled, tasks, num_samples, workers)
+
+
+def windows_at(scaled: np.ndarray, starts: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Materialise the windows beginning at the given global row indices of
+    *scaled*.  Callers must only pass starts whose full window lies inside
+    one segment (see :func:`segment_window_starts`).
+    """
+    from numpy.lib.stride_tricks import sliding_window_view
+
+    X = sliding_window_view(scaled, INPUT_WINDOW, axis=0)[starts]
+    Y = sliding_window_view(scaled[INPUT_WINDOW:, TARGET_IDX], FORECAST_HORIZON)[starts]
+    return X.astype(np.float32, copy=False), Y.astype(np.float32, copy=False)
+
+
+def segment_window_starts(offsets: np.ndarray) -> np.ndarray:
+    """Global row index of every valid window start, in segment order."""
+    total_window = INPUT_WINDOW + FORECAST_HORIZON
+    return np.concatenate([
+        np.arange(start, end - total_window + 1)
+        for start, end in zip(offsets[:-1], offsets[1:])
+    ] + [np.empty(0, dtype=np.int64)]).astype(np.int64)
+
+
+def _fill_windows(
+    seg_data: np.ndarray,
+    X: np.ndarray,
+    Y: np.ndarray,
+    out_start: int,
+) -> None:
+    """Vectorised :func:`create_sequences` writing into X/Y at *out_start*."""
+    from numpy.lib.stride_tricks import sliding_window_view
+
+    n = len(seg_data) - INPUT_WINDOW - FORECAST_HORIZON + 1
+    # (len - W + 1, F, W): window i holds seg_data[i : i + W].T
+    X[out_start : out_start + n] = sliding_window_view(seg_data, INPUT_WINDOW, axis=0)[:n]
+    Y[out_start : out_start + n] = sliding_window_view(
+        seg_data[INPUT_WINDOW:, TARGET_IDX], FORECAST_HORIZON
+    )[:n]
+
+
+def _window_worker(
+    in_path: str,
+    x_path: str,
+    y_path: str,
+    tasks: List[Tuple[int, int, int]],
+) -> int:
+    """Process-pool entry point: fill the windows for a run of segments."""
+    scaled = np.load(in_path, mmap_mode="r")
+    X = np.load(x_path, mmap_mode="r+")
+    Y = np.load(y_path, mmap_mode="r+")
+    for seg_start, seg_end, out_start in tasks:
+        _fill_windows(scaled[seg_start:seg_end], X, Y, out_start)
+    X.flush()
+    Y.flush()
+    return len(tasks)
+
+
+def _create_segment_windows_parallel(
+    scaled: np.ndarray,
+    tasks: List[Tuple[int, int, int]],
+    num_samples: int,
+    workers: int,
+) -> Tuple[np.ndarray, np.ndarray]:
+    import shutil
+    import tempfile
+    from concurrent.futures import ProcessPoolExecutor
+    from numpy.lib.format import open_memmap
+
+    tmp_dir = Path(tempfile.mkdtemp(prefix="tcn-windows-"))
+    try:
+        # Workers map the input by path; reuse the feature-cache file if
+        # the matrix is already memory-mapped, otherwise spill it once.
+        import mmap
+        if (isinstance(scaled, np.memmap) and isinstance(scaled.base, mmap.mmap)
+                and str(scaled.filename).endswith(".npy")):
+            in_path = str(scaled.filename)
         else:
+            in_path = str(tmp_dir / "scaled.npy")
+            np.save(in_path, np.ascontiguousarray(scaled, dtype=np.float32))
+
+        F = scaled.shape[1]
+        x_path, y_path = str(tmp_dir / "X.npy"), str(tmp_dir / "Y.npy")
+        X = open_memmap(x_path, mode="w+", dtype=np.float32, shape=(num_samples, F, INPUT_WINDOW))
+        Y = open_memmap(y_path, mode="w+", dtype=np.float32, shape=(num_samples, FORECAST_HORIZON))
+
+        # Contiguous runs of segments, a few per worker for load balancing
+        chunks = [c.tolist() for c in np.array_split(np.array(tasks), workers * 4) if len(c)]
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            list(pool.map(_window_worker, [in_path] * len(chunks), [x_path] * len(chunks),
+                          [y_path] * len(chunks), chunks))
+    finally:
+        # The parent's mappings stay valid after the files are unlinked
+        # (POSIX); on platforms that refuse, leave them for the OS temp reaper.
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    return X, Y
+
+
+def prepare_training_data(
+    df: pd.DataFrame,
+    segment_col: str = "road_id",
+    workers: int = 0,
+) -> Tuple[np.ndarray, np.ndarray, TrafficScaler]:
+    """
+    End-to-end pipeline: :func:`build_feature_matrix` followed by
+    :func:`create_segment_windows`.  Persists the fitted scaler.
+
+    Returns (X, Y, scaler).
+    """
+    features = build_feature_matrix(df, segment_col)
+    X, Y = create_segment_windows(features.scaled, features.offsets, workers)
+
+    features.scaler.save()
+    return X, Y, features.scaler
+
+
+async def _fetch_events_for_dataset(
+    df: pd.DataFrame,
+    concurrency: int = EVENT_FETCH_CONCURRENCY,
+) -> List[TrafficEvent]:
+    """
+    Fetch events for all unique location tiles in the dataset.
+
+    Locations are deduplicated to ~1 km tiles and fetched concurrently
+    (at most *concurrency* in flight).  Each tile goes through the on-disk
+    event cache, so repeated training runs reuse the results.
+    """
+    tiles = {
+        location_tile(lat, lon)
+        for lat, lon in df[["latitude", "longitude"]].drop_duplicates().itertuples(index=False)
+    }
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    async def fetch_tile(lat: float, lon: float) -> List[TrafficEvent]:
+        async with semaphore:
             try:
-                # Fetch events for this location
-                events = await event_manager.get_events_near_location(lat, lon, radius_km=15)
-                location_cache[cache_key] = events
-                print(f"📍 Found {len(events)} events near ({lat:.4f}, {lon:.4f})")
+                events = await event_manager.get_events_for_tile(lat, lon, radius_km=15)
+                print(f"📍 Found {len(events)} events near ({lat:.2f}, {lon:.2f})")
+                return events
             except Exception as e:
-                print(f"⚠️ Failed to fetch events for location ({lat:.4f}, {lon:.4f}): {e}")
-                events = []
+                print(f"⚠️ Failed to fetch events for location ({lat:.2f}, {lon:.2f}): {e}")
+                return []
 
-        all_events.extend(events)
+    # One pooled session per API client for the whole run
+    async with event_manager:
+        results = await asyncio.gather(*(fetch_tile(lat, lon) for lat, lon in sorted(tiles)))
 
     # Remove duplicates
-    unique_events = {event.event_id: event for event in all_events}
+    unique_events = {event.event_id: event for events in results for event in events}
     return list(unique_events.values())
 
 
@@ -429,10 +548,11 @@ def prepare_inference_segment(
     rows: pd.DataFrame,
     scaler: TrafficScaler,
     events: List[TrafficEvent] = None,
+    impact: Optional[EventImpactMatrix] = None,
 ) -> np.ndarray:
     """
     Given exactly 24 rows of raw (un-scaled) data for one segment,
-    return a model-ready tensor of shape (1, 24, F).
+    return a model-ready tensor of shape (1, F, 24).
 
     Parameters
     ----------
@@ -442,10 +562,66 @@ def prepare_inference_segment(
         Fitted scaler
     events : List[TrafficEvent], optional
         Events to consider for impact calculation
+    impact : EventImpactMatrix, optional
+        Precomputed event features to gather from instead of *events*
     """
+    if "event_impact_score" not in FEATURE_COLS:
+        # No per-row event features → skip the DataFrame round-trip
+        return prepare_inference_arrays(
+            rows[RAW_FEATURE_COLS].to_numpy(dtype=np.float32),
+            rows["hour"].to_numpy(),
+            rows["day_of_week"].to_numpy(),
+            scaler,
+        )
+
     rows = add_cyclic_features(rows)
-    if "event_impact_score" in FEATURE_COLS:
-        rows = add_event_features(rows, events)
+    rows = add_event_features(rows, events, impact)
     feature_matrix = rows[FEATURE_COLS].values.astype(np.float32)
     scaled = scaler.transform(feature_matrix)     # (24, F)
     return scaled.T[np.newaxis, ...]              # (1, F, 24)
+
+
+def prepare_inference_arrays(
+    raw: np.ndarray,
+    hour: np.ndarray,
+    dow: np.ndarray,
+    scaler: TrafficScaler,
+    out: np.ndarray | None = None,
+) -> np.ndarray:
+    """
+    ndarray-in / ndarray-out equivalent of :func:`prepare_inference_segment`
+    for the serving hot path — no pandas involved.
+
+    Parameters
+    ----------
+    raw : ndarray (24, k) or (B, 24, k)
+        Un-scaled numeric features in ``RAW_FEATURE_COLS`` order.
+    hour, dow : int ndarray (24,) or (B, 24)
+        Hour of day (0-23) and day of week (0-6) of each row.
+    scaler : TrafficScaler
+        Fitted scaler.
+    out : ndarray (B, F, 24), optional
+        Preallocated float32 buffer to fill; allocated if omitted.
+
+    Returns
+    -------
+    ndarray (B, F, 24) — channel-first, B = 1 for a single segment.
+    """
+    raw = np.asarray(raw)
+    if raw.ndim == 2:
+        raw, hour, dow = raw[np.newaxis], np.asarray(hour)[np.newaxis], np.asarray(dow)[np.newaxis]
+    batch, length, k = raw.shape
+    if k != len(RAW_FEATURE_COLS):
+        raise ValueError(f"Expected {len(RAW_FEATURE_COLS)} raw feature columns, got {k}")
+
+    if out is None:
+        out = np.empty((batch, NUM_FEATURES, length), dtype=np.float32)
+    elif out.shape != (batch, NUM_FEATURES, length):
+        raise ValueError(f"out has shape {out.shape}, expected {(batch, NUM_FEATURES, length)}")
+
+    rows = out.transpose(0, 2, 1)                 # (B, 24, F) view into out
+    rows[..., _RAW_IDX] = raw
+    rows[..., _HOUR_IDX] = HOUR_TABLE[hour]
+    rows[..., _DOW_IDX] = DOW_TABLE[dow]
+    scaler.transform_inplace(rows)
+    return out
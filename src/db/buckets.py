@@ -0,0 +1,273 @@
+"""
+Bucketed time-series layout for traffic readings.
+
+The per-reading layout in ``traffic_readings`` stores one document per road
+per hour and repeats the segment metadata (road_name, segment_name, lat,
+lon, road_class) plus long field names in every one of them.  A 24-hour
+history therefore costs 24 index keys and 24 document fetches.
+
+``traffic_buckets`` instead holds **one document per road per UTC day**:
+
+    {
+      "r":  "AIR_1",                        # road_id
+      "d":  ISODate("2024-02-07"),          # bucket day (UTC midnight)
+      "n":  24,                             # readings in the bucket
+      "t0": ISODate(...), "t1": ISODate(...),   # first / last timestamp
+      "o":  [780, 840, ...],                # minutes after "d"
+      "cl": [0.5779, 0.5472, ...],          # one parallel array per metric
+      ...
+      "s":  {"cl": {"mn": 0.41, "mx": 0.83}, ...}   # per-bucket min / max
+    }
+
+Segment metadata lives only in ``road_segments``.  Buckets are keyed by
+the unique (r, d) index, so a 24-hour history is one or two document reads
+and re-ingesting a day merges into its bucket (:func:`merge_bucket_docs`)
+instead of duplicating — or dropping — readings.
+
+Reading search (``POST /api/search``) pages on the (timestamp, _id) of
+individual readings and is only available in the document layout.
+"""
+
+from __future__ import annotations
+
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from motor.motor_asyncio import AsyncIOMotorCollection
+from pymongo import ReplaceOne
+
+# Long (CSV / traffic_readings) name → compact bucket field name
+BUCKET_FIELDS = {
+    "hour": "h",
+    "day_of_week": "w",
+    "is_weekend": "we",
+    "month": "mo",
+    "hourly_speed_kph": "hs",
+    "avg_speed_kph": "as",
+    "travel_time_s": "tt",
+    "free_flow_speed_kph": "fs",
+    "free_flow_travel_time_s": "ft",
+    "delay_ratio": "dr",
+    "congestion_level": "cl",
+    "congestion_band": "cb",
+    "accident_hotspot_score": "ah",
+    "recent_incident_count": "ic",
+    "enforcement_violation_pattern": "ev",
+    "long_term_risk_prior": "lr",
+}
+
+INT_FIELDS = {"hour", "day_of_week", "is_weekend", "month", "recent_incident_count"}
+
+# Metrics that get a per-bucket min / max summary
+SUMMARY_FIELDS = [
+    "hourly_speed_kph",
+    "avg_speed_kph",
+    "travel_time_s",
+    "delay_ratio",
+    "congestion_level",
+    "recent_incident_count",
+]
+
+
+# ──────────────────────── Encode ─────────────────────────────────────────
+
+def build_bucket_docs(df: pd.DataFrame) -> List[Dict[str, Any]]:
+    """
+    Group readings into one document per (road_id, UTC day).
+
+    *df* must have naive-UTC ``timestamp`` values.  Columns missing from
+    *df* are simply left out of the buckets.
+    """
+    fields = [c for c in BUCKET_FIELDS if c in df.columns]
+    df = df.sort_values(["road_id", "timestamp"])
+    days = df["timestamp"].dt.floor("D")
+    minutes = ((df["timestamp"] - days) // pd.Timedelta(minutes=1)).to_numpy()
+
+    docs = []
+    for (road_id, day), idx in df.groupby([df["road_id"], days], sort=False).indices.items():
+        rows = df.iloc[idx]
+        doc: Dict[str, Any] = {
+            "r": road_id,
+            "d": day.to_pydatetime(),
+            "n": len(idx),
+            "t0": rows["timestamp"].iloc[0].to_pydatetime(),
+            "t1": rows["timestamp"].iloc[-1].to_pydatetime(),
+            "o": minutes[idx].tolist(),
+        }
+        summary = {}
+        for col in fields:
+            values = rows[col]
+            if col in INT_FIELDS:
+                values = values.astype("int64")
+            doc[BUCKET_FIELDS[col]] = values.tolist()
+            if col in SUMMARY_FIELDS:
+                summary[BUCKET_FIELDS[col]] = {"mn": values.min().item(), "mx": values.max().item()}
+        doc["s"] = summary
+        docs.append(doc)
+    return docs
+
+
+def merge_bucket_docs(
+    stored: List[Dict[str, Any]],
+    docs: List[Dict[str, Any]],
+) -> List[Dict[str, Any]]:
+    """
+    Fold the new *docs* into the *stored* buckets of the same (r, d): the
+    union of both sets of minute offsets, new values winning where a
+    reading is in both.  Buckets take the fields of the new doc.
+    """
+    by_key = {(s["r"], s["d"]): s for s in stored}
+    merged = []
+    for doc in docs:
+        old = by_key.get((doc["r"], doc["d"]))
+        if old is None:
+            merged.append(doc)
+            continue
+        new_rows = unpack_buckets([doc])
+        rows = pd.concat([unpack_buckets([old]), new_rows], ignore_index=True)[new_rows.columns]
+        rows = rows.drop_duplicates("timestamp", keep="last")
+        merged.extend(build_bucket_docs(rows))
+    return merged
+
+
+def bucket_write_ops(docs: List[Dict[str, Any]]) -> List[ReplaceOne]:
+    """
+    Upserts keyed on (r, d).  Each doc replaces its stored bucket, so pass
+    buckets through :func:`merge_bucket_docs` first when a day may already
+    hold readings.
+    """
+    return [ReplaceOne({"r": doc["r"], "d": doc["d"]}, doc, upsert=True) for doc in docs]
+
+
+# ──────────────────────── Decode ─────────────────────────────────────────
+
+def unpack_buckets(docs: List[Dict[str, Any]]) -> pd.DataFrame:
+    """Expand bucket documents back into one row per reading, chronologically."""
+    columns: Dict[str, list] = {"road_id": [], "timestamp": []}
+    present = [c for c in BUCKET_FIELDS if any(BUCKET_FIELDS[c] in d for d in docs)]
+    for col in present:
+        columns[col] = []
+
+    for doc in sorted(docs, key=lambda d: d["d"]):
+        n = len(doc["o"])
+        columns["road_id"].extend([doc["r"]] * n)
+        day = np.datetime64(doc["d"], "ns")
+        columns["timestamp"].extend(day + np.asarray(doc["o"], dtype="timedelta64[m]"))
+        for col in present:
+            columns[col].extend(doc.get(BUCKET_FIELDS[col], [None] * n))
+
+    df = pd.DataFrame(columns)
+    df["timestamp"] = pd.to_datetime(df["timestamp"])
+    return df.sort_values("timestamp", kind="stable").reset_index(drop=True)
+
+
+# ──────────────────────── Queries ────────────────────────────────────────
+
+def _naive_utc(ts: datetime) -> datetime:
+    """Buckets are keyed on naive-UTC days; tz-aware inputs are converted."""
+    if ts.tzinfo is not None:
+        ts = ts.astimezone(timezone.utc).replace(tzinfo=None)
+    return ts
+
+
+async def fetch_bucket_docs(
+    collection: AsyncIOMotorCollection,
+    road_id: str,
+    end_timestamp: datetime,
+    window: int,
+    projection: Optional[Dict[str, Any]] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Return the buckets holding the last *window* readings of *road_id*
+    strictly before *end_timestamp*, oldest first.  Walks buckets
+    newest-first on the (r, d) index and stops as soon as enough readings
+    are covered — normally after one or two documents.
+    """
+    end_timestamp = _naive_utc(end_timestamp)
+    end_day = datetime(end_timestamp.year, end_timestamp.month, end_timestamp.day)
+    cursor = (
+        collection.find({"r": road_id, "d": {"$lte": end_day}}, projection or {"_id": 0, "s": 0})
+        .sort("d", -1)
+        .batch_size(2)
+    )
+
+    cutoff = (end_timestamp - end_day) / timedelta(minutes=1)
+    docs, collected = [], 0
+    async for doc in cursor:
+        docs.append(doc)
+        if doc["d"] == end_day:
+            collected += sum(1 for o in doc["o"] if o < cutoff)
+        else:
+            collected += len(doc["o"])
+        if collected >= window:
+            break
+    return docs[::-1]
+
+
+async def fetch_bucket_history(
+    collection: AsyncIOMotorCollection,
+    road_id: str,
+    end_timestamp: datetime,
+    window: int,
+) -> pd.DataFrame:
+    """
+    Return up to *window* readings for *road_id* strictly before
+    *end_timestamp*, chronologically, one row per reading.
+    """
+    end_timestamp = _naive_utc(end_timestamp)
+    docs = await fetch_bucket_docs(collection, road_id, end_timestamp, window)
+    df = unpack_buckets(docs)
+    if df.empty:
+        return df
+    df = df[df["timestamp"] < end_timestamp]
+    return df.iloc[-window:].reset_index(drop=True)
+
+
+def bucket_projection(columns: List[str]) -> Dict[str, int]:
+    """Projection fetching only the bucket arrays behind *columns*."""
+    return {"_id": 0, "d": 1, "o": 1, **{BUCKET_FIELDS[c]: 1 for c in columns}}
+
+
+def bucket_arrays(
+    docs: List[Dict[str, Any]],
+    end_timestamp: datetime,
+    window: int,
+    columns: List[str],
+) -> Tuple[np.ndarray, Dict[str, np.ndarray]]:
+    """
+    Concatenate the arrays of chronologically ordered *docs* straight into
+    NumPy and keep the last *window* readings before *end_timestamp*.
+
+    Returns (timestamps datetime64[ms], {column: values}).
+    """
+    if not docs:
+        return np.empty(0, "datetime64[ms]"), {c: np.empty(0) for c in columns}
+    ts = np.concatenate([
+        np.datetime64(d["d"], "ms") + np.asarray(d["o"], dtype="timedelta64[m]") for d in docs
+    ])
+    keep = np.flatnonzero(ts < np.datetime64(_naive_utc(end_timestamp), "ms"))[-window:]
+    values = {
+        c: np.concatenate([np.asarray(d[BUCKET_FIELDS[c]]) for d in docs])[keep]
+        for c in columns
+    }
+    return ts[keep], values
+
+
+async def bucket_time_range(
+    collection: AsyncIOMotorCollection,
+    road_id: str,
+) -> Optional[Dict[str, Any]]:
+    """Earliest / latest timestamp and reading count from the bucket summaries."""
+    pipeline = [
+        {"$match": {"r": road_id}},
+        {"$group": {
+            "_id": None,
+            "earliest": {"$min": "$t0"},
+            "latest": {"$max": "$t1"},
+            "count": {"$sum": "$n"},
+        }},
+    ]
+    result = await collection.aggregate(pipeline).to_list(length=1)
+    return result[0] if result else None
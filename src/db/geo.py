@@ -0,0 +1,99 @@
+"""
+Geospatial helpers for ``road_segments``.
+
+Every segment document carries a GeoJSON point next to its plain lat / lon
+
+    {"road_id": "AIR_1", "lat": 19.0896, "lon": 72.8656,
+     "location": {"type": "Point", "coordinates": [72.8656, 19.0896]}}
+
+behind a ``2dsphere`` index, so the map can ask for the segments inside its
+viewport (``$geoWithin``) or within N km of a point (``$geoNear``) instead of
+downloading the whole city.  Note GeoJSON order: longitude first.
+"""
+
+from __future__ import annotations
+
+import math
+from typing import Any, Dict, Optional
+
+EARTH_RADIUS_KM = 6371.0088
+
+
+def geo_point(lat: Optional[float], lon: Optional[float]) -> Optional[Dict[str, Any]]:
+    """GeoJSON point for a segment, or None without coordinates."""
+    if lat is None or lon is None or math.isnan(lat) or math.isnan(lon):
+        return None
+    return {"type": "Point", "coordinates": [float(lon), float(lat)]}
+
+
+def with_location(segment: Dict[str, Any]) -> Dict[str, Any]:
+    """*segment* plus its ``location`` point (unchanged without lat / lon)."""
+    point = geo_point(segment.get("lat"), segment.get("lon"))
+    return {**segment, "location": point} if point else segment
+
+
+def bbox_polygon(min_lat: float, min_lon: float, max_lat: float, max_lon: float) -> Dict[str, Any]:
+    """Closed GeoJSON polygon for a lat / lon bounding box."""
+    ring = [
+        [min_lon, min_lat], [max_lon, min_lat], [max_lon, max_lat], [min_lon, max_lat], [min_lon, min_lat],
+    ]
+    return {"type": "Polygon", "coordinates": [ring]}
+
+
+def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Great-circle distance in km."""
+    p1, p2 = math.radians(lat1), math.radians(lat2)
+    dp, dl = p2 - p1, math.radians(lon2 - lon1)
+    a = math.sin(dp / 2) ** 2 + math.cos(p1) * math.cos(p2) * math.sin(dl / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
+
+
+def radius_bbox(lat: float, lon: float, radius_km: float) -> tuple[float, float, float, float]:
+    """(min_lat, min_lon, max_lat, max_lon) enclosing a circle — an index prefilter."""
+    dlat = math.degrees(radius_km / EARTH_RADIUS_KM)
+    dlon = math.degrees(radius_km / (EARTH_RADIUS_KM * max(math.cos(math.radians(lat)), 1e-6)))
+    return lat - dlat, lon - dlon, lat + dlat, lon + dlon
+
+
+# ──────────────────────── Geohash tiles ──────────────────────────────────
+
+_GEOHASH_ALPHABET = "0123456789bcdefghjkmnpqrstuvwxyz"
+
+
+def geohash(lat: float, lon: float, precision: int) -> str:
+    """Standard base-32 geohash of (lat, lon) with *precision* characters."""
+    lat_lo, lat_hi, lon_lo, lon_hi = -90.0, 90.0, -180.0, 180.0
+    chars, bits, ch, even = [], 0, 0, True
+    while len(chars) < precision:
+        if even:
+            mid = (lon_lo + lon_hi) / 2
+            ch = ch << 1 | (lon >= mid)
+            lon_lo, lon_hi = (mid, lon_hi) if lon >= mid else (lon_lo, mid)
+        else:
+            mid = (lat_lo + lat_hi) / 2
+            ch = ch << 1 | (lat >= mid)
+            lat_lo, lat_hi = (mid, lat_hi) if lat >= mid else (lat_lo, mid)
+        even = not even
+        bits += 1
+        if bits == 5:
+            chars.append(_GEOHASH_ALPHABET[ch])
+            bits, ch = 0, 0
+    return "".join(chars)
+
+
+def geohash_cell(code: str) -> tuple[float, float, float, float]:
+    """(center_lat, center_lon, lat_height, lon_width) of a geohash cell, in degrees."""
+    lat_lo, lat_hi, lon_lo, lon_hi = -90.0, 90.0, -180.0, 180.0
+    even = True
+    for c in code:
+        value = _GEOHASH_ALPHABET.index(c)
+        for shift in range(4, -1, -1):
+            bit = value >> shift & 1
+            if even:
+                mid = (lon_lo + lon_hi) / 2
+                lon_lo, lon_hi = (mid, lon_hi) if bit else (lon_lo, mid)
+            else:
+                mid = (lat_lo + lat_hi) / 2
+                lat_lo, lat_hi = (mid, lat_hi) if bit else (lat_lo, mid)
+            even = not even
+    return (lat_lo + lat_hi) / 2, (lon_lo + lon_hi) / 2, lat_hi - lat_lo, lon_hi - lon_lo
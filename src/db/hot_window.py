@@ -0,0 +1,204 @@
+"""
+In-process cache of the newest readings of every road.
+
+A forecast for "now" needs the last ``INPUT_WINDOW`` readings of a road,
+which are the same few rows for every request until the next reading
+lands.  :class:`HotWindowCache` keeps the newest ``HOT_WINDOW_SIZE``
+readings per road in a fixed-size columnar ring buffer (timestamps,
+hour, day-of-week and the raw feature matrix), so those requests never
+touch the database:
+
+* at startup :meth:`HotWindowCache.load` fills every ring with
+  ``TrafficStore.latest_blocks`` (on Mongo, one index-bounded read per
+  road in ``road_segments``);
+* :meth:`HotWindowCache.follow` polls ``TrafficStore.readings_since`` every
+  ``HOT_WINDOW_POLL_S`` seconds (re-reading ``HOT_WINDOW_LOOKBACK_S`` before
+  the newest cached timestamp, so readings written out of order by a bulk
+  ingest are not skipped) and appends new readings idempotently;
+* :meth:`HotWindowCache.window` answers a (road, T) lookup when at least
+  *window* cached readings precede T — a ring holds the newest readings of
+  its road, so those are exactly what the database would return.  Anything
+  else returns None and the caller falls back to the store.
+
+A reading older than the newest cached one that is not already in the ring
+(a late backfill) would leave a gap, so the road is evicted and reloaded.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from src.config import HOT_WINDOW_LOOKBACK_S, HOT_WINDOW_POLL_S, HOT_WINDOW_SIZE
+from src.data.preprocessor import RAW_FEATURE_COLS
+from src.db.storage import HistoryBlock, TrafficStore, to_ms
+
+logger = logging.getLogger(__name__)
+
+
+class RoadRing:
+    """The newest *capacity* readings of one road, oldest overwritten first."""
+
+    def __init__(self, road_id: str, capacity: int, meta: Dict[str, Any]):
+        self.road_id = road_id
+        self.capacity = capacity
+        self.meta = meta
+        self.ms = np.empty(capacity, dtype=np.int64)
+        self.raw = np.empty((capacity, len(RAW_FEATURE_COLS)), dtype=np.float32)
+        self.hour = np.empty(capacity, dtype=np.int64)
+        self.dow = np.empty(capacity, dtype=np.int64)
+        self.size = 0
+        self.pos = 0   # next slot to write
+
+    def _order(self) -> np.ndarray:
+        """Slot indices, oldest reading first."""
+        return (self.pos - self.size + np.arange(self.size)) % self.capacity
+
+    @property
+    def latest_ms(self) -> Optional[int]:
+        return int(self.ms[(self.pos - 1) % self.capacity]) if self.size else None
+
+    def append(self, block: HistoryBlock) -> bool:
+        """
+        Add chronological *block* readings.  Returns False if a reading would
+        leave a gap (older than the newest cached one and not in the ring).
+        """
+        ms = block.timestamps.astype("datetime64[ms]").astype(np.int64)
+        latest = self.latest_ms
+        if latest is not None:
+            old = ms <= latest
+            if self.size == self.capacity:
+                # Readings older than a full ring are outside it anyway
+                old &= ms >= self.ms[self.pos]
+                new = ms > latest
+            else:
+                new = ~old
+            if old.any():
+                order = self._order()
+                cached = self.ms[order]
+                at = np.searchsorted(cached, ms[old])
+                found = (at < len(cached)) & (cached[np.minimum(at, len(cached) - 1)] == ms[old])
+                if not found.all():
+                    return False
+                # Re-ingested readings replace the cached values in place
+                slots = order[at]
+                self.raw[slots] = block.raw[old]
+                self.hour[slots] = block.hour[old]
+                self.dow[slots] = block.day_of_week[old]
+        else:
+            new = np.ones(len(ms), dtype=bool)
+
+        if not new.any():
+            return True
+        take = np.flatnonzero(new)[-self.capacity:]
+        slots = (self.pos + np.arange(len(take))) % self.capacity
+        self.ms[slots] = ms[take]
+        self.raw[slots] = block.raw[take]
+        self.hour[slots] = block.hour[take]
+        self.dow[slots] = block.day_of_week[take]
+        self.pos = int((self.pos + len(take)) % self.capacity)
+        self.size = min(self.size + len(take), self.capacity)
+        return True
+
+    def window(self, end_ms: int, window: int) -> Optional[HistoryBlock]:
+        order = self._order()
+        end = int(np.searchsorted(self.ms[order], end_ms, side="left"))
+        if end < window:
+            return None
+        slots = order[end - window:end]
+        return HistoryBlock(
+            self.road_id,
+            self.ms[slots].view("datetime64[ms]"),
+            self.raw[slots],
+            self.hour[slots],
+            self.dow[slots],
+            self.meta,
+        )
+
+
+class HotWindowCache:
+    """Per-road :class:`RoadRing` buffers kept in step with the store."""
+
+    def __init__(self, capacity: int = HOT_WINDOW_SIZE, lookback_s: float = HOT_WINDOW_LOOKBACK_S):
+        self.capacity = capacity
+        self.lookback = timedelta(seconds=lookback_s)
+        self.rings: Dict[str, RoadRing] = {}
+        self.watermark: Optional[datetime] = None   # newest timestamp seen
+        self.hits = 0
+        self.misses = 0
+        self._evicted: set[str] = set()
+
+    def _apply(self, blocks: List[HistoryBlock]) -> None:
+        for block in blocks:
+            if not len(block.timestamps):
+                continue
+            ring = self.rings.get(block.road_id)
+            if ring is None:
+                if block.road_id in self._evicted:
+                    continue
+                ring = self.rings[block.road_id] = RoadRing(block.road_id, self.capacity, block.meta)
+            if not ring.append(block):
+                del self.rings[block.road_id]
+                self._evicted.add(block.road_id)
+            newest = block.timestamps[-1].astype("datetime64[ms]").astype(datetime)
+            if self.watermark is None or newest > self.watermark:
+                self.watermark = newest
+
+    async def load(self, store: TrafficStore) -> None:
+        """(Re)fill every ring with the newest readings of each road."""
+        blocks = await store.latest_blocks(self.capacity)
+        self.rings, self._evicted, self.watermark = {}, set(), None
+        self._apply(blocks)
+        logger.info("Hot-window cache loaded %d roads × %d readings", len(self.rings), self.capacity)
+
+    async def refresh(self, store: TrafficStore) -> None:
+        """Append readings newer than the watermark; reload after an eviction."""
+        if self.watermark is None:
+            await self.load(store)
+            return
+        # Re-read a lookback window: other roads' readings for the newest
+        # timestamps may still have been in flight at the last poll.
+        self._apply(await store.readings_since(self.watermark - self.lookback))
+        if self._evicted:
+            logger.info("Reloading hot-window cache after late readings for %s", sorted(self._evicted))
+            await self.load(store)
+
+    async def follow(self, store: TrafficStore, interval_s: float = HOT_WINDOW_POLL_S) -> None:
+        """Background task: :meth:`refresh` every *interval_s* seconds."""
+        while True:
+            await asyncio.sleep(interval_s)
+            try:
+                await self.refresh(store)
+            except Exception as exc:
+                logger.warning("Hot-window refresh failed: %s", exc)
+
+    def window(self, road_id: str, end_timestamp: datetime, window: int) -> Optional[HistoryBlock]:
+        """The *window* readings before *end_timestamp*, or None on a miss."""
+        ring = self.rings.get(road_id)
+        block = ring.window(to_ms(end_timestamp), window) if ring else None
+        if block is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return block
+
+    def latest(self, road_id: str) -> Optional[HistoryBlock]:
+        """The newest cached reading of *road_id* as a one-row block."""
+        ring = self.rings.get(road_id)
+        return ring.window(ring.latest_ms + 1, 1) if ring and ring.size else None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "roads": len(self.rings),
+            "capacity": self.capacity,
+            "watermark": self.watermark.isoformat() if self.watermark else None,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+hot_windows = HotWindowCache()
@@ -0,0 +1,209 @@
+"""
+Query-plan audit for the MongoDB collections.
+
+Runs ``explain`` (queryPlanner verbosity — nothing is executed) on every
+query shape the API and ingest issue and reports
+
+* the winning plan's stages and index of each shape, flagging ``COLLSCAN``
+  unless the shape reads the whole collection by design;
+* redundant indexes — a non-unique index whose key is a prefix of another
+  index on the same collection (``road_idx`` vs ``road_time_idx``);
+* indexes no known shape chooses.
+
+Run at API startup (``QUERY_AUDIT_ON_STARTUP``) and served by
+``GET /api/metrics``, or from the shell with ``python -m scripts.audit_queries``.
+"""
+
+from __future__ import annotations
+
+import logging
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorDatabase
+
+from src.config import INPUT_WINDOW, STORAGE_LAYOUT
+from src.db.geo import bbox_polygon
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class QueryShape:
+    """A representative query; *build* fills it with sample values."""
+
+    name: str
+    collection: str
+    build: Callable[[str, datetime], Dict[str, Any]]
+    full_scan_ok: bool = False   # reads the whole (small) collection by design
+
+
+def _find(collection: str, filter: Dict[str, Any], sort: Optional[Dict[str, int]] = None, limit: int = 0):
+    cmd: Dict[str, Any] = {"find": collection, "filter": filter}
+    if sort:
+        cmd["sort"] = sort
+    if limit:
+        cmd["limit"] = limit
+    return cmd
+
+
+QUERY_SHAPES: List[QueryShape] = [
+    QueryShape("history", "traffic_readings", lambda r, t: _find(
+        "traffic_readings", {"road_id": r, "timestamp": {"$lt": t}}, {"timestamp": -1}, INPUT_WINDOW)),
+    QueryShape("time_range", "traffic_readings", lambda r, t: {
+        "aggregate": "traffic_readings",
+        "pipeline": [
+            {"$match": {"road_id": r}},
+            {"$group": {"_id": None, "earliest": {"$min": "$timestamp"}, "latest": {"$max": "$timestamp"}}},
+        ],
+        "cursor": {},
+    }),
+    QueryShape("search_road_window", "traffic_readings", lambda r, t: _find(
+        "traffic_readings", {"road_id": r, "timestamp": {"$gte": t, "$lt": t}}, {"timestamp": -1, "_id": -1}, 100)),
+    QueryShape("search_road_congestion", "traffic_readings", lambda r, t: _find(
+        "traffic_readings", {"road_id": r, "congestion_level": {"$gte": 0.5}}, {"timestamp": -1, "_id": -1}, 100)),
+    QueryShape("search_congestion", "traffic_readings", lambda r, t: _find(
+        "traffic_readings", {"congestion_level": {"$gte": 0.5, "$lte": 1.0}}, {"timestamp": -1, "_id": -1}, 100)),
+    QueryShape("search_window", "traffic_readings", lambda r, t: _find(
+        "traffic_readings", {"timestamp": {"$gte": t, "$lt": t}}, {"timestamp": -1, "_id": -1}, 100)),
+    QueryShape("search_next_page", "traffic_readings", lambda r, t: _find(
+        "traffic_readings",
+        {"congestion_level": {"$gte": 0.5}, "$or": [{"timestamp": {"$lt": t}}, {"timestamp": t, "_id": {"$lt": ObjectId()}}]},
+        {"timestamp": -1, "_id": -1}, 100)),
+    QueryShape("ingest_upsert", "traffic_readings", lambda r, t: _find(
+        "traffic_readings", {"road_id": r, "timestamp": t}, limit=1)),
+    QueryShape("hourly_profile", "traffic_readings", lambda r, t: _find(
+        "traffic_readings", {"road_id": r, "timestamp": {"$gte": t, "$lt": t}})),
+    QueryShape("rollup_profile", "traffic_rollups", lambda r, t: _find(
+        "traffic_rollups", {"road_id": r, "end": {"$gt": t}, "start": {"$lt": t}})),
+    QueryShape("segments", "road_segments", lambda r, t: _find(
+        "road_segments", {}, {"road_name": 1})),
+    QueryShape("segments_bbox", "road_segments", lambda r, t: _find(
+        "road_segments", {"location": {"$geoWithin": {"$geometry": bbox_polygon(18.9, 72.8, 19.1, 72.9)}}})),
+    QueryShape("segment_meta", "road_segments", lambda r, t: _find(
+        "road_segments", {"road_id": r}, limit=1)),
+    QueryShape("segment_stats", "segment_stats", lambda r, t: _find(
+        "segment_stats", {}), full_scan_ok=True),
+]
+
+BUCKET_SHAPES: List[QueryShape] = [
+    QueryShape("bucket_history", "traffic_buckets", lambda r, t: _find(
+        "traffic_buckets", {"r": r, "d": {"$lte": t}}, {"d": -1})),
+]
+
+
+# ──────────────────────── Plan inspection ────────────────────────────────
+
+def _walk_plan(node: Any) -> Iterator[Dict[str, Any]]:
+    if isinstance(node, dict):
+        if "stage" in node:
+            yield node
+        for key, value in node.items():
+            if key != "rejectedPlans":
+                yield from _walk_plan(value)
+    elif isinstance(node, list):
+        for item in node:
+            yield from _walk_plan(item)
+
+
+def _winning_plans(explain: Any) -> Iterator[Dict[str, Any]]:
+    """Every ``winningPlan`` in an explain result (find or aggregate)."""
+    if isinstance(explain, dict):
+        for key, value in explain.items():
+            if key == "winningPlan":
+                yield value
+            elif key != "rejectedPlans":
+                yield from _winning_plans(value)
+    elif isinstance(explain, list):
+        for item in explain:
+            yield from _winning_plans(item)
+
+
+def summarize_plan(explain: Dict[str, Any]) -> Dict[str, Any]:
+    """Stages (root first) and index names of the winning plan(s)."""
+    stages, indexes = [], []
+    for plan in _winning_plans(explain):
+        for node in _walk_plan(plan):
+            stages.append(node["stage"])
+            if node.get("indexName"):
+                indexes.append(node["indexName"])
+    return {"stages": stages, "indexes": indexes, "collscan": "COLLSCAN" in stages}
+
+
+def redundant_indexes(collection: str, index_info: Dict[str, Dict[str, Any]]) -> List[Dict[str, str]]:
+    """Non-unique indexes whose key pattern is a prefix of another index."""
+    found = []
+    for name, info in index_info.items():
+        if name == "_id_" or info.get("unique") or info.get("partialFilterExpression") or "expireAfterSeconds" in info:
+            continue
+        key = list(info["key"])
+        for other, other_info in index_info.items():
+            other_key = list(other_info["key"])
+            if other != name and len(other_key) > len(key) and other_key[: len(key)] == key:
+                found.append({"collection": collection, "index": name, "covered_by": other})
+                break
+    return found
+
+
+# ──────────────────────── Audit ──────────────────────────────────────────
+
+async def _sample_values(db: AsyncIOMotorDatabase) -> tuple[str, datetime]:
+    doc = await db.traffic_readings.find_one({}, {"_id": 0, "road_id": 1, "timestamp": 1})
+    if doc:
+        return doc["road_id"], doc["timestamp"]
+    return "AIR_1", datetime(2024, 1, 1)
+
+
+async def audit_queries(db: AsyncIOMotorDatabase, layout: str = STORAGE_LAYOUT) -> Dict[str, Any]:
+    """Explain every known shape and check the indexes behind them."""
+    road_id, ts = await _sample_values(db)
+    shapes = QUERY_SHAPES + (BUCKET_SHAPES if layout == "bucket" else [])
+
+    queries, used = [], set()
+    for shape in shapes:
+        explain = await db.command({"explain": shape.build(road_id, ts), "verbosity": "queryPlanner"})
+        plan = summarize_plan(explain)
+        used.update((shape.collection, i) for i in plan["indexes"])
+        queries.append({
+            "name": shape.name,
+            "collection": shape.collection,
+            **plan,
+            "flagged": plan["collscan"] and not shape.full_scan_ok,
+        })
+
+    redundant, unused = [], []
+    for collection in sorted({s.collection for s in shapes}):
+        info = await db[collection].index_information()
+        redundant.extend(redundant_indexes(collection, info))
+        unused.extend(
+            {"collection": collection, "index": name}
+            for name, spec in info.items()
+            if name != "_id_" and not spec.get("unique") and (collection, name) not in used
+        )
+
+    report = {
+        "audited_at": datetime.utcnow().isoformat(timespec="seconds"),
+        "queries": queries,
+        "redundant_indexes": redundant,
+        "unused_indexes": unused,
+    }
+    for q in queries:
+        if q["flagged"]:
+            logger.warning("Query shape %r on %s does a COLLSCAN", q["name"], q["collection"])
+    for r in redundant:
+        logger.warning("Index %s.%s is redundant with %s", r["collection"], r["index"], r["covered_by"])
+    return report
+
+
+last_audit: Optional[Dict[str, Any]] = None
+
+
+async def run_startup_audit(db: AsyncIOMotorDatabase) -> None:
+    """Audit in the background at startup; a failure only logs."""
+    global last_audit
+    try:
+        last_audit = await audit_queries(db)
+    except Exception as exc:
+        logger.warning("Query-plan audit failed: %s", exc)
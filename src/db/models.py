@@ -16,21 +16,43 @@ an efficient index scan — exactly what the segmented search needs.
 A separate collection ``road_segments`` caches the distinct segment metadata
 (road_id, road_name, segment_name, lat, lon, road_class) so the MERN
 frontend can populate a dropdown without scanning the entire readings collection.
+Each segment also stores a GeoJSON ``location`` point behind a 2dsphere
+index for the map's viewport and radius queries (see ``src/db/geo.py``).
+
+With ``STORAGE_LAYOUT="bucket"`` readings go to ``traffic_buckets`` instead:
+one document per road per UTC day with parallel metric arrays and compact
+field names (see ``src/db/buckets.py``), keyed by a unique (r, d) index.
+
+``segment_stats`` holds one document per road (earliest, latest, count),
+maintained by ingest so time-range lookups never scan readings
+(see ``src/db/segment_stats.py``).
+
+Readings older than ``ROLLUP_DAILY_AFTER_DAYS`` are folded into daily, and
+later weekly, per-hour summaries in ``traffic_rollups`` (unique on road_id,
+tier, start) and removed from ``traffic_readings`` or moved to
+``traffic_readings_archive`` (see ``src/db/rollups.py``).
+
+Which index each query actually uses is checked by the query-plan audit in
+``src/db/index_audit.py``.
 """
 
 from __future__ import annotations
 
 from datetime import datetime
 from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorDatabase, AsyncIOMotorCollection
-from pymongo import IndexModel, ASCENDING, DESCENDING
+from pymongo import IndexModel, ASCENDING, DESCENDING, GEOSPHERE
+from pymongo.errors import OperationFailure
 from typing import Optional, List, Dict, Any
 
-from src.config import MONGODB_URL, DATABASE_NAME
+from src.config import MONGODB_URL, DATABASE_NAME, STORAGE_LAYOUT
+from src.db.geo import with_location
+from src.db.query_metrics import command_latency
 
 
 # ──────────────────────── MongoDB Connection ─────────────────────────────
 
-client: AsyncIOMotorClient = AsyncIOMotorClient(MONGODB_URL)
+# Every command is timed per query shape (see src/db/query_metrics.py)
+client: AsyncIOMotorClient = AsyncIOMotorClient(MONGODB_URL, event_listeners=[command_latency])
 db: AsyncIOMotorDatabase = client[DATABASE_NAME]
 
 
@@ -38,6 +60,10 @@ db: AsyncIOMotorDatabase = client[DATABASE_NAME]
 
 traffic_readings: AsyncIOMotorCollection = db.traffic_readings
 road_segments: AsyncIOMotorCollection = db.road_segments
+traffic_buckets: AsyncIOMotorCollection = db.traffic_buckets
+segment_stats: AsyncIOMotorCollection = db.segment_stats
+traffic_rollups: AsyncIOMotorCollection = db.traffic_rollups
+traffic_readings_archive: AsyncIOMotorCollection = db.traffic_readings_archive
 
 
 # ──────────────────────── Document Schemas ───────────────────────────────
@@ -151,14 +177,14 @@ class RoadSegment:
         return cls(**data)
 
     def to_dict(self) -> Dict[str, Any]:
-        return {
+        return with_location({
             "road_id": self.road_id,
             "road_name": self.road_name,
             "segment_name": self.segment_name,
             "lat": self.lat,
             "lon": self.lon,
             "road_class": self.road_class,
-        }
+        })
 
 
 # ──────────────────────── Database Initialization ────────────────────────
@@ -173,23 +199,80 @@ async def init_db() -> None:
         await db.create_collection("traffic_readings")
     if "road_segments" not in collections:
         await db.create_collection("road_segments")
+    if STORAGE_LAYOUT == "bucket" and "traffic_buckets" not in collections:
+        await db.create_collection("traffic_buckets")
 
     # Create indexes for traffic_readings
-    traffic_indexes = [
-        IndexModel([("road_id", ASCENDING), ("timestamp", ASCENDING)], name="road_time_idx"),
-        IndexModel([("road_id", ASCENDING)], name="road_idx"),
-        IndexModel([("timestamp", ASCENDING)], name="time_idx"),
+    # Unique: one reading per road per timestamp, so ingest can upsert
+    road_time_index = IndexModel(
+        [("road_id", ASCENDING), ("timestamp", ASCENDING)], unique=True, name="road_time_idx"
+    )
+    search_indexes = [
+        # Reading search: Equality (road_id), Sort (timestamp, _id — the
+        # keyset), Range (congestion_level, filtered on the index keys)
+        IndexModel(
+            [("road_id", ASCENDING), ("timestamp", DESCENDING), ("_id", DESCENDING), ("congestion_level", ASCENDING)],
+            name="road_time_desc_idx",
+        ),
+        IndexModel(
+            [("timestamp", DESCENDING), ("_id", DESCENDING), ("congestion_level", ASCENDING)],
+            name="time_desc_idx",
+        ),
     ]
 
+    # Superseded indexes: road_idx is a prefix of road_time_idx and
+    # road_time_desc_idx, time_idx of time_desc_idx.  Dropped (once their
+    # replacements exist) so writes stop maintaining them.
+    retired_indexes = ["road_idx", "time_idx"]
+
     # Create indexes for road_segments
     segment_indexes = [
         IndexModel([("road_id", ASCENDING)], unique=True, name="road_id_unique_idx"),
         IndexModel([("road_name", ASCENDING)], name="road_name_idx"),
+        IndexModel([("location", GEOSPHERE)], name="location_2dsphere"),
+    ]
+
+    # Create indexes for segment_stats (one document per road)
+    stats_indexes = [
+        IndexModel([("road_id", ASCENDING)], unique=True, name="road_id_unique_idx"),
+    ]
+
+    # Create indexes for traffic_rollups (one document per road per tier period)
+    rollup_indexes = [
+        IndexModel([("road_id", ASCENDING), ("tier", ASCENDING), ("start", ASCENDING)], unique=True, name="road_tier_start_idx"),
+    ]
+
+    # Create indexes for traffic_buckets (one document per road per day)
+    bucket_indexes = [
+        IndexModel([("r", ASCENDING), ("d", ASCENDING)], unique=True, name="road_day_idx"),
     ]
 
     # Apply indexes
-    await traffic_readings.create_indexes(traffic_indexes)
+    # Search indexes first and on their own, so a conflicting legacy
+    # road_time_idx cannot take them down with it
+    await traffic_readings.create_indexes(search_indexes)
+    try:
+        await traffic_readings.create_indexes([road_time_index])
+    except OperationFailure as exc:
+        # Databases created before road_time_idx became unique keep the old
+        # index; it has to be dropped (after removing duplicates) by hand.
+        if exc.code not in (85, 86):   # IndexOptionsConflict / IndexKeySpecsConflict
+            raise
+        print("⚠️ road_time_idx exists without unique=True — drop it to enable idempotent ingest")
+    existing = await traffic_readings.index_information()
+    for name in retired_indexes:
+        if name in existing:
+            await traffic_readings.drop_index(name)
+    # GeoJSON point for segments ingested before ``location`` existed
+    await road_segments.update_many(
+        {"location": {"$exists": False}, "lat": {"$type": "number"}, "lon": {"$type": "number"}},
+        [{"$set": {"location": {"type": "Point", "coordinates": ["$lon", "$lat"]}}}],
+    )
     await road_segments.create_indexes(segment_indexes)
+    await segment_stats.create_indexes(stats_indexes)
+    await traffic_rollups.create_indexes(rollup_indexes)
+    if STORAGE_LAYOUT == "bucket":
+        await traffic_buckets.create_indexes(bucket_indexes)
 
     print("✓ MongoDB collections and indexes initialized")
 
@@ -0,0 +1,419 @@
+"""
+MongoDB implementation of :class:`~src.db.storage.TrafficStore`.
+
+Reads ``traffic_readings`` (or ``traffic_buckets`` with
+``STORAGE_LAYOUT="bucket"``), ``road_segments`` and ``segment_stats``
+through the module-level Motor collections in ``src/db/models.py``.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence
+
+import bson
+import numpy as np
+import pandas as pd
+from bson import ObjectId
+from bson.codec_options import CodecOptions, DatetimeConversion
+from pymongo import ReplaceOne
+
+from src.config import STORAGE_LAYOUT
+from src.data.preprocessor import RAW_FEATURE_COLS
+from src.db import models
+from src.db.buckets import (
+    bucket_arrays,
+    bucket_projection,
+    bucket_time_range,
+    fetch_bucket_docs,
+    fetch_bucket_history,
+)
+from src.db.geo import bbox_polygon, geo_point, with_location
+from src.db.models import traffic_readings, traffic_buckets, traffic_rollups, road_segments, segment_stats
+from src.db.rollups import Summary, combine_ranges, merge_summaries, rollup_summary, rollup_time_range, summarize
+from src.db.segment_stats import segment_stats_cache
+from src.db.storage import (
+    BLOCK_COLUMNS,
+    HISTORY_META_FIELDS,
+    HistoryBlock,
+    SearchKey,
+    TrafficStore,
+    block_from_rows,
+    blocks_by_road,
+    not_enough_history,
+)
+
+# Only what inference and the response need — no _id, bands, free-flow …
+_HISTORY_PROJECTION = {
+    "_id": 0,
+    "timestamp": 1,
+    "hour": 1,
+    "day_of_week": 1,
+    **{c: 1 for c in RAW_FEATURE_COLS},
+    **{m: 1 for m in HISTORY_META_FIELDS},
+}
+_SEARCH_PROJECTION = {
+    "road_id": 1,
+    "segment_name": 1,
+    "road_name": 1,
+    "timestamp": 1,
+    "congestion_level": 1,
+    "congestion_band": 1,
+}
+_SEGMENT_PROJECTION = {"_id": 0, "location": 0}
+_HISTORY_CODEC = CodecOptions(datetime_conversion=DatetimeConversion.DATETIME_MS)
+
+
+class MongoStore(TrafficStore):
+    """Readings in MongoDB, indexed on (road_id, timestamp)."""
+
+    def __init__(self, layout: str = STORAGE_LAYOUT):
+        self.layout = layout
+
+    async def init(self) -> None:
+        await models.init_db()
+
+    async def close(self) -> None:
+        await models.close_db()
+
+    # ── History ──────────────────────────────────────────────────────────
+
+    async def fetch_history(self, road_id: str, end_timestamp: datetime, window: int) -> pd.DataFrame:
+        if self.layout == "bucket":
+            return await self._fetch_history_from_buckets(road_id, end_timestamp, window)
+
+        # Find documents with road_id and timestamp < end_timestamp
+        cursor = traffic_readings.find(
+            {
+                "road_id": road_id,
+                "timestamp": {"$lt": end_timestamp}
+            }
+        ).sort("timestamp", -1).limit(window)
+
+        documents = await cursor.to_list(length=window)
+
+        if len(documents) < window:
+            raise not_enough_history(road_id, end_timestamp, window, len(documents))
+
+        # Convert to DataFrame, sorted ascending by time
+        records = []
+        for doc in reversed(documents):  # Reverse to get chronological order
+            # Remove MongoDB _id field and convert to flat dict
+            record = {k: v for k, v in doc.items() if k != "_id"}
+            records.append(record)
+
+        return pd.DataFrame(records)
+
+    async def _fetch_history_from_buckets(
+        self,
+        road_id: str,
+        end_timestamp: datetime,
+        window: int,
+    ) -> pd.DataFrame:
+        df = await fetch_bucket_history(traffic_buckets, road_id, end_timestamp, window)
+
+        if len(df) < window:
+            raise not_enough_history(road_id, end_timestamp, window, len(df))
+
+        segment = await road_segments.find_one({"road_id": road_id}, {"_id": 0, "road_id": 0}) or {}
+        for key, value in segment.items():
+            df[key] = value
+        return df
+
+    async def fetch_history_block(self, road_id: str, end_timestamp: datetime, window: int) -> HistoryBlock:
+        """
+        A projected query whose raw BSON batches are decoded straight into
+        preallocated arrays (newest-first, filled from the back) — no
+        per-document dict filtering, list reversal or DataFrame.
+        """
+        if self.layout == "bucket":
+            return await self._fetch_block_from_buckets(road_id, end_timestamp, window)
+
+        ms = np.empty(window, dtype=np.int64)
+        raw = np.empty((window, len(RAW_FEATURE_COLS)), dtype=np.float32)
+        hour = np.empty(window, dtype=np.int64)
+        dow = np.empty(window, dtype=np.int64)
+        meta: Dict[str, Any] = {}
+
+        cursor = traffic_readings.find_raw_batches(
+            {"road_id": road_id, "timestamp": {"$lt": end_timestamp}},
+            _HISTORY_PROJECTION,
+        ).sort("timestamp", -1).limit(window)
+
+        i = window
+        async for batch in cursor:
+            for doc in bson.decode_all(batch, _HISTORY_CODEC):
+                i -= 1
+                ms[i] = int(doc["timestamp"])
+                hour[i] = doc["hour"]
+                dow[i] = doc["day_of_week"]
+                raw[i] = [doc[c] for c in RAW_FEATURE_COLS]
+                if not meta:
+                    meta = {m: doc.get(m) for m in HISTORY_META_FIELDS}
+
+        if i > 0:
+            raise not_enough_history(road_id, end_timestamp, window, window - i)
+        return HistoryBlock(road_id, ms.view("datetime64[ms]"), raw, hour, dow, meta)
+
+    async def _fetch_block_from_buckets(
+        self,
+        road_id: str,
+        end_timestamp: datetime,
+        window: int,
+    ) -> HistoryBlock:
+        columns = ["hour", "day_of_week", *RAW_FEATURE_COLS]
+        docs = await fetch_bucket_docs(
+            traffic_buckets, road_id, end_timestamp, window, bucket_projection(columns)
+        )
+        timestamps, values = bucket_arrays(docs, end_timestamp, window, columns)
+
+        if len(timestamps) < window:
+            raise not_enough_history(road_id, end_timestamp, window, len(timestamps))
+
+        raw = np.empty((window, len(RAW_FEATURE_COLS)), dtype=np.float32)
+        for j, col in enumerate(RAW_FEATURE_COLS):
+            raw[:, j] = values[col]
+        segment = await road_segments.find_one(
+            {"road_id": road_id}, {"_id": 0, **{m: 1 for m in HISTORY_META_FIELDS}}
+        ) or {}
+        return HistoryBlock(
+            road_id,
+            timestamps,
+            raw,
+            values["hour"].astype(np.int64),
+            values["day_of_week"].astype(np.int64),
+            {m: segment.get(m) for m in HISTORY_META_FIELDS},
+        )
+
+    async def _segment_meta(self) -> Dict[str, Dict[str, Any]]:
+        cursor = road_segments.find({}, {"_id": 0, "road_id": 1, **{m: 1 for m in HISTORY_META_FIELDS}})
+        return {s["road_id"]: s async for s in cursor}
+
+    async def _latest_road_block(
+        self, road_id: str, window: int, meta: Dict[str, Dict[str, Any]]
+    ) -> Optional[HistoryBlock]:
+        """Newest *window* readings of one road, read backwards on its index."""
+        if self.layout == "bucket":
+            # Enough whole days to cover *window* hourly readings
+            days = -(-window // 24) + 1
+            cursor = traffic_buckets.find({"r": road_id}, bucket_projection(BLOCK_COLUMNS)).sort("d", -1).limit(days)
+            docs = (await cursor.to_list(length=days))[::-1]
+            if not docs:
+                return None
+            ts, values = bucket_arrays(docs, datetime.max, window, BLOCK_COLUMNS)
+            rows = np.column_stack([values[c] for c in BLOCK_COLUMNS])
+            return block_from_rows(road_id, ts, rows, meta.get(road_id, {}))
+
+        cursor = traffic_readings.find({"road_id": road_id}, _HISTORY_PROJECTION).sort("timestamp", -1).limit(window)
+        docs = (await cursor.to_list(length=window))[::-1]
+        if not docs:
+            return None
+        rows = [[d[c] for c in BLOCK_COLUMNS] for d in docs]
+        return block_from_rows(road_id, [d["timestamp"] for d in docs], rows, docs[-1])
+
+    async def latest_blocks(self, window: int, road_ids: Optional[Sequence[str]] = None) -> List[HistoryBlock]:
+        # One index-bounded read per road (newest first, *window* readings)
+        # rather than grouping every road's whole history: startup loads
+        # and map viewports cost O(roads × window), not O(collection)
+        meta = await self._segment_meta() if road_ids is None or self.layout == "bucket" else {}
+        if road_ids is None:
+            road_ids = sorted(meta)
+        blocks = await asyncio.gather(*(self._latest_road_block(r, window, meta) for r in road_ids))
+        return [b for b in blocks if b is not None]
+
+    async def readings_since(self, since: datetime) -> List[HistoryBlock]:
+        if self.layout == "bucket":
+            # Buckets whose last reading is newer than *since*
+            cursor = traffic_buckets.find({"t1": {"$gt": since}}, bucket_projection(BLOCK_COLUMNS) | {"r": 1})
+            by_road: Dict[str, list] = {}
+            async for doc in cursor:
+                by_road.setdefault(doc["r"], []).append(doc)
+            meta = await self._segment_meta() if by_road else {}
+            blocks = []
+            for road_id in sorted(by_road):
+                docs = sorted(by_road[road_id], key=lambda d: d["d"])
+                ts, values = bucket_arrays(docs, datetime.max, sum(len(d["o"]) for d in docs), BLOCK_COLUMNS)
+                keep = ts > np.datetime64(since, "ms")
+                rows = np.column_stack([values[c][keep] for c in BLOCK_COLUMNS])
+                blocks.append(block_from_rows(road_id, ts[keep], rows, meta.get(road_id, {})))
+            return blocks
+
+        cursor = traffic_readings.find(
+            {"timestamp": {"$gt": since}}, {**_HISTORY_PROJECTION, "road_id": 1}
+        )
+        docs = sorted(await cursor.to_list(length=None), key=lambda d: (d["road_id"], d["timestamp"]))
+        rows = [(d["road_id"], d["timestamp"], *(d[c] for c in BLOCK_COLUMNS)) for d in docs]
+        return blocks_by_road(rows, {d["road_id"]: d for d in docs})
+
+    # ── Segments and time ranges ─────────────────────────────────────────
+
+    async def list_segments(self) -> List[Dict[str, Any]]:
+        cursor = road_segments.find({}, _SEGMENT_PROJECTION).sort("road_name", 1)
+        return await cursor.to_list(length=None)
+
+    async def segments_in_bbox(
+        self, min_lat: float, min_lon: float, max_lat: float, max_lon: float
+    ) -> List[Dict[str, Any]]:
+        cursor = road_segments.find(
+            {"location": {"$geoWithin": {"$geometry": bbox_polygon(min_lat, min_lon, max_lat, max_lon)}}},
+            _SEGMENT_PROJECTION,
+        ).sort("road_name", 1)
+        return await cursor.to_list(length=None)
+
+    async def segments_near(
+        self, lat: float, lon: float, radius_km: float, limit: int
+    ) -> List[Dict[str, Any]]:
+        pipeline = [
+            {"$geoNear": {
+                "near": geo_point(lat, lon),
+                "key": "location",
+                "spherical": True,
+                "maxDistance": radius_km * 1000,
+                "distanceField": "distance_km",
+                "distanceMultiplier": 0.001,
+            }},
+            {"$limit": limit},
+            {"$project": _SEGMENT_PROJECTION},
+        ]
+        return await road_segments.aggregate(pipeline).to_list(length=limit)
+
+    async def time_range(self, road_id: str) -> Optional[Dict[str, Any]]:
+        # Served from the in-process copy of segment_stats; the aggregation
+        # is only a fallback for roads ingested before stats existed.
+        stats = await segment_stats_cache.get(segment_stats, road_id)
+        if stats is not None:
+            return stats
+
+        if self.layout == "bucket":
+            # Summed from the per-bucket t0 / t1 / n fields — no array reads
+            doc = await bucket_time_range(traffic_buckets, road_id)
+        else:
+            pipeline = [
+                {"$match": {"road_id": road_id}},
+                {"$group": {
+                    "_id": None,
+                    "earliest": {"$min": "$timestamp"},
+                    "latest": {"$max": "$timestamp"},
+                    "count": {"$sum": 1}
+                }}
+            ]
+            result = await traffic_readings.aggregate(pipeline).to_list(length=1)
+            # Readings already folded into rollups still count
+            doc = combine_ranges(result[0] if result else None, await rollup_time_range(traffic_rollups, road_id))
+
+        return {**doc, "road_id": road_id} if doc else None
+
+    async def all_time_ranges(self) -> List[Dict[str, Any]]:
+        return await segment_stats_cache.all(segment_stats)
+
+    # ── Analytics ────────────────────────────────────────────────────────
+
+    async def hourly_profile(
+        self, road_id: str, start: Optional[datetime] = None, end: Optional[datetime] = None
+    ) -> Summary:
+        if self.layout == "bucket":
+            query: Dict[str, Any] = {"r": road_id}
+            if start is not None or end is not None:
+                query["d"] = {}
+                if start is not None:
+                    query["d"]["$gte"] = datetime(start.year, start.month, start.day)
+                if end is not None:
+                    query["d"]["$lt"] = end
+            docs = await traffic_buckets.find(query, bucket_projection(["hour", "congestion_level"])).sort("d", 1).to_list(length=None)
+            ts, values = bucket_arrays(docs, end or datetime.max, sum(len(d["o"]) for d in docs), ["hour", "congestion_level"])
+            keep = ts >= np.datetime64(start, "ms") if start is not None else slice(None)
+            return summarize(values["hour"][keep], values["congestion_level"][keep])
+
+        query = {"road_id": road_id}
+        if start is not None or end is not None:
+            query["timestamp"] = {}
+            if start is not None:
+                query["timestamp"]["$gte"] = start
+            if end is not None:
+                query["timestamp"]["$lt"] = end
+        docs = await traffic_readings.find(query, {"_id": 0, "hour": 1, "congestion_level": 1}).to_list(length=None)
+        raw = summarize([d["hour"] for d in docs], [d["congestion_level"] for d in docs])
+        return merge_summaries(raw, await rollup_summary(traffic_rollups, road_id, start, end))
+
+    # ── Search ───────────────────────────────────────────────────────────
+
+    def check_search(self) -> None:
+        # Search pages on (timestamp, _id) of individual readings, which
+        # day buckets don't have
+        if self.layout == "bucket":
+            raise ValueError("Reading search needs STORAGE_LAYOUT=document; it is not available for buckets")
+
+    def valid_search_key(self, key: str) -> bool:
+        return ObjectId.is_valid(key)
+
+    def iter_search(
+        self,
+        road_id: Optional[str] = None,
+        start_time: Optional[datetime] = None,
+        end_time: Optional[datetime] = None,
+        min_congestion: Optional[float] = None,
+        max_congestion: Optional[float] = None,
+        limit: Optional[int] = 100,
+        after: Optional[SearchKey] = None,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        self.check_search()
+        # Build MongoDB query filter
+        query_filter = {}
+
+        if road_id:
+            query_filter["road_id"] = road_id
+        if start_time:
+            query_filter["timestamp"] = query_filter.get("timestamp", {})
+            query_filter["timestamp"]["$gte"] = start_time
+        if end_time:
+            query_filter["timestamp"] = query_filter.get("timestamp", {})
+            query_filter["timestamp"]["$lt"] = end_time
+        if min_congestion is not None:
+            query_filter["congestion_level"] = query_filter.get("congestion_level", {})
+            query_filter["congestion_level"]["$gte"] = min_congestion
+        if max_congestion is not None:
+            query_filter["congestion_level"] = query_filter.get("congestion_level", {})
+            query_filter["congestion_level"]["$lte"] = max_congestion
+        if after is not None:
+            # Keyset: strictly past the last (timestamp, _id) already returned
+            ts, key = after
+            query_filter["$or"] = [
+                {"timestamp": {"$lt": ts}},
+                {"timestamp": ts, "_id": {"$lt": ObjectId(key)}},
+            ]
+
+        # (timestamp, _id) descending is served by road_time_desc_idx /
+        # time_desc_idx, so no in-memory sort whatever the filters
+        cursor = traffic_readings.find(query_filter, _SEARCH_PROJECTION).sort(
+            [("timestamp", -1), ("_id", -1)]
+        )
+        if limit is not None:
+            cursor = cursor.limit(limit)
+        return self._search_docs(cursor)
+
+    @staticmethod
+    async def _search_docs(cursor) -> AsyncIterator[Dict[str, Any]]:
+        async for doc in cursor:
+            doc["key"] = str(doc.pop("_id"))
+            yield doc
+
+    # ── Writes ───────────────────────────────────────────────────────────
+
+    async def insert_readings(self, records: List[Dict[str, Any]]) -> int:
+        ops = [
+            ReplaceOne({"road_id": r["road_id"], "timestamp": r["timestamp"]}, r, upsert=True)
+            for r in records
+        ]
+        if ops:
+            await traffic_readings.bulk_write(ops, ordered=False)
+        return len(ops)
+
+    async def upsert_segments(self, segments: List[Dict[str, Any]]) -> int:
+        ops = [
+            ReplaceOne({"road_id": s["road_id"]}, with_location(s), upsert=True)
+            for s in segments
+        ]
+        if ops:
+            await road_segments.bulk_write(ops, ordered=False)
+        return len(ops)
@@ -0,0 +1,135 @@
+"""
+Per-query-shape latency for every MongoDB command the process sends.
+
+A pymongo :class:`~pymongo.monitoring.CommandListener` is registered on the
+Motor client in ``src/db/models.py``.  Each command is reduced to a *shape*
+— collection, command and the filter / sort structure with every literal
+replaced by ``?`` — so
+
+    find traffic_readings {"road_id": "AIR_1", "timestamp": {"$lt": T1}}
+    find traffic_readings {"road_id": "BKC_2", "timestamp": {"$lt": T2}}
+
+land in the same bucket.  Commands slower than ``SLOW_QUERY_MS`` are logged
+with their shape.  ``GET /api/metrics`` serves :meth:`snapshot`.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import threading
+from collections import deque
+from typing import Any, Deque, Dict, List
+
+import numpy as np
+from pymongo import monitoring
+
+from src.config import QUERY_SAMPLE_SIZE, SLOW_QUERY_MS
+
+logger = logging.getLogger(__name__)
+
+# Commands that read or write data; handshakes, pings, auth etc. are ignored.
+TRACKED_COMMANDS = {
+    "find", "aggregate", "count", "distinct", "getMore",
+    "insert", "update", "delete", "findAndModify",
+}
+
+
+def _mask(value: Any) -> Any:
+    """Keep the structure and ``$`` operators of a filter, drop the values."""
+    if isinstance(value, dict):
+        return {k: _mask(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_mask(value[0])] if value else []
+    return "?"
+
+
+def query_shape(command_name: str, command: Dict[str, Any]) -> str:
+    """A stable, literal-free description of *command*."""
+    collection = command.get(command_name)
+    if command_name == "getMore":
+        collection = command.get("collection")
+    parts = [command_name, str(collection)]
+
+    if command_name == "find":
+        parts.append(json.dumps(_mask(command.get("filter", {})), sort_keys=True))
+        if command.get("sort"):
+            parts.append(f"sort={json.dumps(dict(command['sort']))}")
+    elif command_name == "aggregate":
+        stages = [
+            {name: (_mask(body) if name == "$match" else "…") for name, body in stage.items()}
+            for stage in command.get("pipeline", [])
+        ]
+        parts.append(json.dumps(stages, sort_keys=True))
+    elif command_name in ("count", "distinct"):
+        parts.append(json.dumps(_mask(command.get("query", {})), sort_keys=True))
+    return " ".join(parts)
+
+
+class CommandLatencyListener(monitoring.CommandListener):
+    """Aggregates command durations by :func:`query_shape`."""
+
+    def __init__(self, slow_ms: float = SLOW_QUERY_MS, sample_size: int = QUERY_SAMPLE_SIZE):
+        self.slow_ms = slow_ms
+        self.sample_size = sample_size
+        self._pending: Dict[tuple, str] = {}
+        self._samples: Dict[str, Deque[float]] = {}
+        self._stats: Dict[str, Dict[str, float]] = {}
+        self._lock = threading.Lock()
+
+    # pymongo calls these from its I/O threads
+    def started(self, event) -> None:
+        if event.command_name in TRACKED_COMMANDS:
+            shape = query_shape(event.command_name, event.command)
+            with self._lock:
+                self._pending[(event.connection_id, event.request_id)] = shape
+
+    def succeeded(self, event) -> None:
+        self._finish(event, failed=False)
+
+    def failed(self, event) -> None:
+        self._finish(event, failed=True)
+
+    def _finish(self, event, failed: bool) -> None:
+        with self._lock:
+            shape = self._pending.pop((event.connection_id, event.request_id), None)
+            if shape is None:
+                return
+            ms = event.duration_micros / 1000
+            stats = self._stats.setdefault(shape, {"count": 0, "total_ms": 0.0, "max_ms": 0.0, "slow": 0, "failed": 0})
+            stats["count"] += 1
+            stats["total_ms"] += ms
+            stats["max_ms"] = max(stats["max_ms"], ms)
+            stats["failed"] += failed
+            self._samples.setdefault(shape, deque(maxlen=self.sample_size)).append(ms)
+            slow = ms >= self.slow_ms
+            stats["slow"] += slow
+        if slow:
+            logger.warning("Slow MongoDB command (%.1f ms): %s", ms, shape)
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        """Per-shape count / mean / p50 / p95 / max, slowest mean first."""
+        with self._lock:
+            rows = []
+            for shape, stats in self._stats.items():
+                samples = np.fromiter(self._samples[shape], dtype=np.float64)
+                rows.append({
+                    "shape": shape,
+                    "count": stats["count"],
+                    "mean_ms": round(stats["total_ms"] / stats["count"], 3),
+                    "p50_ms": round(float(np.percentile(samples, 50)), 3),
+                    "p95_ms": round(float(np.percentile(samples, 95)), 3),
+                    "max_ms": round(stats["max_ms"], 3),
+                    "slow": stats["slow"],
+                    "failed": stats["failed"],
+                })
+        return sorted(rows, key=lambda r: r["mean_ms"], reverse=True)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._pending.clear()
+            self._samples.clear()
+            self._stats.clear()
+
+
+command_latency = CommandLatencyListener()
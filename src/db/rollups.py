@@ -0,0 +1,328 @@
+"""
+Tiered downsampling of old readings.
+
+``traffic_readings`` gains one document per road per hour forever.  The
+rollup job (``python -m scripts.rollup``) keeps recent data raw and folds
+older data into ``traffic_rollups``:
+
+    raw     readings newer than ROLLUP_DAILY_AFTER_DAYS
+    daily   one document per road per UTC day, until ROLLUP_WEEKLY_AFTER_DAYS
+    weekly  one document per road per week (Monday 00:00 UTC) after that
+
+A rollup document keeps, per hour of day (the reading's local ``hour``),
+the count, sum, min, max and a fixed ``HIST_BINS``-bin histogram of
+congestion_level, plus the mean and p50 / p90 / p95 derived from them:
+
+    {"road_id": "AIR_1", "tier": "daily", "start": ISODate(2024-02-07),
+     "end": ISODate(2024-02-08), "t0": ..., "t1": ..., "count": 24,
+     "n": [24 ints], "sum": [...], "min": [...], "max": [...],
+     "hist": [24 × HIST_BINS ints], "mean": [...], "p50": [...], ...,
+     "covered": [minute offsets (daily) / day starts (weekly) folded in]}
+
+Counts, sums, extremes and histograms merge exactly, so a weekly document
+is built from its daily ones and a profile query merges raw readings with
+any number of rollups (percentiles are read off the merged histogram).
+``covered`` makes the job idempotent: a re-run after a crash between the
+rollup write and the raw delete skips readings already folded in and only
+merges late arrivals.
+
+Rolled-up raw rows are deleted, or moved to ``traffic_readings_archive``
+with ``ROLLUP_MODE="archive"``.  Rollups cover the document layout; the
+bucket layout is already compact.
+"""
+
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from motor.motor_asyncio import AsyncIOMotorCollection
+from pymongo import DeleteOne, ReplaceOne
+
+HIST_BINS = 20
+PERCENTILES = {"p50": 0.50, "p90": 0.90, "p95": 0.95}
+_HOURS = 24
+
+Summary = Dict[str, np.ndarray]
+
+
+# ──────────────────────── Per-hour summaries ─────────────────────────────
+
+def empty_summary() -> Summary:
+    return {
+        "n": np.zeros(_HOURS, dtype=np.int64),
+        "sum": np.zeros(_HOURS),
+        "min": np.full(_HOURS, np.inf),
+        "max": np.full(_HOURS, -np.inf),
+        "hist": np.zeros((_HOURS, HIST_BINS), dtype=np.int64),
+    }
+
+
+def summarize(hours: np.ndarray, values: np.ndarray) -> Summary:
+    """Per-hour-of-day count / sum / min / max / histogram of *values* (0-1)."""
+    hours = np.asarray(hours, dtype=np.int64)
+    values = np.asarray(values, dtype=np.float64)
+    out = empty_summary()
+    if not len(values):
+        return out
+    out["n"] += np.bincount(hours, minlength=_HOURS)
+    out["sum"] += np.bincount(hours, weights=values, minlength=_HOURS)
+    np.minimum.at(out["min"], hours, values)
+    np.maximum.at(out["max"], hours, values)
+    bins = np.clip((values * HIST_BINS).astype(np.int64), 0, HIST_BINS - 1)
+    np.add.at(out["hist"], (hours, bins), 1)
+    return out
+
+
+def merge_summaries(a: Summary, b: Summary) -> Summary:
+    return {
+        "n": a["n"] + b["n"],
+        "sum": a["sum"] + b["sum"],
+        "min": np.minimum(a["min"], b["min"]),
+        "max": np.maximum(a["max"], b["max"]),
+        "hist": a["hist"] + b["hist"],
+    }
+
+
+def hist_quantile(hist: np.ndarray, q: float) -> np.ndarray:
+    """Per-row *q*-quantile, interpolated linearly inside the histogram bin."""
+    cum = np.cumsum(hist, axis=1)
+    total = cum[:, -1]
+    target = q * total
+    idx = np.argmax(cum >= target[:, None], axis=1)
+    rows = np.arange(len(hist))
+    before = np.where(idx > 0, cum[rows, np.maximum(idx - 1, 0)], 0)
+    in_bin = np.maximum(hist[rows, idx], 1)
+    value = (idx + (target - before) / in_bin) / HIST_BINS
+    return np.where(total > 0, value, np.nan)
+
+
+def derived(summary: Summary) -> Dict[str, np.ndarray]:
+    """mean and percentiles per hour (NaN where an hour has no readings)."""
+    n = summary["n"]
+    out = {"mean": np.where(n > 0, summary["sum"] / np.maximum(n, 1), np.nan)}
+    for name, q in PERCENTILES.items():
+        out[name] = hist_quantile(summary["hist"], q)
+    return out
+
+
+def _nullable(values: np.ndarray, present: np.ndarray) -> List[Optional[float]]:
+    return [round(float(v), 4) if p else None for v, p in zip(values, present)]
+
+
+def profile_rows(summary: Summary) -> List[Dict[str, Any]]:
+    """One row per hour of day: n, mean, min, max, p50, p90, p95 (0-1 scale)."""
+    present = summary["n"] > 0
+    stats = {"min": summary["min"], "max": summary["max"], **derived(summary)}
+    columns = {name: _nullable(values, present) for name, values in stats.items()}
+    return [
+        {"hour": h, "n": int(summary["n"][h]), **{name: col[h] for name, col in columns.items()}}
+        for h in range(_HOURS)
+    ]
+
+
+def rollup_doc(
+    road_id: str,
+    tier: str,
+    start: datetime,
+    end: datetime,
+    summary: Summary,
+    t0: datetime,
+    t1: datetime,
+    covered: List[Any],
+) -> Dict[str, Any]:
+    present = summary["n"] > 0
+    return {
+        "road_id": road_id,
+        "tier": tier,
+        "start": start,
+        "end": end,
+        "t0": t0,
+        "t1": t1,
+        "count": int(summary["n"].sum()),
+        "n": summary["n"].tolist(),
+        "sum": summary["sum"].tolist(),
+        "min": _nullable(summary["min"], present),
+        "max": _nullable(summary["max"], present),
+        "hist": summary["hist"].tolist(),
+        **{name: _nullable(values, present) for name, values in derived(summary).items()},
+        "covered": covered,
+    }
+
+
+def summary_from_doc(doc: Dict[str, Any]) -> Summary:
+    return {
+        "n": np.asarray(doc["n"], dtype=np.int64),
+        "sum": np.asarray(doc["sum"], dtype=np.float64),
+        "min": np.array([np.inf if v is None else v for v in doc["min"]]),
+        "max": np.array([-np.inf if v is None else v for v in doc["max"]]),
+        "hist": np.asarray(doc["hist"], dtype=np.int64).reshape(_HOURS, HIST_BINS),
+    }
+
+
+# ──────────────────────── Rollup job ─────────────────────────────────────
+
+def _day(ts: np.datetime64) -> datetime:
+    return ts.astype("datetime64[D]").astype("datetime64[ms]").astype(datetime)
+
+
+def _week_start(day: datetime) -> datetime:
+    return day - timedelta(days=day.weekday())
+
+
+async def rollup_daily(
+    readings: AsyncIOMotorCollection,
+    rollups: AsyncIOMotorCollection,
+    road_id: str,
+    cutoff: datetime,
+    archive: Optional[AsyncIOMotorCollection] = None,
+    batch_size: int = 1000,
+) -> Tuple[int, int]:
+    """
+    Fold *road_id*'s readings before *cutoff* (a UTC midnight) into daily
+    rollups, then delete them (or move them to *archive*).
+
+    Returns (readings rolled up, daily documents written).
+    """
+    projection = None if archive is not None else {"timestamp": 1, "hour": 1, "congestion_level": 1}
+    rows = await readings.find(
+        {"road_id": road_id, "timestamp": {"$lt": cutoff}}, projection
+    ).to_list(length=None)
+    if not rows:
+        return 0, 0
+
+    ts = np.array([r["timestamp"] for r in rows], dtype="datetime64[ms]")
+    hours = np.array([r["hour"] for r in rows], dtype=np.int64)
+    values = np.array([r["congestion_level"] for r in rows], dtype=np.float64)
+    days = ts.astype("datetime64[D]")
+    minutes = ((ts - days.astype("datetime64[ms]")) // np.timedelta64(1, "m")).astype(np.int64)
+
+    starts = [_day(d) for d in np.unique(days)]
+    existing = {
+        doc["start"]: doc
+        async for doc in rollups.find({"road_id": road_id, "tier": "daily", "start": {"$in": starts}})
+    }
+
+    ops = []
+    for start in starts:
+        in_day = days == np.datetime64(start, "D")
+        prev = existing.get(start)
+        covered = set(prev["covered"]) if prev else set()
+        # Readings a crashed earlier run already folded in are not counted twice
+        fresh = in_day & ~np.isin(minutes, list(covered))
+        summary = summarize(hours[fresh], values[fresh])
+        day_ts = ts[fresh]
+        t0, t1 = (day_ts.min(), day_ts.max()) if len(day_ts) else (None, None)
+        if prev:
+            summary = merge_summaries(summary_from_doc(prev), summary)
+            t0 = prev["t0"] if t0 is None else min(prev["t0"], t0.astype(datetime))
+            t1 = prev["t1"] if t1 is None else max(prev["t1"], t1.astype(datetime))
+        else:
+            t0, t1 = t0.astype(datetime), t1.astype(datetime)
+        doc = rollup_doc(
+            road_id, "daily", start, start + timedelta(days=1), summary, t0, t1,
+            sorted(covered | set(minutes[fresh].tolist())),
+        )
+        ops.append(ReplaceOne({"road_id": road_id, "tier": "daily", "start": start}, doc, upsert=True))
+    await rollups.bulk_write(ops, ordered=False)
+
+    # Raw rows go only after their rollups are durable
+    for i in range(0, len(rows), batch_size):
+        batch = rows[i : i + batch_size]
+        if archive is not None:
+            await archive.bulk_write(
+                [ReplaceOne({"_id": r["_id"]}, r, upsert=True) for r in batch], ordered=False
+            )
+        await readings.bulk_write([DeleteOne({"_id": r["_id"]}) for r in batch], ordered=False)
+    return len(rows), len(ops)
+
+
+async def rollup_weekly(
+    rollups: AsyncIOMotorCollection,
+    road_id: str,
+    cutoff: datetime,
+) -> Tuple[int, int]:
+    """
+    Merge *road_id*'s daily rollups of weeks ending by *cutoff* (a Monday)
+    into weekly ones and drop the dailies.
+
+    Returns (daily documents merged, weekly documents written).
+    """
+    dailies = await rollups.find(
+        {"road_id": road_id, "tier": "daily", "end": {"$lte": cutoff}}
+    ).to_list(length=None)
+    by_week: Dict[datetime, List[Dict[str, Any]]] = {}
+    for doc in dailies:
+        week = _week_start(doc["start"])
+        if week + timedelta(days=7) <= cutoff:
+            by_week.setdefault(week, []).append(doc)
+    if not by_week:
+        return 0, 0
+
+    existing = {
+        doc["start"]: doc
+        async for doc in rollups.find({"road_id": road_id, "tier": "weekly", "start": {"$in": list(by_week)}})
+    }
+
+    ops, merged = [], []
+    for week, docs in sorted(by_week.items()):
+        prev = existing.get(week)
+        covered = set(prev["covered"]) if prev else set()
+        fresh = [d for d in docs if d["start"] not in covered]
+        summary = summary_from_doc(prev) if prev else empty_summary()
+        for d in fresh:
+            summary = merge_summaries(summary, summary_from_doc(d))
+        bounds = [d for d in [prev, *fresh] if d]
+        doc = rollup_doc(
+            road_id, "weekly", week, week + timedelta(days=7), summary,
+            min(d["t0"] for d in bounds), max(d["t1"] for d in bounds),
+            sorted(covered | {d["start"] for d in fresh}),
+        )
+        ops.append(ReplaceOne({"road_id": road_id, "tier": "weekly", "start": week}, doc, upsert=True))
+        merged.extend(docs)
+    await rollups.bulk_write(ops, ordered=False)
+    await rollups.bulk_write([DeleteOne({"_id": d["_id"]}) for d in merged], ordered=False)
+    return len(merged), len(ops)
+
+
+# ──────────────────────── Tier-transparent reads ─────────────────────────
+
+async def rollup_time_range(rollups: AsyncIOMotorCollection, road_id: str) -> Optional[Dict[str, Any]]:
+    """Earliest / latest / count of the readings folded into *road_id*'s rollups."""
+    pipeline = [
+        {"$match": {"road_id": road_id}},
+        {"$group": {"_id": None, "earliest": {"$min": "$t0"}, "latest": {"$max": "$t1"}, "count": {"$sum": "$count"}}},
+    ]
+    result = await rollups.aggregate(pipeline).to_list(length=1)
+    return result[0] if result else None
+
+
+def combine_ranges(*ranges: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """Union of several ``{earliest, latest, count}`` ranges (None ignored)."""
+    ranges = [r for r in ranges if r]
+    if not ranges:
+        return None
+    return {
+        "earliest": min(r["earliest"] for r in ranges),
+        "latest": max(r["latest"] for r in ranges),
+        "count": sum(r["count"] for r in ranges),
+    }
+
+
+async def rollup_summary(
+    rollups: AsyncIOMotorCollection,
+    road_id: str,
+    start: Optional[datetime],
+    end: Optional[datetime],
+) -> Summary:
+    """Merged summary of every rollup of *road_id* overlapping [start, end)."""
+    query: Dict[str, Any] = {"road_id": road_id}
+    if start is not None:
+        query["end"] = {"$gt": start}
+    if end is not None:
+        query["start"] = {"$lt": end}
+    summary = empty_summary()
+    async for doc in rollups.find(query, {"n": 1, "sum": 1, "min": 1, "max": 1, "hist": 1}):
+        summary = merge_summaries(summary, summary_from_doc(doc))
+    return summary
@@ -0,0 +1,123 @@
+"""
+Materialised per-segment statistics.
+
+The date picker asks for every segment's available time range.  Computing
+it with a ``$match`` / ``$group`` over all readings of the road costs
+O(history) per request, so ingest maintains one small document per road in
+``segment_stats`` instead:
+
+    {"road_id": "AIR_1", "earliest": ISODate(...), "latest": ISODate(...), "count": 10000}
+
+Ingest applies ``$min`` / ``$max`` for the bounds and ``$inc`` with the
+number of readings that were actually new, so re-ingesting a file leaves
+the counts unchanged.  The API reads the whole collection (one document per
+road) through :class:`SegmentStatsCache` and refreshes it every
+``SEGMENT_STATS_TTL_S`` seconds.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from typing import Any, Dict, List, Mapping, Optional
+
+import pandas as pd
+from motor.motor_asyncio import AsyncIOMotorCollection
+from pymongo import ReplaceOne, UpdateOne
+
+from src.config import SEGMENT_STATS_TTL_S
+from src.db.rollups import combine_ranges
+
+
+def stats_update_ops(
+    rows: pd.DataFrame,
+    new_counts: Mapping[str, int],
+) -> List[UpdateOne]:
+    """
+    Upserts folding *rows* (``road_id`` + naive-UTC ``timestamp``) into
+    ``segment_stats``.  *new_counts* is the number of readings per road that
+    did not exist before this write.
+    """
+    bounds = rows.groupby("road_id")["timestamp"].agg(["min", "max"])
+    return [
+        UpdateOne(
+            {"road_id": road_id},
+            {
+                "$min": {"earliest": lo.to_pydatetime()},
+                "$max": {"latest": hi.to_pydatetime()},
+                "$inc": {"count": int(new_counts.get(road_id, 0))},
+            },
+            upsert=True,
+        )
+        for road_id, lo, hi in zip(bounds.index, bounds["min"], bounds["max"])
+    ]
+
+
+async def rebuild_segment_stats(
+    stats: AsyncIOMotorCollection,
+    readings: AsyncIOMotorCollection,
+    bucketed: bool = False,
+    rollups: Optional[AsyncIOMotorCollection] = None,
+) -> int:
+    """
+    Recompute every road's stats from scratch (one-off backfill for
+    databases ingested before ``segment_stats`` existed).  Readings already
+    folded into *rollups* (``traffic_rollups``) are counted too.
+    """
+    if bucketed:
+        group = {"_id": "$r", "earliest": {"$min": "$t0"}, "latest": {"$max": "$t1"}, "count": {"$sum": "$n"}}
+    else:
+        group = {"_id": "$road_id", "earliest": {"$min": "$timestamp"}, "latest": {"$max": "$timestamp"}, "count": {"$sum": 1}}
+
+    ranges: Dict[str, Dict[str, Any]] = {}
+    sources = [(readings, group)]
+    if rollups is not None:
+        sources.append((rollups, {"_id": "$road_id", "earliest": {"$min": "$t0"}, "latest": {"$max": "$t1"}, "count": {"$sum": "$count"}}))
+    for collection, grp in sources:
+        async for doc in collection.aggregate([{"$group": grp}], allowDiskUse=True):
+            ranges[doc["_id"]] = combine_ranges(ranges.get(doc["_id"]), doc)
+    ops = [
+        ReplaceOne(
+            {"road_id": road_id},
+            {"road_id": road_id, "earliest": r["earliest"], "latest": r["latest"], "count": r["count"]},
+            upsert=True,
+        )
+        for road_id, r in ranges.items()
+    ]
+    if ops:
+        await stats.bulk_write(ops, ordered=False)
+    return len(ops)
+
+
+class SegmentStatsCache:
+    """In-process copy of ``segment_stats``, reloaded at most every *ttl_s*."""
+
+    def __init__(self, ttl_s: float = SEGMENT_STATS_TTL_S):
+        self.ttl_s = ttl_s
+        self._by_road: Dict[str, Dict[str, Any]] = {}
+        self._loaded_at = float("-inf")
+        self._lock = asyncio.Lock()
+
+    async def _ensure_fresh(self, collection: AsyncIOMotorCollection) -> None:
+        if time.monotonic() - self._loaded_at < self.ttl_s:
+            return
+        async with self._lock:
+            if time.monotonic() - self._loaded_at < self.ttl_s:
+                return   # another request refreshed it while we waited
+            docs = await collection.find({}, {"_id": 0}).to_list(length=None)
+            self._by_road = {d["road_id"]: d for d in docs}
+            self._loaded_at = time.monotonic()
+
+    async def get(self, collection: AsyncIOMotorCollection, road_id: str) -> Optional[Dict[str, Any]]:
+        await self._ensure_fresh(collection)
+        return self._by_road.get(road_id)
+
+    async def all(self, collection: AsyncIOMotorCollection) -> List[Dict[str, Any]]:
+        await self._ensure_fresh(collection)
+        return [self._by_road[r] for r in sorted(self._by_road)]
+
+    def invalidate(self) -> None:
+        self._loaded_at = float("-inf")
+
+
+segment_stats_cache = SegmentStatsCache()
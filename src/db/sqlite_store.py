@@ -0,0 +1,370 @@
+"""
+Embedded SQLite implementation of :class:`~src.db.storage.TrafficStore`.
+
+A single file (``SQLITE_PATH``) with no server, for dev boxes, CI and edge
+deployments.  ``traffic_readings`` is a ``WITHOUT ROWID`` table whose
+primary key is (road_id, timestamp), so rows are clustered by road and time
+— the 24-row history fetch is one B-tree range scan and MIN / MAX per road
+are index seeks.  Timestamps are stored as INTEGER epoch milliseconds
+(naive UTC), matching the Mongo documents.
+
+sqlite3 is synchronous; every call runs on a worker thread via
+``asyncio.to_thread`` behind a lock, so the event loop never blocks.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import sqlite3
+import threading
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence
+
+import pandas as pd
+
+from src.config import SQLITE_PATH
+from src.db.geo import haversine_km, radius_bbox
+from src.db.rollups import Summary, summarize
+from src.db.storage import (
+    BLOCK_COLUMNS,
+    HISTORY_META_FIELDS,
+    HistoryBlock,
+    SearchKey,
+    TrafficStore,
+    block_from_rows,
+    blocks_by_road,
+    not_enough_history,
+    to_ms,
+)
+
+READING_COLUMNS = {
+    "road_id": "TEXT NOT NULL",
+    "timestamp": "INTEGER NOT NULL",
+    "hour": "INTEGER",
+    "day_of_week": "INTEGER",
+    "is_weekend": "INTEGER",
+    "month": "INTEGER",
+    "hourly_speed_kph": "REAL",
+    "avg_speed_kph": "REAL",
+    "travel_time_s": "REAL",
+    "free_flow_speed_kph": "REAL",
+    "free_flow_travel_time_s": "REAL",
+    "delay_ratio": "REAL",
+    "congestion_level": "REAL",
+    "congestion_band": "TEXT",
+    "accident_hotspot_score": "REAL",
+    "recent_incident_count": "INTEGER",
+    "enforcement_violation_pattern": "REAL",
+    "long_term_risk_prior": "REAL",
+}
+
+SEGMENT_COLUMNS = {
+    "road_id": "TEXT PRIMARY KEY",
+    "road_name": "TEXT",
+    "segment_name": "TEXT",
+    "lat": "REAL",
+    "lon": "REAL",
+    "road_class": "TEXT",
+}
+
+_SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS traffic_readings (
+    {", ".join(f"{c} {t}" for c, t in READING_COLUMNS.items())},
+    PRIMARY KEY (road_id, timestamp)
+) WITHOUT ROWID;
+DROP INDEX IF EXISTS time_idx;
+CREATE INDEX IF NOT EXISTS time_road_idx ON traffic_readings (timestamp, road_id, congestion_level);
+CREATE TABLE IF NOT EXISTS road_segments (
+    {", ".join(f"{c} {t}" for c, t in SEGMENT_COLUMNS.items())}
+);
+CREATE INDEX IF NOT EXISTS road_name_idx ON road_segments (road_name);
+CREATE INDEX IF NOT EXISTS lat_lon_idx ON road_segments (lat, lon);
+"""
+
+_EPOCH = datetime(1970, 1, 1)
+
+# Rows fetched per keyset page while streaming a search
+SEARCH_PAGE_ROWS = 1000
+
+
+def from_ms(ms: Optional[int]) -> Optional[datetime]:
+    return None if ms is None else _EPOCH + timedelta(milliseconds=ms)
+
+
+class SQLiteStore(TrafficStore):
+    """Readings in a local SQLite file, clustered on (road_id, timestamp)."""
+
+    def __init__(self, path: Path | str = SQLITE_PATH):
+        self.path = str(path)
+        self._conn: sqlite3.Connection | None = None
+        self._lock = threading.Lock()
+
+    # ── Connection plumbing ──────────────────────────────────────────────
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            if self.path != ":memory:":
+                Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(_SCHEMA)
+            self._conn = conn
+        return self._conn
+
+    def _run(self, fn, *args):
+        with self._lock:
+            return fn(self._connect(), *args)
+
+    async def _call(self, fn, *args):
+        return await asyncio.to_thread(self._run, fn, *args)
+
+    async def init(self) -> None:
+        await self._call(lambda conn: None)
+
+    async def close(self) -> None:
+        def _close(conn: sqlite3.Connection) -> None:
+            conn.close()
+            self._conn = None
+        if self._conn is not None:
+            await self._call(_close)
+
+    # ── History ──────────────────────────────────────────────────────────
+
+    @staticmethod
+    def _history_rows(conn: sqlite3.Connection, columns: Sequence[str], road_id: str, end_ms: int, window: int):
+        rows = conn.execute(
+            f"SELECT {', '.join(columns)} FROM traffic_readings "
+            f"WHERE road_id = ? AND timestamp < ? ORDER BY timestamp DESC LIMIT ?",
+            (road_id, end_ms, window),
+        ).fetchall()
+        meta = conn.execute(
+            f"SELECT {', '.join(HISTORY_META_FIELDS)} FROM road_segments WHERE road_id = ?",
+            (road_id,),
+        ).fetchone()
+        return rows[::-1], dict(zip(HISTORY_META_FIELDS, meta)) if meta else {}
+
+    async def fetch_history(self, road_id: str, end_timestamp: datetime, window: int) -> pd.DataFrame:
+        columns = list(READING_COLUMNS)
+        rows, meta = await self._call(self._history_rows, columns, road_id, to_ms(end_timestamp), window)
+        if len(rows) < window:
+            raise not_enough_history(road_id, end_timestamp, window, len(rows))
+
+        df = pd.DataFrame.from_records(rows, columns=columns)
+        df["timestamp"] = pd.to_datetime(df["timestamp"], unit="ms")
+        for key, value in meta.items():
+            df[key] = value
+        return df
+
+    async def fetch_history_block(self, road_id: str, end_timestamp: datetime, window: int) -> HistoryBlock:
+        columns = ["timestamp", *BLOCK_COLUMNS]
+        rows, meta = await self._call(self._history_rows, columns, road_id, to_ms(end_timestamp), window)
+        if len(rows) < window:
+            raise not_enough_history(road_id, end_timestamp, window, len(rows))
+        return block_from_rows(road_id, [r[0] for r in rows], [r[1:] for r in rows], meta)
+
+    @staticmethod
+    def _segment_meta(conn: sqlite3.Connection) -> Dict[str, Dict[str, Any]]:
+        rows = conn.execute(f"SELECT road_id, {', '.join(HISTORY_META_FIELDS)} FROM road_segments").fetchall()
+        return {r[0]: dict(zip(HISTORY_META_FIELDS, r[1:])) for r in rows}
+
+    async def latest_blocks(self, window: int, road_ids: Optional[Sequence[str]] = None) -> List[HistoryBlock]:
+        columns = ", ".join(["road_id", "timestamp", *BLOCK_COLUMNS])
+        where, params = "", []
+        if road_ids is not None:
+            where = f"WHERE road_id IN ({', '.join('?' * len(road_ids))})"
+            params = list(road_ids)
+
+        def query(conn: sqlite3.Connection):
+            rows = conn.execute(
+                f"SELECT {columns} FROM ("
+                f"  SELECT *, ROW_NUMBER() OVER (PARTITION BY road_id ORDER BY timestamp DESC) AS rn"
+                f"  FROM traffic_readings {where}"
+                f") WHERE rn <= ? ORDER BY road_id, timestamp",
+                (*params, window),
+            ).fetchall()
+            return rows, self._segment_meta(conn)
+
+        rows, meta = await self._call(query)
+        return blocks_by_road(rows, meta)
+
+    async def readings_since(self, since: datetime) -> List[HistoryBlock]:
+        columns = ", ".join(["road_id", "timestamp", *BLOCK_COLUMNS])
+
+        def query(conn: sqlite3.Connection):
+            rows = conn.execute(
+                f"SELECT {columns} FROM traffic_readings WHERE timestamp > ? ORDER BY road_id, timestamp",
+                (to_ms(since),),
+            ).fetchall()
+            return rows, self._segment_meta(conn) if rows else {}
+
+        rows, meta = await self._call(query)
+        return blocks_by_road(rows, meta)
+
+    # ── Segments and time ranges ─────────────────────────────────────────
+
+    async def list_segments(self) -> List[Dict[str, Any]]:
+        def query(conn: sqlite3.Connection):
+            cols = list(SEGMENT_COLUMNS)
+            rows = conn.execute(f"SELECT {', '.join(cols)} FROM road_segments ORDER BY road_name").fetchall()
+            return [{k: v for k, v in zip(cols, row) if v is not None} for row in rows]
+        return await self._call(query)
+
+    async def segments_in_bbox(
+        self, min_lat: float, min_lon: float, max_lat: float, max_lon: float
+    ) -> List[Dict[str, Any]]:
+        def query(conn: sqlite3.Connection):
+            cols = list(SEGMENT_COLUMNS)
+            rows = conn.execute(
+                f"SELECT {', '.join(cols)} FROM road_segments "
+                f"WHERE lat BETWEEN ? AND ? AND lon BETWEEN ? AND ? ORDER BY road_name",
+                (min_lat, max_lat, min_lon, max_lon),
+            ).fetchall()
+            return [{k: v for k, v in zip(cols, row) if v is not None} for row in rows]
+        return await self._call(query)
+
+    async def segments_near(
+        self, lat: float, lon: float, radius_km: float, limit: int
+    ) -> List[Dict[str, Any]]:
+        # Bounding box on the (lat, lon) index, then exact great-circle distance
+        candidates = await self.segments_in_bbox(*radius_bbox(lat, lon, radius_km))
+        for seg in candidates:
+            seg["distance_km"] = haversine_km(lat, lon, seg["lat"], seg["lon"])
+        near = [seg for seg in candidates if seg["distance_km"] <= radius_km]
+        return sorted(near, key=lambda seg: seg["distance_km"])[:limit]
+
+    @staticmethod
+    def _range(road_id: str, lo: Optional[int], hi: Optional[int], count: int) -> Dict[str, Any]:
+        return {"road_id": road_id, "earliest": from_ms(lo), "latest": from_ms(hi), "count": count}
+
+    async def time_range(self, road_id: str) -> Optional[Dict[str, Any]]:
+        def query(conn: sqlite3.Connection):
+            return conn.execute(
+                "SELECT MIN(timestamp), MAX(timestamp), COUNT(*) FROM traffic_readings WHERE road_id = ?",
+                (road_id,),
+            ).fetchone()
+        lo, hi, count = await self._call(query)
+        return self._range(road_id, lo, hi, count) if count else None
+
+    async def all_time_ranges(self) -> List[Dict[str, Any]]:
+        def query(conn: sqlite3.Connection):
+            return conn.execute(
+                "SELECT road_id, MIN(timestamp), MAX(timestamp), COUNT(*) "
+                "FROM traffic_readings GROUP BY road_id ORDER BY road_id"
+            ).fetchall()
+        return [self._range(*row) for row in await self._call(query)]
+
+    # ── Analytics ────────────────────────────────────────────────────────
+
+    async def hourly_profile(
+        self, road_id: str, start: Optional[datetime] = None, end: Optional[datetime] = None
+    ) -> Summary:
+        # Raw readings only: embedded stores keep everything, no rollups
+        def query(conn: sqlite3.Connection):
+            return conn.execute(
+                "SELECT hour, congestion_level FROM traffic_readings "
+                "WHERE road_id = ? AND timestamp >= ? AND timestamp < ?",
+                (
+                    road_id,
+                    to_ms(start) if start is not None else -(2 ** 63),
+                    to_ms(end) if end is not None else 2 ** 63 - 1,
+                ),
+            ).fetchall()
+        rows = await self._call(query)
+        return summarize([r[0] for r in rows], [r[1] for r in rows])
+
+    # ── Search ───────────────────────────────────────────────────────────
+
+    async def iter_search(
+        self,
+        road_id: Optional[str] = None,
+        start_time: Optional[datetime] = None,
+        end_time: Optional[datetime] = None,
+        min_congestion: Optional[float] = None,
+        max_congestion: Optional[float] = None,
+        limit: Optional[int] = 100,
+        after: Optional[SearchKey] = None,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        clauses, params = [], []
+        if road_id:
+            clauses.append("r.road_id = ?")
+            params.append(road_id)
+        if start_time:
+            clauses.append("r.timestamp >= ?")
+            params.append(to_ms(start_time))
+        if end_time:
+            clauses.append("r.timestamp < ?")
+            params.append(to_ms(end_time))
+        if min_congestion is not None:
+            clauses.append("r.congestion_level >= ?")
+            params.append(min_congestion)
+        if max_congestion is not None:
+            clauses.append("r.congestion_level <= ?")
+            params.append(max_congestion)
+
+        keys = ["road_id", "segment_name", "road_name", "timestamp", "congestion_level", "congestion_band"]
+        remaining = limit
+        # Pages of SEARCH_PAGE_ROWS, each resuming after the last via the
+        # (timestamp, road_id) keyset — the primary key is unique on it
+        while remaining is None or remaining > 0:
+            page_clauses, page_params = list(clauses), list(params)
+            if after is not None:
+                page_clauses.append("(r.timestamp, r.road_id) < (?, ?)")
+                page_params.extend([to_ms(after[0]), after[1]])
+            where = f"WHERE {' AND '.join(page_clauses)}" if page_clauses else ""
+            page = SEARCH_PAGE_ROWS if remaining is None else min(remaining, SEARCH_PAGE_ROWS)
+
+            def query(conn: sqlite3.Connection):
+                return conn.execute(
+                    "SELECT r.road_id, s.segment_name, s.road_name, r.timestamp, "
+                    "r.congestion_level, r.congestion_band "
+                    "FROM traffic_readings r LEFT JOIN road_segments s ON s.road_id = r.road_id "
+                    f"{where} ORDER BY r.timestamp DESC, r.road_id DESC LIMIT ?",
+                    (*page_params, page),
+                ).fetchall()
+
+            rows = await self._call(query)
+            for row in rows:
+                doc = dict(zip(keys, row))
+                doc["timestamp"] = from_ms(doc["timestamp"])
+                doc["key"] = doc["road_id"]
+                yield doc
+            if len(rows) < page:
+                return
+            if remaining is not None:
+                remaining -= len(rows)
+            after = (from_ms(rows[-1][3]), rows[-1][0])
+
+    # ── Writes ───────────────────────────────────────────────────────────
+
+    async def insert_readings(self, records: List[Dict[str, Any]]) -> int:
+        cols = list(READING_COLUMNS)
+        rows = [
+            tuple(to_ms(r[c]) if c == "timestamp" else r.get(c) for c in cols)
+            for r in records
+        ]
+
+        def write(conn: sqlite3.Connection) -> None:
+            with conn:
+                conn.executemany(
+                    f"INSERT OR REPLACE INTO traffic_readings ({', '.join(cols)}) "
+                    f"VALUES ({', '.join('?' * len(cols))})",
+                    rows,
+                )
+        await self._call(write)
+        return len(rows)
+
+    async def upsert_segments(self, segments: List[Dict[str, Any]]) -> int:
+        cols = list(SEGMENT_COLUMNS)
+        rows = [tuple(s.get(c) for c in cols) for s in segments]
+
+        def write(conn: sqlite3.Connection) -> None:
+            with conn:
+                conn.executemany(
+                    f"INSERT OR REPLACE INTO road_segments ({', '.join(cols)}) "
+                    f"VALUES ({', '.join('?' * len(cols))})",
+                    rows,
+                )
+        await self._call(write)
+        return len(rows)
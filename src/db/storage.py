@@ -0,0 +1,238 @@
+"""
+Storage interface for traffic readings.
+
+The API and the ingest script talk to a :class:`TrafficStore` instead of the
+Motor collections directly, so the same code runs against
+
+    "mongo"   — MongoDB / Atlas (``src/db/mongo_store.py``), the production
+                backend, including the bucket layout and segment_stats
+    "sqlite"  — an embedded SQLite file (``src/db/sqlite_store.py``) for dev
+                boxes, CI and edge deployments without a database server
+
+selected with ``STORAGE_BACKEND``.  Both index readings on
+(road_id, timestamp), so the hot queries have the same shape.
+"""
+
+from __future__ import annotations
+
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from datetime import datetime
+from itertools import groupby
+from operator import itemgetter
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from src.config import STORAGE_BACKEND, TARGET_COL
+from src.data.preprocessor import RAW_FEATURE_COLS
+
+HISTORY_META_FIELDS = ["road_name", "segment_name", "lat", "lon", "road_class"]
+
+_TARGET_RAW_IDX = RAW_FEATURE_COLS.index(TARGET_COL)
+
+
+@dataclass
+class HistoryBlock:
+    """The *window* readings before T for one road, as NumPy arrays."""
+
+    road_id: str
+    timestamps: np.ndarray   # (W,) datetime64[ms], chronological
+    raw: np.ndarray          # (W, len(RAW_FEATURE_COLS)) float32, un-scaled
+    hour: np.ndarray         # (W,) int64
+    day_of_week: np.ndarray  # (W,) int64
+    meta: Dict[str, Any]     # road_name, segment_name, lat, lon, road_class
+
+    @property
+    def target(self) -> np.ndarray:
+        """Un-scaled congestion_level of each history row."""
+        return self.raw[:, _TARGET_RAW_IDX]
+
+
+# Keyset position in a search: (timestamp, tie-breaker key) of the last row
+SearchKey = Tuple[datetime, str]
+
+# Column order of the per-reading values behind a HistoryBlock
+BLOCK_COLUMNS = ["hour", "day_of_week", *RAW_FEATURE_COLS]
+
+
+def block_from_rows(
+    road_id: str,
+    timestamps: Sequence[Any],
+    rows: Sequence[Sequence[float]],
+    meta: Dict[str, Any],
+) -> HistoryBlock:
+    """Build a block from chronological timestamps and BLOCK_COLUMNS rows."""
+    values = np.asarray(rows, dtype=np.float64).reshape(len(timestamps), len(BLOCK_COLUMNS))
+    return HistoryBlock(
+        road_id,
+        np.asarray(timestamps, dtype="datetime64[ms]"),
+        values[:, 2:].astype(np.float32),
+        values[:, 0].astype(np.int64),
+        values[:, 1].astype(np.int64),
+        {m: meta.get(m) for m in HISTORY_META_FIELDS},
+    )
+
+
+def blocks_by_road(
+    rows: Iterable[Sequence[Any]],
+    meta_by_road: Dict[str, Dict[str, Any]],
+) -> List[HistoryBlock]:
+    """
+    One block per road from ``(road_id, timestamp, *BLOCK_COLUMNS)`` rows
+    sorted by road, then time.
+    """
+    blocks = []
+    for road_id, group in groupby(rows, key=itemgetter(0)):
+        group = list(group)
+        blocks.append(block_from_rows(
+            road_id, [g[1] for g in group], [g[2:] for g in group], meta_by_road.get(road_id, {})
+        ))
+    return blocks
+
+
+def to_ms(ts: datetime) -> int:
+    """Naive-UTC (or tz-aware) datetime → epoch milliseconds."""
+    ts = pd.Timestamp(ts)
+    if ts.tzinfo is not None:
+        ts = ts.tz_convert("UTC").tz_localize(None)
+    return int(ts.value // 1_000_000)
+
+
+def not_enough_history(road_id: str, end_timestamp: datetime, window: int, found: int) -> ValueError:
+    return ValueError(
+        f"Need {window} historical documents for {road_id} before "
+        f"{end_timestamp}, but only found {found}."
+    )
+
+
+class TrafficStore(ABC):
+    """Queries the API and ingest need from a readings store."""
+
+    async def init(self) -> None:
+        """Create tables / collections and indexes if missing."""
+
+    async def close(self) -> None:
+        """Release connections."""
+
+    @abstractmethod
+    async def fetch_history(self, road_id: str, end_timestamp: datetime, window: int) -> pd.DataFrame:
+        """
+        The *window* readings of *road_id* strictly before *end_timestamp*,
+        chronologically, one row per reading with segment metadata.
+
+        Raises ValueError if fewer than *window* readings exist.
+        """
+
+    @abstractmethod
+    async def fetch_history_block(self, road_id: str, end_timestamp: datetime, window: int) -> HistoryBlock:
+        """Columnar equivalent of :meth:`fetch_history` for the serving hot path."""
+
+    @abstractmethod
+    async def latest_blocks(self, window: int, road_ids: Optional[Sequence[str]] = None) -> List[HistoryBlock]:
+        """The newest *window* readings of every road (or of *road_ids*)."""
+
+    @abstractmethod
+    async def readings_since(self, since: datetime) -> List[HistoryBlock]:
+        """Readings with timestamp strictly after *since*, one block per road."""
+
+    @abstractmethod
+    async def list_segments(self) -> List[Dict[str, Any]]:
+        """All road segments, sorted by road_name."""
+
+    @abstractmethod
+    async def segments_in_bbox(
+        self, min_lat: float, min_lon: float, max_lat: float, max_lon: float
+    ) -> List[Dict[str, Any]]:
+        """Segments whose point lies inside the box, sorted by road_name."""
+
+    @abstractmethod
+    async def segments_near(
+        self, lat: float, lon: float, radius_km: float, limit: int
+    ) -> List[Dict[str, Any]]:
+        """Segments within *radius_km* of (lat, lon), nearest first, with ``distance_km``."""
+
+    @abstractmethod
+    async def time_range(self, road_id: str) -> Optional[Dict[str, Any]]:
+        """``{road_id, earliest, latest, count}`` for one road, or None."""
+
+    @abstractmethod
+    async def all_time_ranges(self) -> List[Dict[str, Any]]:
+        """:meth:`time_range` for every road, sorted by road_id."""
+
+    @abstractmethod
+    async def hourly_profile(
+        self, road_id: str, start: Optional[datetime] = None, end: Optional[datetime] = None
+    ) -> Dict[str, np.ndarray]:
+        """
+        Per-hour-of-day congestion summary of *road_id*'s readings in
+        [start, end) — raw readings plus any rollups overlapping the range
+        (see ``src/db/rollups.py``).
+        """
+
+    @abstractmethod
+    def iter_search(
+        self,
+        road_id: Optional[str] = None,
+        start_time: Optional[datetime] = None,
+        end_time: Optional[datetime] = None,
+        min_congestion: Optional[float] = None,
+        max_congestion: Optional[float] = None,
+        limit: Optional[int] = 100,
+        after: Optional[SearchKey] = None,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Readings matching the filters, newest first and ordered by
+        (timestamp, key) descending, each with road_id, segment_name,
+        road_name, timestamp, congestion_level, congestion_band and ``key``
+        — a string tie-breaker unique among readings with the same
+        timestamp.  *after* resumes strictly after a previous (timestamp,
+        key); ``limit=None`` streams every match.
+        """
+
+    def check_search(self) -> None:
+        """Raise ValueError if :meth:`iter_search` can't serve this store."""
+
+    def valid_search_key(self, key: str) -> bool:
+        """Whether *key* can be a ``key`` returned by :meth:`iter_search`."""
+        return True
+
+    async def search(self, *args, **kwargs) -> List[Dict[str, Any]]:
+        """:meth:`iter_search` collected into a list."""
+        return [doc async for doc in self.iter_search(*args, **kwargs)]
+
+    @abstractmethod
+    async def insert_readings(self, records: List[Dict[str, Any]]) -> int:
+        """Upsert readings on (road_id, timestamp); returns rows written."""
+
+    @abstractmethod
+    async def upsert_segments(self, segments: List[Dict[str, Any]]) -> int:
+        """Insert or replace segment metadata keyed on road_id."""
+
+
+_store: TrafficStore | None = None
+
+
+def get_store() -> TrafficStore:
+    """The process-wide store for ``STORAGE_BACKEND`` (created on first use)."""
+    global _store
+    if _store is None:
+        _store = make_store(STORAGE_BACKEND)
+    return _store
+
+
+def set_store(store: TrafficStore | None) -> None:
+    """Swap the process-wide store (tests, benchmarks)."""
+    global _store
+    _store = store
+
+
+def make_store(backend: str) -> TrafficStore:
+    if backend == "mongo":
+        from src.db.mongo_store import MongoStore
+        return MongoStore()
+    if backend == "sqlite":
+        from src.db.sqlite_store import SQLiteStore
+        return SQLiteStore()
+    raise ValueError(f"Unknown STORAGE_BACKEND {backend!r} (expected 'mongo' or 'sqlite')")
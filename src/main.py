@@ -7,13 +7,21 @@ Run with:
 
 from __future__ import annotations
 
+import asyncio
 import os
 from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
-from src.db.models import init_db
+from src.config import EVENT_REFRESH_ENABLED, HOT_WINDOW_ENABLED, QUERY_AUDIT_ON_STARTUP, STORAGE_BACKEND
+from src.db.hot_window import hot_windows
+from src.db.index_audit import run_startup_audit
+from src.db.models import db
+from src.db.storage import get_store
+from src.api.event_refresher import event_refresher
+from src.api.events import event_manager
+from src.api.llm_client import llm_client
 from src.api.routes import router
 from src.api.ai_ops import ai_router
 from src.api.chatbot import chat_router
@@ -25,10 +33,33 @@ from src.api.datathon import load_datathon_artifacts
 async def lifespan(app: FastAPI):
     """
     Startup: create DB tables + load model artefacts into memory.
-    Shutdown: (nothing special needed).
+    Shutdown: cancel the background tasks (plan audit, hot-window and event
+    refresh) and close the pooled event API and Groq clients.
     """
-    # 1. Ensure database tables exist
-    await init_db()
+    audit_task = follow_task = refresh_task = None
+
+    # 1. Ensure database tables exist (MongoDB or embedded SQLite)
+    await get_store().init()
+    if STORAGE_BACKEND == "mongo" and QUERY_AUDIT_ON_STARTUP:
+        # explain() every known query shape without delaying startup
+        audit_task = asyncio.create_task(run_startup_audit(db))
+
+    # Newest readings of every road in memory for "now" forecasts
+    if HOT_WINDOW_ENABLED:
+        try:
+            await hot_windows.load(get_store())
+        except Exception as exc:
+            print(f"⚠️ Hot-window cache disabled: {exc}")
+        else:
+            follow_task = asyncio.create_task(hot_windows.follow(get_store()))
+
+    # Long-lived pooled HTTP sessions for the event API clients, and events
+    # of every segment tile refreshed in the background
+    await event_manager.open()
+    if EVENT_REFRESH_ENABLED and event_manager.clients:
+        refresh_task = asyncio.create_task(event_refresher.run(get_store()))
+    # One keep-alive (HTTP/2 when available) client for every Groq call
+    await llm_client.open()
 
     # 2. Load legacy classifier artefacts (optional)
     load_classifier_artifacts()
@@ -38,6 +69,14 @@ async def lifespan(app: FastAPI):
 
     yield  # ← app runs here
 
+    tasks = [t for t in (audit_task, follow_task, refresh_task) if t is not None]
+    for task in tasks:
+        task.cancel()
+    # Let in-flight refreshes unwind before their HTTP sessions close
+    await asyncio.gather(*tasks, return_exceptions=True)
+    await event_manager.close()
+    await llm_client.close()
+
 
 app = FastAPI(
     title="Mumbai Traffic Congestion Forecasting API",
@@ -104,3 +104,190 @@ def test_model_output_shape_if_available():
         y = model(x)
 
     assert tuple(y.shape) == (1, FORECAST_HORIZON)
+
+
+def test_fleet_forecast_mocked(monkeypatch, client):
+    async def fake_predict_fleet(db, road_ids, timestamp):
+        return {"forecasts": [_sample_forecast_response()], "missing": ["AKR_2"]}
+
+    monkeypatch.setattr("src.api.routes.predict_fleet", fake_predict_fleet)
+
+    response = client.post(
+        "/api/forecast/fleet",
+        json={"road_ids": ["AIR_1", "AKR_2"], "timestamp": "2026-02-06T12:00:00"},
+    )
+    assert response.status_code == 200
+    payload = response.json()
+    assert [f["zone_id"] for f in payload["forecasts"]] == ["AIR_1"]
+    assert payload["missing"] == ["AKR_2"]
+
+
+def test_fleet_forecast_empty_road_ids_returns_422(client):
+    response = client.post(
+        "/api/forecast/fleet",
+        json={"road_ids": [], "timestamp": "2026-02-06T12:00:00"},
+    )
+    assert response.status_code == 422
+
+
+def test_segment_ranges_mocked(monkeypatch, client):
+    async def fake_ranges(db):
+        return [{"road_id": "AIR_1", "earliest": "2024-02-07T13:00:00",
+                 "latest": "2025-03-30T04:00:00", "total_readings": 10000}]
+
+    monkeypatch.setattr("src.api.routes.get_all_segment_time_ranges", fake_ranges)
+
+    response = client.get("/api/segments/ranges")
+    assert response.status_code == 200
+    assert response.json()[0]["total_readings"] == 10000
+
+
+def test_search_keyset_pages_match_ndjson_stream(tmp_path, client):
+    import asyncio
+    import json
+
+    from src.db.sqlite_store import SQLiteStore
+    from src.db.storage import set_store
+
+    store = SQLiteStore(tmp_path / "traffic.db")
+    readings = [
+        {"road_id": road, "timestamp": datetime(2024, 2, 1) + timedelta(hours=h),
+         "congestion_level": (h % 10) / 10, "congestion_band": "Moderate"}
+        for road in ("AIR_1", "BKC_2") for h in range(30)
+    ]
+    asyncio.run(store.insert_readings(readings))
+    set_store(store)
+    try:
+        body = {"min_congestion": 50, "limit": 7}
+        pages, cursor = [], None
+        while True:
+            response = client.post("/api/search", json={**body, "cursor": cursor})
+            assert response.status_code == 200
+            page = response.json()
+            pages.extend(page["results"])
+            cursor = page["next_cursor"]
+            if cursor is None:
+                break
+
+        streamed = client.post(
+            "/api/search", json={**body, "limit": None}, headers={"Accept": "application/x-ndjson"}
+        )
+        assert streamed.headers["content-type"].startswith("application/x-ndjson")
+        lines = [json.loads(line) for line in streamed.text.splitlines()]
+
+        assert len(pages) == 30   # 5 of every 10 hours, two roads
+        assert pages == lines
+        keys = [(r["timestamp"], r["road_id"]) for r in pages]
+        assert keys == sorted(keys, reverse=True) and len(set(keys)) == len(keys)
+
+        assert client.post("/api/search", json={"cursor": "not-a-cursor"}).status_code == 400
+        assert client.post("/api/search", json={"limit": None}).status_code == 422
+    finally:
+        set_store(None)
+        asyncio.run(store.close())
+
+
+def test_search_rejects_tampered_mongo_cursors_and_the_bucket_layout(client):
+    from bson import ObjectId
+
+    from src.api.logic import decode_search_cursor, encode_search_cursor
+    from src.db.mongo_store import MongoStore
+    from src.db.storage import set_store
+
+    ts = datetime(2024, 2, 1)
+    set_store(MongoStore("document"))
+    try:
+        key = str(ObjectId())
+        assert decode_search_cursor(encode_search_cursor(ts, key)) == (ts, key)
+        tampered = encode_search_cursor(ts, "AIR_1")
+        with pytest.raises(ValueError):
+            decode_search_cursor(tampered)
+        assert client.post("/api/search", json={"cursor": tampered}).status_code == 400
+        streamed = client.post(
+            "/api/search", json={"cursor": tampered, "limit": None}, headers={"Accept": "application/x-ndjson"}
+        )
+        assert streamed.status_code == 400
+
+        # Buckets can't page on single readings: a clear error, not empty pages
+        set_store(MongoStore("bucket"))
+        response = client.post("/api/search", json={"limit": 10})
+        assert response.status_code == 501 and "STORAGE_LAYOUT=document" in response.json()["detail"]
+        streamed = client.post("/api/search", json={"limit": None}, headers={"Accept": "application/x-ndjson"})
+        assert streamed.status_code == 501
+    finally:
+        set_store(None)
+
+
+def test_segments_by_bbox_and_radius_with_latest_congestion(tmp_path, client):
+    import asyncio
+
+    from src.db.sqlite_store import SQLiteStore
+    from src.db.storage import set_store
+
+    store = SQLiteStore(tmp_path / "traffic.db")
+    segments = [
+        {"road_id": "AIR_1", "road_name": "Airport Road", "segment_name": "T2", "lat": 19.0896, "lon": 72.8656},
+        {"road_id": "BKC_2", "road_name": "BKC Road", "segment_name": "G Block", "lat": 19.0660, "lon": 72.8680},
+        {"road_id": "CST_3", "road_name": "DN Road", "segment_name": "CSMT", "lat": 18.9398, "lon": 72.8355},
+    ]
+    readings = [
+        {"road_id": s["road_id"], "timestamp": datetime(2024, 2, 1, h), "hour": h, "day_of_week": 3,
+         "congestion_level": h / 10}
+        for s in segments for h in range(3)
+    ]
+    asyncio.run(store.upsert_segments(segments))
+    asyncio.run(store.insert_readings(readings))
+    set_store(store)
+    try:
+        response = client.get(
+            "/api/segments/bbox",
+            params={"min_lat": 19.0, "min_lon": 72.8, "max_lat": 19.2, "max_lon": 72.9},
+        )
+        assert response.status_code == 200
+        body = response.json()
+        assert [s["road_id"] for s in body] == ["AIR_1", "BKC_2"]
+        assert body[0]["congestion_pct"] == 20.0
+        assert body[0]["congestion_time"] == "2024-02-01T02:00:00"
+
+        near = client.get(
+            "/api/segments/near", params={"lat": 19.0896, "lon": 72.8656, "radius_km": 5, "with_congestion": False}
+        ).json()
+        assert [s["road_id"] for s in near] == ["AIR_1", "BKC_2"]
+        assert near[0]["distance_km"] == 0 and 2.5 < near[1]["distance_km"] < 2.7
+        assert near[0]["congestion_pct"] is None
+
+        bad = client.get("/api/segments/bbox", params={"min_lat": 19.2, "min_lon": 72.8, "max_lat": 19.0, "max_lon": 72.9})
+        assert bad.status_code == 422
+    finally:
+        set_store(None)
+        asyncio.run(store.close())
+
+
+def test_segment_hourly_profile(tmp_path, client):
+    import asyncio
+
+    from src.db.sqlite_store import SQLiteStore
+    from src.db.storage import set_store
+
+    store = SQLiteStore(tmp_path / "traffic.db")
+    readings = [
+        {"road_id": "AIR_1", "timestamp": datetime(2024, 2, d, h), "hour": h, "congestion_level": (d + h % 2) / 10}
+        for d in range(1, 5) for h in range(24)
+    ]
+    asyncio.run(store.insert_readings(readings))
+    set_store(store)
+    try:
+        body = client.get("/api/segments/AIR_1/profile", params={"start": "2024-02-02T00:00:00"}).json()
+        assert body["total_readings"] == 72
+        hour = body["hours"][1]
+        assert hour["readings"] == 3
+        assert (hour["min_pct"], hour["mean_pct"], hour["max_pct"]) == (30.0, 40.0, 50.0)
+        assert 35 <= hour["p50_pct"] <= 45
+
+        assert client.get("/api/segments/NOPE/profile").json()["hours"][0]["mean_pct"] is None
+        assert client.get(
+            "/api/segments/AIR_1/profile", params={"start": "2024-02-03", "end": "2024-02-02"}
+        ).status_code == 422
+    finally:
+        set_store(None)
+        asyncio.run(store.close())
@@ -0,0 +1,100 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import pandas as pd
+
+from src.db.buckets import BUCKET_FIELDS, build_bucket_docs, fetch_bucket_history, merge_bucket_docs, unpack_buckets
+
+
+def _readings(road_ids=("AIR_1", "BKC_2"), hours=60, seed=0):
+    rng = np.random.default_rng(seed)
+    frames = []
+    for road_id in road_ids:
+        # Half-past readings that straddle UTC day boundaries
+        ts = pd.date_range("2024-02-01 13:30", periods=hours, freq="h")
+        df = pd.DataFrame({"road_id": road_id, "timestamp": ts})
+        df["hour"] = ts.hour
+        df["day_of_week"] = ts.dayofweek
+        df["congestion_level"] = rng.random(hours)
+        df["recent_incident_count"] = rng.integers(0, 4, hours)
+        df["congestion_band"] = np.where(df["congestion_level"] > 0.5, "Heavy", "Light")
+        frames.append(df)
+    return pd.concat(frames).sample(frac=1, random_state=seed).reset_index(drop=True)
+
+
+def test_one_bucket_per_road_per_day_with_summaries():
+    df = _readings()
+    docs = build_bucket_docs(df)
+
+    assert len(docs) == 2 * 4            # 60 h from 13:30 spans 4 UTC days
+    assert sum(d["n"] for d in docs) == len(df)
+    for doc in docs:
+        assert len(doc["o"]) == len(doc[BUCKET_FIELDS["congestion_level"]]) == doc["n"]
+        assert doc["o"] == sorted(doc["o"])
+        assert doc["s"]["cl"]["mn"] == min(doc["cl"])
+        assert doc["s"]["cl"]["mx"] == max(doc["cl"])
+        assert "road_name" not in doc and "cb" in doc
+
+
+def test_unpack_buckets_round_trips_readings():
+    df = _readings()
+    back = unpack_buckets(build_bucket_docs(df))
+
+    for road_id, expected in df.groupby("road_id"):
+        expected = expected.sort_values("timestamp").reset_index(drop=True)
+        got = back[back["road_id"] == road_id].reset_index(drop=True)
+        pd.testing.assert_frame_equal(got[expected.columns], expected, check_dtype=False)
+
+
+def test_reingesting_part_of_a_day_merges_into_the_stored_bucket():
+    df = _readings(road_ids=("AIR_1",), hours=10)   # 13:30 … 22:30 on one day
+    df = df.sort_values("timestamp").reset_index(drop=True)
+    stored = build_bucket_docs(df.iloc[:6])
+    later = df.iloc[4:].copy()
+    later.loc[later.index[0], "congestion_level"] = 0.99   # 17:30 re-measured
+
+    merged = merge_bucket_docs(stored, build_bucket_docs(later))
+    assert len(merged) == 1 and merged[0]["n"] == 10
+    back = unpack_buckets(merged)
+    assert back["timestamp"].tolist() == df["timestamp"].tolist()
+    assert back.loc[4, "congestion_level"] == 0.99
+    assert back["hour"].tolist() == df["hour"].tolist()
+
+
+class _Cursor:
+    def __init__(self, docs):
+        self.docs = docs
+
+    def sort(self, key, direction):
+        self.docs.sort(key=lambda d: d[key], reverse=direction < 0)
+        return self
+
+    def batch_size(self, n):
+        return self
+
+    def __aiter__(self):
+        async def gen():
+            for doc in self.docs:
+                yield doc
+        return gen()
+
+
+class _Buckets:
+    def __init__(self, docs):
+        self.docs = docs
+
+    def find(self, query, projection):
+        return _Cursor([d for d in self.docs if d["r"] == query["r"] and d["d"] <= query["d"]["$lte"]])
+
+
+def test_bucket_history_accepts_tz_aware_end_timestamps():
+    df = _readings(road_ids=("AIR_1",))
+    buckets = _Buckets(build_bucket_docs(df))
+    naive = datetime(2024, 2, 2, 20, 0)
+    aware = datetime(2024, 2, 3, 1, 30, tzinfo=timezone(timedelta(hours=5, minutes=30)))
+
+    expected = asyncio.run(fetch_bucket_history(buckets, "AIR_1", naive, 12))
+    got = asyncio.run(fetch_bucket_history(buckets, "AIR_1", aware, 12))
+    assert len(got) == 12 and got["timestamp"].iloc[-1] == pd.Timestamp("2024-02-02 19:30")
+    pd.testing.assert_frame_equal(got, expected)
@@ -0,0 +1,84 @@
+import math
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+from src.api.events import TrafficEvent
+from src.data.event_impact import EVENT_FEATURE_COLS, EVENT_TYPE_IMPACT, compute_event_impact
+from src.data.preprocessor import add_event_features
+
+
+def _reference_features(lat, lon, ts, events):
+    """The original per-row rules, one event at a time."""
+    nearby = []
+    for e in events:
+        p1, p2 = math.radians(lat), math.radians(e.latitude)
+        a = (math.sin((p2 - p1) / 2) ** 2
+             + math.cos(p1) * math.cos(p2) * math.sin(math.radians(e.longitude - lon) / 2) ** 2)
+        d = 6371 * 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
+        if d <= 10 and e.start_time <= ts and (e.end_time is None or e.end_time >= ts):
+            nearby.append((e, d))
+    score = 0.0
+    flags = [0, 0, 0]
+    for e, d in nearby:
+        size = min(e.expected_attendance / 1000, 5.0) if e.expected_attendance else (
+            min(e.venue_capacity / 1000, 5.0) if e.venue_capacity else 1.0)
+        score += EVENT_TYPE_IMPACT.get(e.event_type, 0.5) * max(0, 1 - d / 10) * size
+        if d <= 5:
+            flags[0] |= e.event_type == "concert"
+            flags[1] |= e.event_type == "sports"
+            flags[2] |= e.event_type in ("concert", "sports", "festival")
+    return [min(score, 10.0), flags[0], flags[1], len(nearby), flags[2]]
+
+
+def _events(n=40, seed=0):
+    rng = np.random.default_rng(seed)
+    types = list(EVENT_TYPE_IMPACT) + ["unknown"]
+    base = datetime(2024, 2, 1)
+    events = []
+    for i in range(n):
+        start = base + timedelta(minutes=int(rng.integers(-600, 3000)))
+        end = None if i % 5 == 0 else start + timedelta(minutes=int(rng.integers(30, 900)))
+        events.append(TrafficEvent(
+            f"e{i}", f"e{i}", types[i % len(types)],
+            19.0 + rng.uniform(-0.12, 0.12), 72.85 + rng.uniform(-0.12, 0.12),
+            start, end,
+            int(rng.integers(100, 9000)) if i % 3 == 0 else None,
+            int(rng.integers(100, 9000)) if i % 3 == 1 else None,
+            "", "test",
+        ))
+    return events
+
+
+def test_matrix_matches_the_per_row_rules_at_hourly_resolution():
+    events = _events()
+    road_ids = ["AIR_1", "BKC_2", "CST_3", "FAR_4"]
+    lats = [19.0, 19.05, 18.95, 21.0]
+    lons = [72.85, 72.87, 72.80, 75.0]
+    matrix = compute_event_impact(road_ids, lats, lons, events, datetime(2024, 2, 1), datetime(2024, 2, 3))
+    assert matrix.values.shape == (4, 49, len(EVENT_FEATURE_COLS))
+
+    for s, (lat, lon) in enumerate(zip(lats, lons)):
+        for h in range(matrix.hours):
+            ts = datetime(2024, 2, 1) + timedelta(hours=h)
+            np.testing.assert_allclose(matrix.values[s, h], _reference_features(lat, lon, ts, events), atol=1e-5)
+    assert matrix.values[3].sum() == 0   # no events within 10 km
+    assert matrix.values[:3, :, 3].max() > 1
+
+
+def test_add_event_features_gathers_per_row_and_zeros_outside_the_matrix():
+    events = _events()
+    ts = pd.date_range("2024-02-01 06:00", periods=24, freq="h")
+    rows = pd.DataFrame({"road_id": "AIR_1", "timestamp": ts, "lat": 19.0, "lon": 72.85})
+
+    out = add_event_features(rows, events)
+    expected = [_reference_features(19.0, 72.85, t.to_pydatetime(), events) for t in ts]
+    np.testing.assert_allclose(out[EVENT_FEATURE_COLS].to_numpy(dtype=float), expected, atol=1e-5)
+    assert out["event_density"].dtype == np.int64
+
+    matrix = compute_event_impact(["AIR_1"], [19.0], [72.85], events, datetime(2024, 2, 1, 12), datetime(2024, 2, 1, 13))
+    gathered = add_event_features(rows, impact=matrix)[EVENT_FEATURE_COLS].to_numpy(dtype=float)
+    np.testing.assert_allclose(gathered[6:8], expected[6:8], atol=1e-5)
+    assert not gathered[:6].any() and not gathered[8:].any()
+    assert not add_event_features(rows.assign(road_id="NOPE"), impact=matrix)[EVENT_FEATURE_COLS].to_numpy().any()
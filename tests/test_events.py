@@ -0,0 +1,261 @@
+import asyncio
+from datetime import datetime
+
+import pytest
+from aiohttp import web
+
+from src.api.events import (
+    EventAPIClient,
+    EventDiskCache,
+    EventFetchError,
+    EventTileCache,
+    GoogleMapsClient,
+    TrafficEvent,
+    TrafficEventManager,
+)
+from src.db.geo import geohash, geohash_cell
+
+
+def test_client_session_reuses_one_pooled_connection():
+    peers = []
+
+    async def handler(request):
+        peers.append(request.transport.get_extra_info("peername"))
+        return web.json_response({"ok": True})
+
+    async def run():
+        app = web.Application()
+        app.router.add_get("/ping", handler)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        try:
+            client = EventAPIClient("key", f"http://127.0.0.1:{port}")
+            await client.open()
+            session = client.session
+            await client.open()   # idempotent
+            assert client.session is session
+            results = [await client._make_request("ping", {"q": None}) for _ in range(3)]
+            await client.close()
+            assert client.session is None and session.closed
+            return results
+        finally:
+            await runner.cleanup()
+
+    assert asyncio.run(run()) == [{"ok": True}] * 3
+    assert len(set(peers)) == 1   # keep-alive: every request on the same connection
+
+
+def test_manager_opens_and_closes_every_client():
+    manager = TrafficEventManager()
+    manager.clients = [EventAPIClient("a", "http://a"), EventAPIClient("b", "http://b")]
+
+    async def run():
+        async with manager:
+            assert all(c.session is not None and not c.session.closed for c in manager.clients)
+        return [c.session for c in manager.clients]
+
+    assert asyncio.run(run()) == [None, None]
+
+
+def _event(event_id, lat, lon):
+    return TrafficEvent(event_id, event_id, "concert", lat, lon, datetime(2024, 2, 1), None, None, None, "", "test")
+
+
+def test_tile_cache_coalesces_misses_and_serves_stale_while_revalidating():
+    manager = TrafficEventManager(tile_cache=EventTileCache(ttl_s=60, stale_s=600))
+    calls = []
+
+    async def upstream(lat, lon, radius_km, hours_ahead):
+        calls.append((lat, lon, radius_km))
+        await asyncio.sleep(0.01)
+        return [_event(f"e{len(calls)}", 19.0762, 72.8775), _event("far", 19.3, 72.9)]
+
+    manager._fetch_upstream = upstream
+
+    async def run():
+        # Points a few metres apart share one tile and one in-flight fetch
+        first = await asyncio.gather(*(
+            manager.get_events_near_location(19.0760 + i * 1e-5, 72.8777, radius_km=10) for i in range(5)
+        ))
+        assert [[e.event_id for e in r] for r in first] == [["e1"]] * 5
+
+        # Past the TTL: the stale result is served and one refetch starts
+        for key, (fetched, events) in list(manager.tile_cache._entries.items()):
+            manager.tile_cache._entries[key] = (fetched - 120, events)
+        stale = await manager.get_events_near_location(19.0760, 72.8777, radius_km=10)
+        await asyncio.sleep(0.05)
+        fresh = await manager.get_events_near_location(19.0760, 72.8777, radius_km=10)
+        return stale, fresh
+
+    stale, fresh = asyncio.run(run())
+    assert [e.event_id for e in stale] == ["e1"] and [e.event_id for e in fresh] == ["e2"]
+    assert len(calls) == 2 and calls[0][2] == 15   # 10 km + half a tile → 15 km bucket
+    stats = manager.tile_cache.stats()
+    assert (stats["misses"], stats["coalesced"], stats["stale_hits"], stats["upstream_calls"]) == (5, 4, 1, 2)
+
+
+def test_geohash_matches_the_reference_encoding():
+    assert geohash(57.64911, 10.40744, 11) == "u4pruydqqvj"
+    lat, lon, height, width = geohash_cell("te7ud2")
+    assert abs(lat - 19.0750) < height and abs(lon - 72.8778) < width
+
+
+def test_google_place_types_are_fetched_concurrently_with_pagination(monkeypatch):
+    monkeypatch.setattr("src.api.events.GOOGLE_PAGE_TOKEN_DELAY_S", 0)
+    client = GoogleMapsClient("key", concurrency=3)
+    in_flight, peak, requests = 0, 0, []
+
+    def place(place_id):
+        return {"place_id": place_id, "name": place_id, "geometry": {"location": {"lat": 19.0, "lng": 72.8}}}
+
+    async def fake_request(endpoint, params):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        requests.append(params)
+        if params.get("type") == "stadium":
+            return {"results": [place("wankhede")], "next_page_token": "stadium-2"}
+        if params.get("pagetoken") == "stadium-2":
+            return {"results": [place("brabourne")]}
+        # Malls also list the stadium: kept once, classified by the first type
+        return {"results": [place("wankhede"), place(params["type"])] if params.get("type") == "shopping_mall" else []}
+
+    client._make_request = fake_request
+    events = asyncio.run(client.get_events_and_attractions(19.0, 72.8))
+
+    assert peak == 3
+    assert len(requests) == len(GoogleMapsClient.EVENT_TYPES) + 1
+    by_id = {e.event_id: e.event_type for e in events}
+    assert by_id == {"google_wankhede": "sports", "google_brabourne": "sports", "google_shopping_mall": "shopping"}
+
+
+def test_refresher_publishes_versioned_snapshots_read_without_upstream_calls(tmp_path):
+    from src.api.event_refresher import EventRefresher
+    from src.db.sqlite_store import SQLiteStore
+
+    store = SQLiteStore(tmp_path / "traffic.db")
+    asyncio.run(store.upsert_segments([
+        {"road_id": "AIR_1", "road_name": "Airport Road", "segment_name": "T2", "lat": 19.0896, "lon": 72.8656},
+        {"road_id": "AIR_2", "road_name": "Airport Road", "segment_name": "T1", "lat": 19.0897, "lon": 72.8657},
+        {"road_id": "CST_3", "road_name": "DN Road", "segment_name": "CSMT", "lat": 18.9398, "lon": 72.8355},
+    ]))
+    manager = TrafficEventManager(tile_cache=EventTileCache())
+    calls = []
+
+    async def upstream(lat, lon, radius_km, hours_ahead):
+        calls.append((round(lat, 2), round(lon, 2)))
+        if len(calls) > 2:
+            raise RuntimeError("upstream down")
+        return [_event(f"near_{round(lat, 2)}", lat, lon)]
+
+    manager._fetch_upstream = upstream
+    refresher = EventRefresher(manager)
+
+    snapshot = asyncio.run(refresher.refresh(store))
+    assert snapshot.version == 1 and len(snapshot.by_tile) == 2 and len(calls) == 2   # one fetch per tile
+    assert [e.event_id for e in refresher.events_near(19.0896, 72.8656)] == ["near_19.09"]
+    assert refresher.events_near(28.6, 77.2) == []   # unknown tile: no upstream call
+    assert len(calls) == 2
+
+    # A failed round keeps the previous events of each tile
+    snapshot = asyncio.run(refresher.refresh(store))
+    assert snapshot.version == 2 and refresher.failures == 2
+    assert [e.event_id for e in refresher.events_near(18.9398, 72.8355)] == ["near_18.94"]
+    asyncio.run(store.close())
+
+
+def test_failed_upstream_lookups_are_not_written_to_the_disk_cache(tmp_path):
+    cache = EventDiskCache(tmp_path)
+    manager = TrafficEventManager(disk_cache=cache, tile_cache=EventTileCache())
+    outage = [True]
+
+    async def upstream(lat, lon, radius_km, hours_ahead):
+        if outage[0]:
+            raise EventFetchError("eventbrite down", [_event("partial", lat, lon)])
+        return [_event("full", lat, lon)]
+
+    manager._fetch_upstream = upstream
+
+    partial = asyncio.run(manager.get_events_for_tile(19.076, 72.878))
+    assert [e.event_id for e in partial] == ["partial"]
+    assert not list(tmp_path.iterdir())   # the outage is not cached
+
+    outage[0] = False
+    assert [e.event_id for e in asyncio.run(manager.get_events_for_tile(19.076, 72.878))] == ["full"]
+    assert [e.event_id for e in cache.get("19.08_72.88_r15")] == ["full"]
+
+
+def test_http_errors_raise_instead_of_looking_like_no_events():
+    async def handler(request):
+        return web.Response(status=503)
+
+    async def run():
+        app = web.Application()
+        app.router.add_get("/events", handler)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        try:
+            async with EventAPIClient("key", f"http://127.0.0.1:{port}") as client:
+                await client._make_request("events", {})
+        finally:
+            await runner.cleanup()
+
+    with pytest.raises(EventFetchError):
+        asyncio.run(run())
+
+
+def test_tile_cache_never_caches_a_failed_fetch():
+    cache = EventTileCache(ttl_s=60, stale_s=0)
+    results = [[_event("e1", 19.0, 72.8)], RuntimeError("down"), RuntimeError("down"), []]
+
+    async def fetch():
+        result = results.pop(0)
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    async def run():
+        key = ("te7ud2", 15, 24)
+        first = await cache.get(key, fetch)
+        cache._entries[key] = (cache._entries[key][0] - 120, first)   # expired
+        during_outage = await cache.get(key, fetch)   # previous entry kept
+        with pytest.raises(RuntimeError):
+            await cache.get(("te7ud3", 15, 24), fetch)   # nothing to fall back on
+        assert ("te7ud3", 15, 24) not in cache._entries
+        recovered = await cache.get(key, fetch)
+        return first, during_outage, recovered
+
+    first, during_outage, recovered = asyncio.run(run())
+    assert during_outage == first and recovered == []
+    assert cache.stats()["errors"] == 2
+
+
+def test_public_helpers_return_the_providers_that_answered(monkeypatch):
+    from src.api.events import EventbriteClient, get_traffic_events
+
+    eventbrite, google = EventbriteClient("key"), GoogleMapsClient("key")
+
+    async def eventbrite_down(*args, **kwargs):
+        raise EventFetchError("events/search: 503")
+
+    async def google_up(latitude, longitude, radius):
+        return [_event("wankhede", 18.9389, 72.8258)]
+
+    eventbrite.get_events = eventbrite_down
+    google.get_events_and_attractions = google_up
+    manager = TrafficEventManager(tile_cache=EventTileCache())
+    manager.clients = [eventbrite, google]
+    monkeypatch.setattr("src.api.events.event_manager", manager)
+
+    near_road = asyncio.run(manager.get_events_impacting_road(18.9390, 72.8260, "Marine Drive"))
+    assert [e.event_id for e in near_road] == ["wankhede"]
+    assert [e["event_id"] for e in asyncio.run(get_traffic_events(18.9390, 72.8260))] == ["wankhede"]
+    assert manager.tile_cache.stats()["entries"] == 0   # still not cached
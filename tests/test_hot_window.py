@@ -0,0 +1,129 @@
+import asyncio
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.data.preprocessor import RAW_FEATURE_COLS
+from src.db.hot_window import HotWindowCache
+from src.db.sqlite_store import SQLiteStore
+
+
+def _readings(start="2024-02-01 00:30", hours=40, seed=0):
+    rng = np.random.default_rng(seed)
+    frames = []
+    for road_id in ("AIR_1", "BKC_2"):
+        ts = pd.date_range(start, periods=hours, freq="h")
+        df = pd.DataFrame({"road_id": road_id, "timestamp": ts, "hour": ts.hour, "day_of_week": ts.dayofweek})
+        for col in RAW_FEATURE_COLS:
+            df[col] = rng.random(hours)
+        frames.append(df)
+    return pd.concat(frames, ignore_index=True)
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = SQLiteStore(tmp_path / "traffic.db")
+    asyncio.run(store.insert_readings(_readings().to_dict(orient="records")))
+    yield store
+    asyncio.run(store.close())
+
+
+def _same(a, b):
+    np.testing.assert_array_equal(a.timestamps, b.timestamps)
+    np.testing.assert_array_equal(a.raw, b.raw)
+    np.testing.assert_array_equal(a.hour, b.hour)
+
+
+def test_ring_serves_recent_windows_and_falls_back_for_old_ones(store):
+    cache = HotWindowCache(capacity=30)
+    asyncio.run(cache.load(store))
+    assert cache.watermark == datetime(2024, 2, 2, 15, 30)
+
+    for end in (datetime(2024, 2, 2, 16), datetime(2024, 2, 2, 15, 30), datetime(2024, 2, 2, 12)):
+        _same(cache.window("AIR_1", end, 24), asyncio.run(store.fetch_history_block("AIR_1", end, 24)))
+
+    # Only 30 of 40 readings are cached: windows reaching further back miss
+    assert cache.window("AIR_1", datetime(2024, 2, 1, 23), 24) is None
+    assert cache.window("NOPE", datetime(2024, 2, 2, 16), 24) is None
+    assert (cache.hits, cache.misses) == (3, 2)
+
+
+def test_refresh_appends_new_readings_and_reloads_after_a_gap(store):
+    cache = HotWindowCache(capacity=30, lookback_s=3600)
+    asyncio.run(cache.load(store))
+
+    newer = _readings(start="2024-02-02 16:30", hours=5, seed=1)
+    asyncio.run(store.insert_readings(newer.to_dict(orient="records")))
+    asyncio.run(cache.refresh(store))
+    end = datetime(2024, 2, 2, 21)
+    assert cache.watermark == datetime(2024, 2, 2, 20, 30)
+    _same(cache.window("BKC_2", end, 24), asyncio.run(store.fetch_history_block("BKC_2", end, 24)))
+
+    # A backfilled half-hour reading inside the ring forces a reload
+    late = _readings(start="2024-02-02 20:00", hours=1, seed=2)
+    asyncio.run(store.insert_readings(late.to_dict(orient="records")))
+    asyncio.run(cache.refresh(store))
+    _same(cache.window("AIR_1", end, 24), asyncio.run(store.fetch_history_block("AIR_1", end, 24)))
+
+
+class _MockCursor:
+    def __init__(self, cursor):
+        self.cursor = cursor
+
+    def sort(self, *args):
+        self.cursor = self.cursor.sort(*args)
+        return self
+
+    def limit(self, n):
+        self.cursor = self.cursor.limit(n)
+        return self
+
+    async def to_list(self, length):
+        return list(self.cursor)
+
+    def __aiter__(self):
+        async def gen():
+            for doc in self.cursor:
+                yield doc
+        return gen()
+
+
+class _MockCollection:
+    """Motor's find() over mongomock; aggregations are not expected."""
+
+    def __init__(self, collection):
+        self.collection = collection
+
+    def find(self, *args):
+        return _MockCursor(self.collection.find(*args))
+
+    def aggregate(self, pipeline, **kwargs):
+        raise AssertionError(f"unexpected aggregation: {pipeline}")
+
+
+def test_mongo_latest_blocks_read_each_road_on_its_index(store, monkeypatch):
+    mongomock = pytest.importorskip("mongomock")
+    from src.db.mongo_store import MongoStore
+
+    db = mongomock.MongoClient().db
+    records = _readings().to_dict(orient="records")
+    db.traffic_readings.insert_many([{**r, "timestamp": r["timestamp"].to_pydatetime()} for r in records])
+    db.road_segments.insert_many([{"road_id": "AIR_1"}, {"road_id": "BKC_2"}, {"road_id": "NEW_3"}])
+    monkeypatch.setattr("src.db.mongo_store.traffic_readings", _MockCollection(db.traffic_readings))
+    monkeypatch.setattr("src.db.mongo_store.road_segments", _MockCollection(db.road_segments))
+
+    got = asyncio.run(MongoStore("document").latest_blocks(5, road_ids=["BKC_2", "NEW_3"]))
+    expected = asyncio.run(store.latest_blocks(5, road_ids=["BKC_2"]))
+    assert [b.road_id for b in got] == ["BKC_2"]
+    _same(got[0], expected[0])
+
+    # Startup load: every road listed in road_segments, no full-collection $group
+    cache = HotWindowCache(capacity=30)
+    asyncio.run(cache.load(MongoStore("document")))
+    reference = HotWindowCache(capacity=30)
+    asyncio.run(reference.load(store))
+    assert sorted(cache.rings) == sorted(reference.rings) == ["AIR_1", "BKC_2"]
+    for road_id in ("AIR_1", "BKC_2"):
+        _same(cache.latest(road_id), reference.latest(road_id))
@@ -0,0 +1,67 @@
+import asyncio
+
+import httpx
+import pytest
+from fastapi import HTTPException
+
+from src.api.llm_client import LLMClient
+
+
+def _completion(content):
+    return {"choices": [{"message": {"role": "assistant", "content": content}}]}
+
+
+def test_calls_share_one_pooled_client_and_record_latency():
+    seen = []
+
+    def handler(request):
+        seen.append((request.url.path, request.headers["authorization"]))
+        return httpx.Response(200, json=_completion(f"reply {len(seen)}"))
+
+    llm = LLMClient(api_key="key", base_url="https://groq.test/v1", transport=httpx.MockTransport(handler))
+
+    async def run():
+        await llm.open()
+        client = llm.client
+        await llm.open()   # idempotent
+        replies = await asyncio.gather(*(
+            llm.chat([{"role": "user", "content": "hi"}], 0.4, 50, caller="chat") for _ in range(3)
+        ))
+        assert llm.client is client
+        await llm.close()
+        return replies, client
+
+    replies, client = asyncio.run(run())
+    assert sorted(replies) == ["reply 1", "reply 2", "reply 3"]
+    assert client.is_closed and llm.client is None
+    assert seen == [("/v1/chat/completions", "Bearer key")] * 3
+    stats = llm.stats()
+    assert not stats["open"] and stats["calls"]["chat"]["count"] == 3 and stats["calls"]["chat"]["failed"] == 0
+
+
+def test_errors_surface_as_http_exceptions_and_count_as_failed():
+    def handler(request):
+        if b"timeout" in request.content:
+            raise httpx.ReadTimeout("slow", request=request)
+        if b"empty" in request.content:
+            return httpx.Response(200, json=_completion(""))
+        return httpx.Response(429, text="rate limited")
+
+    llm = LLMClient(api_key="key", transport=httpx.MockTransport(handler))
+
+    async def call(text):
+        with pytest.raises(HTTPException) as exc:
+            await llm.chat([{"role": "user", "content": text}], 0.4, 50, caller="mitigation")
+        return exc.value.status_code
+
+    async def run():
+        codes = [await call("timeout"), await call("limit"), await call("empty")]
+        await llm.close()
+        return codes
+
+    assert asyncio.run(run()) == [504, 429, 502]
+    assert llm.stats()["calls"]["mitigation"]["failed"] == 2   # an empty reply is still a completed call
+
+    with pytest.raises(HTTPException) as exc:
+        asyncio.run(LLMClient(api_key="").chat([], 0.4, 50))
+    assert exc.value.status_code == 500
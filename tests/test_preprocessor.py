@@ -0,0 +1,160 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.config import FEATURE_COLS, INPUT_WINDOW, FORECAST_HORIZON, NUM_FEATURES
+from src.data.feature_cache import FeatureCache, feature_cache_key
+from src.data.preprocessor import (
+    RAW_FEATURE_COLS,
+    add_cyclic_features,
+    build_feature_matrix,
+    create_segment_windows,
+    create_sequences,
+    prepare_inference_arrays,
+)
+
+
+def _synthetic_readings(road_ids=("AIR_1", "BKC_2", "WEH_3"), hours=48, seed=0):
+    rng = np.random.default_rng(seed)
+    frames = []
+    for road_id in road_ids:
+        ts = pd.date_range("2024-02-01", periods=hours, freq="h")
+        df = pd.DataFrame({"road_id": road_id, "timestamp": ts})
+        df["hour"] = ts.hour
+        df["day_of_week"] = ts.dayofweek
+        for col in FEATURE_COLS:
+            if col not in df and not col.endswith(("_sin", "_cos")):
+                df[col] = rng.random(hours)
+        frames.append(df)
+    # Shuffle so build_feature_matrix has to do the sorting
+    return pd.concat(frames).sample(frac=1, random_state=seed).reset_index(drop=True)
+
+
+def test_feature_matrix_offsets_cover_sorted_segments():
+    features = build_feature_matrix(_synthetic_readings())
+
+    assert features.scaled.shape == (3 * 48, NUM_FEATURES)
+    assert features.segment_ids == ["AIR_1", "BKC_2", "WEH_3"]
+    np.testing.assert_array_equal(features.offsets, [0, 48, 96, 144])
+
+
+def test_segment_windows_match_per_segment_sequences():
+    features = build_feature_matrix(_synthetic_readings())
+    X, Y = create_segment_windows(features.scaled, features.offsets)
+
+    per_segment = [
+        create_sequences(features.scaled[a:b])
+        for a, b in zip(features.offsets[:-1], features.offsets[1:])
+    ]
+    np.testing.assert_array_equal(X, np.concatenate([x for x, _ in per_segment]))
+    np.testing.assert_array_equal(Y, np.concatenate([y for _, y in per_segment]))
+    assert X.shape[1:] == (NUM_FEATURES, INPUT_WINDOW)
+    assert Y.shape[1:] == (FORECAST_HORIZON,)
+
+
+def test_feature_cache_round_trip(tmp_path):
+    csv_path = tmp_path / "readings.csv"
+    _synthetic_readings().to_csv(csv_path, index=False)
+    features = build_feature_matrix(pd.read_csv(csv_path, parse_dates=["timestamp"]))
+
+    cache = FeatureCache(tmp_path / "cache")
+    key = feature_cache_key(csv_path)
+    assert cache.load(key) is None
+
+    cache.store(key, features, csv_path)
+    hit = cache.load(key)
+
+    assert hit is not None
+    assert isinstance(hit.scaled, np.memmap)
+    np.testing.assert_array_equal(hit.scaled, features.scaled)
+    np.testing.assert_array_equal(hit.offsets, features.offsets)
+    np.testing.assert_array_equal(hit.scaler.min_vals, features.scaler.min_vals)
+    assert hit.segment_ids == features.segment_ids
+
+
+def test_feature_cache_key_tracks_file_contents(tmp_path):
+    csv_path = tmp_path / "readings.csv"
+    csv_path.write_text("a,b\n1,2\n")
+    key = feature_cache_key(csv_path)
+    csv_path.write_text("a,b\n1,3\n")
+    assert feature_cache_key(csv_path) != key
+
+
+def test_inference_arrays_match_dataframe_path():
+    df = _synthetic_readings(road_ids=("AIR_1",), hours=INPUT_WINDOW)
+    scaler = build_feature_matrix(_synthetic_readings()).scaler
+
+    expected = scaler.transform(
+        add_cyclic_features(df)[FEATURE_COLS].values.astype(np.float32)
+    ).T[np.newaxis]
+    got = prepare_inference_arrays(
+        df[RAW_FEATURE_COLS].to_numpy(np.float32),
+        df["hour"].to_numpy(),
+        df["day_of_week"].to_numpy(),
+        scaler,
+    )
+
+    assert got.shape == (1, NUM_FEATURES, INPUT_WINDOW)
+    np.testing.assert_allclose(got, expected, rtol=1e-6, atol=1e-6)
+
+
+def test_inference_arrays_fill_preallocated_batch():
+    df = _synthetic_readings(road_ids=("AIR_1",), hours=INPUT_WINDOW)
+    scaler = build_feature_matrix(_synthetic_readings()).scaler
+    raw = df[RAW_FEATURE_COLS].to_numpy(np.float32)
+    hour, dow = df["hour"].to_numpy(), df["day_of_week"].to_numpy()
+
+    out = np.empty((3, NUM_FEATURES, INPUT_WINDOW), dtype=np.float32)
+    got = prepare_inference_arrays(
+        np.stack([raw] * 3), np.stack([hour] * 3), np.stack([dow] * 3), scaler, out=out
+    )
+
+    assert got is out
+    single = prepare_inference_arrays(raw, hour, dow, scaler)
+    for b in range(3):
+        np.testing.assert_array_equal(out[b], single[0])
+
+
+def test_parallel_segment_windows_match_serial(tmp_path):
+    features = build_feature_matrix(_synthetic_readings(hours=60))
+    X_serial, Y_serial = create_segment_windows(features.scaled, features.offsets)
+    X_par, Y_par = create_segment_windows(features.scaled, features.offsets, workers=2)
+
+    np.testing.assert_array_equal(X_par, X_serial)
+    np.testing.assert_array_equal(Y_par, Y_serial)
+
+    # Memory-mapped input (as served by the feature cache) is read in place
+    cache = FeatureCache(tmp_path)
+    cache.store("k", features, "synthetic")
+    X_mm, _ = create_segment_windows(cache.load("k").scaled, features.offsets, workers=2)
+    np.testing.assert_array_equal(X_mm, X_serial)
+
+
+def test_mongo_batches_decode_to_same_features_as_csv_path(monkeypatch):
+    bson = pytest.importorskip("bson")
+    from src.data import mongo_source
+    from src.data.mongo_source import STREAM_FIELDS, _road_features, decode_batch
+
+    df = _synthetic_readings(road_ids=("AIR_1",), hours=30).sort_values("timestamp")
+    docs = [
+        {"t": ts.to_pydatetime(), "v": [float(row[f]) for f in STREAM_FIELDS]}
+        for ts, (_, row) in zip(df["timestamp"], df.iterrows())
+    ]
+    raw = b"".join(bson.encode(d) for d in docs)
+
+    decode_all = bson.decode_all
+    with monkeypatch.context() as m:
+        # Fixed-layout batches never build per-document dicts
+        m.setattr(mongo_source.bson, "decode_all", None)
+        t, values = decode_batch(raw)
+    expected = add_cyclic_features(df)[FEATURE_COLS].to_numpy(np.float32)
+
+    np.testing.assert_array_equal(t.astype("datetime64[ms]"), df["timestamp"].to_numpy("datetime64[ms]"))
+    np.testing.assert_allclose(_road_features(values), expected, rtol=1e-6, atol=1e-6)
+
+    # A document off the layout (null value) takes the generic decoder
+    odd = bson.encode({"t": docs[0]["t"], "v": [None] * len(STREAM_FIELDS)})
+    t_odd, values_odd = decode_batch(raw + odd)
+    assert decode_all is bson.decode_all and len(t_odd) == len(t) + 1
+    np.testing.assert_array_equal(values_odd[:-1], values)
+    assert np.isnan(values_odd[-1]).all()
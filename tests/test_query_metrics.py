@@ -0,0 +1,54 @@
+from types import SimpleNamespace
+
+from src.db.index_audit import redundant_indexes, summarize_plan
+from src.db.query_metrics import CommandLatencyListener, query_shape
+
+
+def _event(request_id, command=None, micros=0):
+    command = command or {}
+    return SimpleNamespace(
+        command_name=next(iter(command), "find"),
+        command=command,
+        request_id=request_id,
+        connection_id=("localhost", 27017),
+        duration_micros=micros,
+    )
+
+
+def test_listener_groups_commands_by_shape_and_counts_slow_ones():
+    listener = CommandLatencyListener(slow_ms=50)
+    for i, (road, micros) in enumerate([("AIR_1", 2_000), ("BKC_2", 4_000), ("AIR_1", 80_000)]):
+        cmd = {"find": "traffic_readings", "filter": {"road_id": road, "timestamp": {"$lt": i}}, "sort": {"timestamp": -1}}
+        listener.started(_event(i, cmd))
+        listener.succeeded(_event(i, micros=micros))
+    listener.started(_event(99, {"ping": 1}))      # not tracked
+    listener.succeeded(_event(99, micros=1))
+
+    (row,) = listener.snapshot()
+    assert row["shape"] == query_shape("find", {
+        "find": "traffic_readings", "filter": {"road_id": "x", "timestamp": {"$lt": "y"}}, "sort": {"timestamp": -1},
+    })
+    assert '"$lt": "?"' in row["shape"] and "AIR_1" not in row["shape"]
+    assert row["count"] == 3 and row["slow"] == 1
+    assert row["max_ms"] == 80.0
+
+
+def test_plan_summary_and_redundant_index_detection():
+    explain = {"queryPlanner": {
+        "winningPlan": {"stage": "LIMIT", "inputStage": {"stage": "FETCH", "inputStage": {
+            "stage": "IXSCAN", "indexName": "road_time_idx"}}},
+        "rejectedPlans": [{"stage": "COLLSCAN"}],
+    }}
+    assert summarize_plan(explain) == {
+        "stages": ["LIMIT", "FETCH", "IXSCAN"], "indexes": ["road_time_idx"], "collscan": False,
+    }
+
+    info = {
+        "_id_": {"key": [("_id", 1)]},
+        "road_time_idx": {"key": [("road_id", 1), ("timestamp", 1)], "unique": True},
+        "road_idx": {"key": [("road_id", 1)]},
+        "time_idx": {"key": [("timestamp", 1)]},
+    }
+    assert redundant_indexes("traffic_readings", info) == [
+        {"collection": "traffic_readings", "index": "road_idx", "covered_by": "road_time_idx"},
+    ]
@@ -0,0 +1,106 @@
+import asyncio
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import pytest
+from pymongo import ReplaceOne
+
+from src.db.rollups import (
+    hist_quantile,
+    merge_summaries,
+    rollup_daily,
+    rollup_weekly,
+    summarize,
+    summary_from_doc,
+)
+
+
+def test_merged_summaries_match_a_summary_of_all_readings():
+    rng = np.random.default_rng(0)
+    hours = rng.integers(0, 24, 2000)
+    values = rng.random(2000)
+
+    merged = merge_summaries(summarize(hours[:700], values[:700]), summarize(hours[700:], values[700:]))
+    whole = summarize(hours, values)
+    for key in ("n", "min", "max", "hist"):
+        np.testing.assert_array_equal(merged[key], whole[key])
+    np.testing.assert_allclose(merged["sum"], whole["sum"])
+
+    # Histogram percentiles land within a bin width of the exact ones
+    exact = np.array([np.quantile(values[hours == h], 0.9) for h in range(24)])
+    assert np.abs(hist_quantile(whole["hist"], 0.9) - exact).max() <= 0.05
+    assert np.isnan(hist_quantile(summarize([], [])["hist"], 0.5)).all()
+
+
+class _Cursor:
+    def __init__(self, docs):
+        self.docs = docs
+
+    async def to_list(self, length):
+        return self.docs
+
+    def __aiter__(self):
+        async def gen():
+            for doc in self.docs:
+                yield doc
+        return gen()
+
+
+class _AsyncCollection:
+    """Just enough of Motor's API over a mongomock collection."""
+
+    def __init__(self, collection):
+        self.collection = collection
+
+    def find(self, *args):
+        return _Cursor(list(self.collection.find(*args)))
+
+    async def bulk_write(self, ops, ordered=True):
+        for op in ops:
+            if isinstance(op, ReplaceOne):
+                self.collection.replace_one(op._filter, op._doc, upsert=op._upsert)
+            else:
+                self.collection.delete_one(op._filter)
+
+
+def _readings(start, hours):
+    ts = pd.date_range(start, periods=hours, freq="h")
+    values = (np.arange(hours) % 10) / 10
+    return [
+        {"road_id": "AIR_1", "timestamp": t.to_pydatetime(), "hour": t.hour, "congestion_level": v}
+        for t, v in zip(ts, values)
+    ]
+
+
+def test_daily_then_weekly_rollups_are_idempotent_and_keep_every_reading():
+    mongomock = pytest.importorskip("mongomock")
+    db = mongomock.MongoClient().db
+    readings, rollups, archive = (_AsyncCollection(db[c]) for c in ("readings", "rollups", "archive"))
+    rows = _readings("2024-01-01", 24 * 16)   # Mon 1 Jan → Tue 16 Jan
+    db.readings.insert_many([dict(r) for r in rows])
+    expected = summarize([r["hour"] for r in rows[: 24 * 14]], [r["congestion_level"] for r in rows[: 24 * 14]])
+
+    cutoff = datetime(2024, 1, 15)
+    assert asyncio.run(rollup_daily(readings, rollups, "AIR_1", cutoff, archive)) == (24 * 14, 14)
+    assert db.readings.count_documents({}) == 48
+    assert db.archive.count_documents({}) == 24 * 14
+
+    # A late reading for a rolled-up day is merged; the rest are not recounted
+    late = {"road_id": "AIR_1", "timestamp": datetime(2024, 1, 3, 5, 30), "hour": 5, "congestion_level": 0.95}
+    db.readings.insert_one(dict(late))
+    assert asyncio.run(rollup_daily(readings, rollups, "AIR_1", cutoff)) == (1, 1)
+    day = db.rollups.find_one({"tier": "daily", "start": datetime(2024, 1, 3)})
+    assert day["count"] == 25 and day["max"][5] == 0.95
+
+    assert asyncio.run(rollup_weekly(rollups, "AIR_1", cutoff)) == (14, 2)
+    assert asyncio.run(rollup_weekly(rollups, "AIR_1", cutoff)) == (0, 0)
+    weeks = list(db.rollups.find({}, sort=[("start", 1)]))
+    assert [(w["tier"], w["start"], w["count"]) for w in weeks] == [
+        ("weekly", datetime(2024, 1, 1), 24 * 7 + 1),
+        ("weekly", datetime(2024, 1, 8), 24 * 7),
+    ]
+    merged = merge_summaries(summary_from_doc(weeks[0]), summary_from_doc(weeks[1]))
+    expected = merge_summaries(expected, summarize([5], [0.95]))
+    np.testing.assert_array_equal(merged["hist"], expected["hist"])
+    assert (weeks[0]["t0"], weeks[1]["t1"]) == (datetime(2024, 1, 1), datetime(2024, 1, 14, 23))
@@ -0,0 +1,57 @@
+import asyncio
+from datetime import datetime
+
+import pandas as pd
+
+from src.db.segment_stats import SegmentStatsCache, stats_update_ops
+
+
+def test_stats_update_ops_fold_bounds_and_new_counts():
+    rows = pd.DataFrame({
+        "road_id": ["AIR_1", "AIR_1", "BKC_2"],
+        "timestamp": pd.to_datetime(["2024-02-01 10:00", "2024-02-01 08:00", "2024-02-02 00:00"]),
+    })
+    ops = {op._filter["road_id"]: op._doc for op in stats_update_ops(rows, {"AIR_1": 2})}
+
+    assert ops["AIR_1"]["$min"] == {"earliest": datetime(2024, 2, 1, 8)}
+    assert ops["AIR_1"]["$max"] == {"latest": datetime(2024, 2, 1, 10)}
+    assert ops["AIR_1"]["$inc"] == {"count": 2}
+    assert ops["BKC_2"]["$inc"] == {"count": 0}   # replayed rows add nothing
+
+
+class _FakeStats:
+    def __init__(self, docs):
+        self.docs = docs
+        self.reads = 0
+
+    def find(self, *args):
+        collection = self
+
+        class _Cursor:
+            async def to_list(self, length):
+                collection.reads += 1
+                return list(collection.docs)
+
+        return _Cursor()
+
+
+def test_segment_stats_cache_reads_collection_once_per_ttl():
+    stats = _FakeStats([
+        {"road_id": "BKC_2", "earliest": None, "latest": None, "count": 0},
+        {"road_id": "AIR_1", "earliest": None, "latest": None, "count": 5},
+    ])
+    cache = SegmentStatsCache(ttl_s=3600)
+
+    async def run():
+        return await asyncio.gather(
+            cache.get(stats, "AIR_1"), cache.get(stats, "NOPE"), cache.all(stats)
+        )
+
+    air, missing, everything = asyncio.run(run())
+    assert air["count"] == 5 and missing is None
+    assert [d["road_id"] for d in everything] == ["AIR_1", "BKC_2"]
+    assert stats.reads == 1
+
+    cache.invalidate()
+    asyncio.run(cache.all(stats))
+    assert stats.reads == 2
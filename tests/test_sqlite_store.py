@@ -0,0 +1,92 @@
+import asyncio
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.data.preprocessor import RAW_FEATURE_COLS
+from src.db.sqlite_store import SQLiteStore
+
+
+def _readings(hours=30, seed=0):
+    rng = np.random.default_rng(seed)
+    frames = []
+    for road_id in ("AIR_1", "BKC_2"):
+        ts = pd.date_range("2024-02-01 13:30", periods=hours, freq="h")
+        df = pd.DataFrame({"road_id": road_id, "timestamp": ts})
+        df["hour"] = ts.hour
+        df["day_of_week"] = ts.dayofweek
+        df["is_weekend"] = (ts.dayofweek >= 5).astype(int)
+        df["month"] = ts.month
+        for col in RAW_FEATURE_COLS:
+            df[col] = rng.random(hours)
+        df["recent_incident_count"] = rng.integers(0, 4, hours)
+        df["congestion_band"] = np.where(df["congestion_level"] > 0.5, "Heavy", "Light")
+        frames.append(df)
+    return pd.concat(frames, ignore_index=True)
+
+
+def _segments():
+    return [
+        {"road_id": "AIR_1", "road_name": "Airport Approach Road", "segment_name": "T2",
+         "lat": 19.09, "lon": 72.87, "road_class": "arterial"},
+        {"road_id": "BKC_2", "road_name": "BKC Road", "segment_name": "G Block",
+         "lat": 19.06, "lon": 72.86, "road_class": "arterial"},
+    ]
+
+
+@pytest.fixture
+def store(tmp_path):
+    df = _readings()
+    store = SQLiteStore(tmp_path / "traffic.db")
+
+    async def load():
+        await store.init()
+        await store.insert_readings(df.to_dict(orient="records"))
+        await store.insert_readings(df.head(5).to_dict(orient="records"))   # replay: no dupes
+        await store.upsert_segments(_segments())
+
+    asyncio.run(load())
+    yield store, df
+    asyncio.run(store.close())
+
+
+def test_history_and_block_match_the_source_rows(store):
+    store, df = store
+    end = datetime(2024, 2, 2, 15, 30)
+    expected = df[(df["road_id"] == "AIR_1") & (df["timestamp"] < end)].tail(24)
+
+    history = asyncio.run(store.fetch_history("AIR_1", end, 24))
+    block = asyncio.run(store.fetch_history_block("AIR_1", end, 24))
+
+    assert history["timestamp"].tolist() == expected["timestamp"].tolist()
+    assert history["road_name"].iloc[0] == "Airport Approach Road"
+    np.testing.assert_array_equal(block.timestamps, expected["timestamp"].to_numpy("datetime64[ms]"))
+    np.testing.assert_allclose(block.raw, expected[RAW_FEATURE_COLS].to_numpy(np.float32))
+    np.testing.assert_array_equal(block.hour, expected["hour"].to_numpy())
+    assert block.meta["road_class"] == "arterial"
+
+    with pytest.raises(ValueError, match="only found"):
+        asyncio.run(store.fetch_history_block("AIR_1", datetime(2024, 2, 1, 20), 24))
+
+
+def test_time_ranges_search_and_segments(store):
+    store, df = store
+
+    air = asyncio.run(store.time_range("AIR_1"))
+    assert air == {
+        "road_id": "AIR_1",
+        "earliest": datetime(2024, 2, 1, 13, 30),
+        "latest": datetime(2024, 2, 2, 18, 30),
+        "count": 30,
+    }
+    assert asyncio.run(store.time_range("NOPE")) is None
+    assert [r["road_id"] for r in asyncio.run(store.all_time_ranges())] == ["AIR_1", "BKC_2"]
+
+    hits = asyncio.run(store.search(road_id="BKC_2", min_congestion=0.5, limit=5))
+    expected = df[(df["road_id"] == "BKC_2") & (df["congestion_level"] >= 0.5)]
+    assert [h["timestamp"] for h in hits] == expected["timestamp"].sort_values(ascending=False).head(5).tolist()
+    assert hits[0]["road_name"] == "BKC Road"
+
+    assert [s["road_name"] for s in asyncio.run(store.list_segments())] == ["Airport Approach Road", "BKC Road"]